@@ -0,0 +1,222 @@
+"""
+検索ログ・クリックのまとめ書き（ライトビハインド）
+
+/api/search・/api/redirect のたびに search_logs / clicks へINSERT・コミットすると、
+リクエストごとのfsyncがバッチの書き込みとWALのロックを取り合う。
+ここではイベントをメモリに溜め、バックグラウンドスレッドが一定間隔（または一定件数）ごとに
+executemany で1トランザクションにまとめて書き込む
+
+- 記録日時はイベント発生時点の値を入れる（書き込みが遅れても日時はずれない）
+- 同じカード・ショップのクリックが CLICK_DEDUP_SECONDS 以内に続いたら1件として扱う
+  （ダブルクリックなど。check_clicks.py の「同一秒での重複」にあたるもの）
+- アプリ終了時（shutdown）に残りを書き込む。プロセスが強制終了した場合は未書き込み分が失われる
+- 書き込みに失敗したイベントは次回に再試行する（溜まりすぎたら古いものから捨てる）
+- 存在しないカード・ショップを指すクリックは書き込まずに捨てる（dropped に数える）
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+from database import close_connection, write_activity_logs
+
+# 書き込み間隔（ミリ秒）
+ACTIVITY_LOG_FLUSH_MS = int(os.environ.get("ACTIVITY_LOG_FLUSH_MS", "1000"))
+# この件数溜まったら間隔を待たずに書き込む
+ACTIVITY_LOG_FLUSH_ROWS = int(os.environ.get("ACTIVITY_LOG_FLUSH_ROWS", "200"))
+# メモリに溜める上限（書き込めない状態が続いたときは古いものから捨てる）
+ACTIVITY_LOG_MAX_PENDING = int(os.environ.get("ACTIVITY_LOG_MAX_PENDING", "50000"))
+# 同じカード・ショップのクリックを重複とみなす秒数
+CLICK_DEDUP_SECONDS = float(os.environ.get("CLICK_DEDUP_SECONDS", "1.0"))
+
+
+def _utc_now() -> str:
+    """CURRENT_TIMESTAMP と同じ形式（UTC）の現在日時"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class ActivityLogBuffer:
+    """検索ログ・クリックを溜めてまとめて書き込む（スレッドセーフ）"""
+
+    def __init__(self, flush_ms: int = ACTIVITY_LOG_FLUSH_MS, flush_rows: int = ACTIVITY_LOG_FLUSH_ROWS,
+                 max_pending: int = ACTIVITY_LOG_MAX_PENDING, dedup_seconds: float = CLICK_DEDUP_SECONDS):
+        self.flush_interval = flush_ms / 1000
+        self.flush_rows = flush_rows
+        self.max_pending = max_pending
+        self.dedup_seconds = dedup_seconds
+        # (card_id, shop_id, price_id, clicked_at)
+        self._clicks: deque = deque()
+        # (keyword, result_count, searched_at)
+        self._searches: deque = deque()
+        # (card_id, shop_id) -> 最後にクリックを受け付けた時刻（monotonic）
+        self._recent_clicks: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        # 書き込みは1スレッドずつ（flush() の直接呼び出しとバックグラウンドスレッドが重ならないように）
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._retry_pending = False
+        self._written = 0
+        self._duplicates = 0
+        self._dropped = 0
+        self._failures = 0
+        self._flushes = 0
+        self._last_flush_ms: Optional[float] = None
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    # -------------------------------------------------------------------------
+    # 記録
+    # -------------------------------------------------------------------------
+
+    def record_click(self, card_id: Optional[int], shop_id: Optional[int], price_id: Optional[int] = None) -> bool:
+        """クリックを記録（重複として捨てた場合は False）"""
+        now = time.monotonic()
+        key = (card_id, shop_id)
+        with self._lock:
+            last = self._recent_clicks.get(key)
+            if last is not None and now - last < self.dedup_seconds:
+                self._duplicates += 1
+                return False
+            self._recent_clicks[key] = now
+            self._clicks.append((card_id, shop_id, price_id, _utc_now()))
+            self._after_append()
+        return True
+
+    def record_search(self, keyword: str, result_count: int):
+        """検索ログを記録"""
+        with self._lock:
+            self._searches.append((keyword, result_count, _utc_now()))
+            self._after_append()
+
+    def _after_append(self):
+        """追加後の処理（self._lock を取得して呼ぶ）"""
+        while len(self._clicks) + len(self._searches) > self.max_pending:
+            (self._clicks if len(self._clicks) >= len(self._searches) else self._searches).popleft()
+            self._dropped += 1
+        if self._thread is None:
+            self._start()
+        if len(self._clicks) + len(self._searches) >= self.flush_rows:
+            self._wakeup.notify()
+
+    # -------------------------------------------------------------------------
+    # 書き込み
+    # -------------------------------------------------------------------------
+
+    def flush(self) -> int:
+        """溜まっているイベントを書き込む → 書き込んだ件数"""
+        with self._flush_lock:
+            with self._lock:
+                clicks = list(self._clicks)
+                searches = list(self._searches)
+                self._clicks.clear()
+                self._searches.clear()
+                self._prune_recent_clicks()
+            if not clicks and not searches:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                written = write_activity_logs(clicks, searches)
+            except sqlite3.IntegrityError:
+                # 削除済みのカードなど書き込めない行があるときは1件ずつ書き込み、その行だけ捨てる
+                written = self._write_one_by_one(clicks, searches)
+            except Exception as e:
+                # 次回に再試行（その間に追加されたものより前に戻す）
+                print(f"[activity_log] 書き込みエラー（{len(clicks) + len(searches)}件は次回に再試行）: {e}")
+                with self._lock:
+                    self._clicks.extendleft(reversed(clicks))
+                    self._searches.extendleft(reversed(searches))
+                    self._failures += 1
+                    self._retry_pending = True
+                    self._after_append()
+                return 0
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._written += written
+                self._dropped += len(clicks) + len(searches) - written
+                self._flushes += 1
+                self._last_flush_ms = elapsed_ms
+                self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+                self._total_flush_ms += elapsed_ms
+            return written
+
+    def _write_one_by_one(self, clicks: list[tuple], searches: list[tuple]) -> int:
+        """1件ずつ書き込む → 書き込んだ件数（書き込めなかった行は flush で dropped に数える）"""
+        written = 0
+        rows = [([click], []) for click in clicks] + [([], [search]) for search in searches]
+        for row_clicks, row_searches in rows:
+            try:
+                written += write_activity_logs(row_clicks, row_searches)
+            except sqlite3.IntegrityError as e:
+                print(f"[activity_log] 書き込めない行を破棄: {row_clicks or row_searches} ({e})")
+        return written
+
+    def _prune_recent_clicks(self):
+        """重複判定の期間を過ぎたクリックを忘れる（self._lock を取得して呼ぶ）"""
+        threshold = time.monotonic() - self.dedup_seconds
+        for key in [key for key, at in self._recent_clicks.items() if at < threshold]:
+            del self._recent_clicks[key]
+
+    def _start(self):
+        """書き込みスレッドを起動（self._lock を取得して呼ぶ）"""
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="activity-log", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._retry_pending:
+                    # 書き込みに失敗した直後は件数に関係なく間隔を空ける
+                    self._retry_pending = False
+                    deadline = time.monotonic() + self.flush_interval
+                    while not self._stopping and time.monotonic() < deadline:
+                        self._wakeup.wait(deadline - time.monotonic())
+                elif not self._stopping and len(self._clicks) + len(self._searches) < self.flush_rows:
+                    self._wakeup.wait(self.flush_interval)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                # このスレッドのDBコネクションを閉じる
+                close_connection()
+                return
+
+    def shutdown(self, timeout: float = 10.0):
+        """書き込みスレッドを止め、残りのイベントを書き込む"""
+        with self._lock:
+            thread = self._thread
+            self._stopping = True
+            self._wakeup.notify()
+        if thread is not None:
+            thread.join(timeout)
+        with self._lock:
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> dict:
+        """待ち件数・書き込み時間などの統計"""
+        with self._lock:
+            return {
+                "pending_clicks": len(self._clicks),
+                "pending_searches": len(self._searches),
+                "written": self._written,
+                "duplicate_clicks": self._duplicates,
+                "dropped": self._dropped,
+                "failures": self._failures,
+                "flushes": self._flushes,
+                "last_flush_ms": round(self._last_flush_ms, 2) if self._last_flush_ms is not None else None,
+                "avg_flush_ms": round(self._total_flush_ms / self._flushes, 2) if self._flushes else None,
+                "max_flush_ms": round(self._max_flush_ms, 2),
+                "flush_interval_ms": int(self.flush_interval * 1000),
+                "flush_rows": self.flush_rows,
+            }
+
+
+# プロセス共通のバッファ
+activity_log = ActivityLogBuffer()
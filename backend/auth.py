@@ -121,7 +121,7 @@ def verify_token(token: str) -> Optional[TokenData]:
 # FastAPI依存性
 # =============================================================================
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> Optional[User]:
+def get_current_user(token: str = Depends(oauth2_scheme)) -> Optional[User]:
     """
     現在のユーザーを取得（オプショナル）
     トークンがない場合はNoneを返す
@@ -143,7 +143,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> Optional[User
     return user
 
 
-async def get_current_user_required(token: str = Depends(oauth2_scheme)) -> User:
+def get_current_user_required(token: str = Depends(oauth2_scheme)) -> User:
     """
     現在のユーザーを取得（必須）
     トークンがない場合は401エラー
@@ -30,8 +30,8 @@ from database import (
     init_shops,
     get_all_shops,
     get_shop_by_name,
-    get_or_create_card,
-    save_price_if_changed,
+    bulk_ingest,
+    card_identity,
     get_database_stats,
     get_inactive_keywords,
 )
@@ -43,7 +43,9 @@ from scrapers import (
     YuyuteiScraper,
     HobbystationScraper,
 )
-from scrapers.base import Product
+from http_clients import aclose_http_clients
+from scrapers.base import Product, SeleniumScraper
+from scrapers.driver_pool import SELENIUM_POOL_SIZE
 
 # ロックファイルパス（二重起動防止）
 LOCK_FILE = Path(__file__).parent / ".batch.lock"
@@ -66,18 +68,22 @@ DEFAULT_KEYWORDS = [
 ]
 
 # スクレイパー定義
-# 順序: httpx系を先に、Selenium系を後に（メモリ効率）
+# ショップ同士は並行実行し、各ショップへのリクエスト間隔は rate_limit.py で制御する
 SCRAPER_CLASSES = [
-    # httpx系（軽量・並行可能だが順次実行）
+    # httpx系（軽量）
     ("Tier One", TieroneScraper),
     ("フルアヘッド", FullaheadScraper),
     ("遊々亭", YuyuteiScraper),  # 現在403エラーで動作不可
-    # Selenium系（重い・順次実行必須）
+    # Selenium系（重い・同時実行数はSELENIUM_CONCURRENCYまで）
     ("カードラッシュ", CardrushScraper),
     ("バトスキ", BatosukiScraper),
     ("ホビーステーション", HobbystationScraper),
 ]
 
+# Selenium系スクレイパーの同時実行数（ドライバプールの大きさに合わせる）
+SELENIUM_CONCURRENCY = SELENIUM_POOL_SIZE
+_selenium_semaphore = asyncio.Semaphore(SELENIUM_CONCURRENCY)
+
 
 def log(message: str):
     """タイムスタンプ付きログ出力"""
@@ -184,7 +190,12 @@ async def fetch_shop_prices(scraper_class, keyword: str) -> tuple[str, list[Prod
     start_time = time.time()
 
     try:
-        products = await scraper.search(keyword)
+        if isinstance(scraper, SeleniumScraper):
+            # Chromeを使うショップは同時実行数を制限
+            async with _selenium_semaphore:
+                products = await scraper.search(keyword)
+        else:
+            products = await scraper.search(keyword)
         elapsed = time.time() - start_time
         return (shop_name, products, elapsed)
     except Exception as e:
@@ -207,47 +218,19 @@ def save_products_to_db(products: list[Product], shop_name: str) -> tuple[int, i
         log(f"  Shop not found: {shop_name}")
         return (0, 0)
 
-    saved = 0
-    skipped = 0
-
-    for product in products:
-        try:
-            # カードを取得または作成
-            card = get_or_create_card(product.name)
-
-            # 価格を保存（変更がある場合のみ）
-            price_id = save_price_if_changed(
-                card_id=card.id,
-                shop_id=shop.id,
-                price=product.price,
-                stock=product.stock,
-                stock_text=product.stock_text,
-                url=product.url,
-                image_url=product.image_url,
-            )
-
-            if price_id:
-                saved += 1
-            else:
-                skipped += 1
-
-        except Exception as e:
-            log(f"  DB save error [{product.name}]: {e}")
-            continue
+    try:
+        # カード登録・価格保存（変更がある場合のみ）を一括処理
+        result = bulk_ingest(shop.id, [product.to_dict() for product in products])
+    except Exception as e:
+        log(f"  DB save error [{shop_name}]: {e}")
+        return (0, 0)
 
-    return (saved, skipped)
+    return (result["saved"], result["skipped"])
 
 
-async def process_keyword(keyword: str) -> dict:
-    """
-    1つのキーワードを全ショップで検索してDB保存
-
-    Returns:
-        結果統計
-    """
-    log(f"Processing keyword: {keyword}")
-
-    results = {
+def _new_keyword_result(keyword: str) -> dict:
+    """キーワードごとの結果統計の初期値"""
+    return {
         "keyword": keyword,
         "shops": {},
         "total_products": 0,
@@ -256,42 +239,76 @@ async def process_keyword(keyword: str) -> dict:
         "total_errors": 0,
     }
 
-    # 各ショップを順次処理（Selenium同時起動防止）
-    for shop_name, scraper_class in SCRAPER_CLASSES:
-        log(f"  [{shop_name}] Fetching...")
+
+async def process_shop(shop_name: str, scraper_class, keywords: list[str], results: dict[str, dict]):
+    """
+    1つのショップでキーワードを順に検索してDB保存
+
+    Args:
+        results: キーワード -> 結果統計（このショップ分を書き込む）
+    """
+    for keyword in keywords:
+        log(f"  [{shop_name}] Fetching: {keyword}")
 
         # 価格取得
         _, products, elapsed = await fetch_shop_prices(scraper_class, keyword)
 
+        result = results[keyword]
         if products:
             # DB保存
             saved, skipped = save_products_to_db(products, shop_name)
-            results["shops"][shop_name] = {
+            result["shops"][shop_name] = {
                 "products": len(products),
                 "saved": saved,
                 "skipped": skipped,
                 "elapsed": elapsed,
             }
-            results["total_products"] += len(products)
-            results["total_saved"] += saved
-            results["total_skipped"] += skipped
-            log(f"  [{shop_name}] Found {len(products)}, saved {saved}, skipped {skipped} ({elapsed:.1f}s)")
+            result["total_products"] += len(products)
+            result["total_saved"] += saved
+            result["total_skipped"] += skipped
+            log(f"  [{shop_name}] {keyword}: found {len(products)}, saved {saved}, skipped {skipped} ({elapsed:.1f}s)")
         else:
-            results["shops"][shop_name] = {
+            result["shops"][shop_name] = {
                 "products": 0,
                 "saved": 0,
                 "skipped": 0,
                 "elapsed": elapsed,
                 "error": True,
             }
-            results["total_errors"] += 1
-            log(f"  [{shop_name}] No results ({elapsed:.1f}s)")
+            result["total_errors"] += 1
+            log(f"  [{shop_name}] {keyword}: no results ({elapsed:.1f}s)")
+
+
+async def process_keywords(keywords: list[str]) -> list[dict]:
+    """
+    キーワード群を全ショップで検索してDB保存
 
-        # Seleniumスクレイパー後は少し待機（メモリ解放）
-        if scraper_class in [CardrushScraper, BatosukiScraper, HobbystationScraper]:
-            await asyncio.sleep(2)
+    ショップごとに独立して並行実行する（各ショップ内ではキーワード順）。
+    全体の所要時間はおおむね最も遅いショップの所要時間になる
 
-    return results
+    Returns:
+        キーワードごとの結果統計（keywordsの順）
+    """
+    results = {keyword: _new_keyword_result(keyword) for keyword in keywords}
+    unique_keywords = list(results)
+
+    await asyncio.gather(*(
+        process_shop(shop_name, scraper_class, unique_keywords, results)
+        for shop_name, scraper_class in SCRAPER_CLASSES
+    ))
+
+    return [results[keyword] for keyword in keywords]
+
+
+async def process_keyword(keyword: str) -> dict:
+    """
+    1つのキーワードを全ショップで検索してDB保存
+
+    Returns:
+        結果統計
+    """
+    log(f"Processing keyword: {keyword}")
+    return (await process_keywords([keyword]))[0]
 
 
 async def run_batch(keywords: list[str] = None):
@@ -304,6 +321,9 @@ async def run_batch(keywords: list[str] = None):
     init_database()
     init_shops()
 
+    # カード名→IDを読み込んでおく（既存カードの確認をDBに問い合わせない）
+    log(f"Card identity cache: {card_identity.preload()} cards")
+
     # 30日間検索されていないキーワードを削除
     cleanup_inactive_keywords(days=30)
 
@@ -312,16 +332,10 @@ async def run_batch(keywords: list[str] = None):
         keywords = load_keywords()
 
     total_start = time.time()
-    all_results = []
 
-    for i, keyword in enumerate(keywords, 1):
-        log(f"\n[{i}/{len(keywords)}] Keyword: {keyword}")
-        result = await process_keyword(keyword)
-        all_results.append(result)
-
-        # キーワード間の待機（サーバー負荷軽減）
-        if i < len(keywords):
-            await asyncio.sleep(5)
+    # 全ショップを並行して処理
+    log(f"Processing {len(keywords)} keywords across {len(SCRAPER_CLASSES)} shops")
+    all_results = await process_keywords(keywords)
 
     # 集計
     total_elapsed = time.time() - total_start
@@ -338,6 +352,9 @@ async def run_batch(keywords: list[str] = None):
     log(f"  Elapsed: {total_elapsed:.1f}s")
     log("=" * 60)
 
+    # 共有HTTPクライアントを閉じる
+    await aclose_http_clients()
+
     return all_results
 
 
@@ -5,20 +5,37 @@
 使用方法:
   python batch_crawl.py                        # カードラッシュを巡回（デフォルト）
   python batch_crawl.py --shop tierone         # Tier Oneを巡回
-  python batch_crawl.py --shop all             # 全ショップを巡回
+  python batch_crawl.py --shop all             # 全ショップを並行して巡回
+  python batch_crawl.py --shop all --workers 1 # 全ショップを1つずつ巡回
   python batch_crawl.py --pages 10             # ページ数指定
   python batch_crawl.py --status               # 全ショップの進捗確認
   python batch_crawl.py --status --shop tierone # 特定ショップの進捗確認
   python batch_crawl.py --reset --shop tierone  # 進捗リセット
+  python batch_crawl.py --full                 # 前回から変更のないページも取り込む
+
+前回の巡回からページが変わっていなければ（ETag/Last-Modifiedによる304、または
+商品リストのハッシュが同じなら）DBへの取り込みを省略し、ページ数の上限にも数えない。
+新着モードは既に取り込み済みのページが続いたところで終了する
+
+--shop all ではショップごとにスレッドを分けて並行して巡回する（ショップ＝ドメインが
+別なので各ショップへのリクエスト間隔は変わらない）。ロックと進捗はショップごと。
+Seleniumを使うショップの同時実行数は SELENIUM_POOL_SIZE まで、DBへの書き込みは
+CRAWL_DB_WRITERS スレッドまでに制限し、全体の結果を batch_logs に1件まとめて記録する
 """
 
 import argparse
+import hashlib
+import json
+import os
+import threading
 import time
 import re
 import sys
 import httpx
 from pathlib import Path
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 if sys.platform != 'win32':
     import fcntl
@@ -29,19 +46,41 @@ from bs4 import BeautifulSoup
 
 from database import (
     get_connection,
-    get_or_create_card_v2,
     get_shop_by_name,
     save_batch_log,
-    save_price_if_changed,
+    bulk_ingest,
+    card_identity,
 )
+from http_clients import get_client, close_http_clients
 from scrapers.base import SeleniumScraper
+from scrapers.driver_pool import SELENIUM_POOL_SIZE
+from scrapers.page_wait import WaitStrategy
+from scrapers.parsing import ListTag, parse_listing, page_text, CARD_NO_RE, YEN_RE, NUMBER_RE, DIGITS_RE
 
-# ロックファイル
-LOCK_FILE = Path(__file__).parent / ".batch_crawl.lock"
+# ロックファイル（ショップごとに .batch_crawl.<ショップキー>.lock）
+LOCK_DIR = Path(__file__).parent
 
 # 設定
 MAX_PAGES_PER_DAY = 50
 PAGE_INTERVAL = 5
+# 変更なしのページは MAX_PAGES_PER_DAY に数えないが、取得するページ数はこの倍数まで
+MAX_FETCH_FACTOR = 3
+# この日数より前に取り込んだページは変更がなくても取り込み直す（他経路での価格更新の上書き対策）
+FINGERPRINT_MAX_AGE_DAYS = 7
+# 新着モードで、取り込み済み（新規カード・価格変更なし）のページがこの数だけ続いたら終了
+NEW_ARRIVALS_SEEN_PAGES = 2
+
+# --shop all で同時に巡回するショップ数
+CRAWL_WORKERS = int(os.environ.get("CRAWL_WORKERS", "6"))
+# 同時にDBへ書き込むスレッド数（SQLiteの書き込みは1本なので待ちを減らすため絞る）
+CRAWL_DB_WRITERS = int(os.environ.get("CRAWL_DB_WRITERS", "1"))
+# --shop all の全体結果を記録する batch_logs のショップ名
+ALL_SHOPS_LOG_NAME = "全ショップ"
+
+# 「￥1,280」形式の価格（Tier One）
+TIERONE_PRICE_RE = re.compile(r'[￥¥]([\d,]+)')
+# 「在庫数: 3」（ホビーステーション）
+HOBBYSTATION_STOCK_RE = re.compile(r'在庫数[：:]\s*(\d+)')
 
 # 対応ショップ
 SUPPORTED_SHOPS = {
@@ -121,17 +160,134 @@ class CrawlProgress:
             return {"current_page": 1, "total_pages": None, "status": "not_started", "last_fetched_at": None}
 
 
+class PageFingerprints:
+    """巡回ページごとのフィンガープリント（前回のETag/Last-Modified・商品リストのハッシュ）"""
+
+    def __init__(self, shop_id: int, mode: str):
+        """
+        Args:
+            shop_id: ショップID
+            mode: "list"（通常巡回）/ "new_arrivals"（新着）
+        """
+        self.shop_id = shop_id
+        self.mode = mode
+
+    def get(self, page: int) -> dict | None:
+        """有効期限内（FINGERPRINT_MAX_AGE_DAYS）に取り込んだページのフィンガープリント"""
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT etag, last_modified, content_hash, item_count, total_pages
+                FROM crawl_page_fingerprints
+                WHERE shop_id = ? AND mode = ? AND page = ?
+                  AND ingested_at > datetime('now', ?)
+            """, (self.shop_id, self.mode, page, f"-{FINGERPRINT_MAX_AGE_DAYS} days"))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+    def save(self, page: int, content_hash: str, item_count: int, total_pages: int,
+             validators: dict = None):
+        """取り込んだページのフィンガープリントを保存"""
+        validators = validators or {}
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO crawl_page_fingerprints
+                    (shop_id, mode, page, etag, last_modified, content_hash, item_count, total_pages,
+                     ingested_at, checked_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+                ON CONFLICT(shop_id, mode, page) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    content_hash = excluded.content_hash,
+                    item_count = excluded.item_count,
+                    total_pages = excluded.total_pages,
+                    ingested_at = excluded.ingested_at,
+                    checked_at = excluded.checked_at
+            """, (self.shop_id, self.mode, page, validators.get("etag"), validators.get("last_modified"),
+                  content_hash, item_count, total_pages))
+            conn.commit()
+
+    def touch(self, page: int):
+        """変更なしを確認した日時を記録"""
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE crawl_page_fingerprints SET checked_at = CURRENT_TIMESTAMP
+                WHERE shop_id = ? AND mode = ? AND page = ?
+            """, (self.shop_id, self.mode, page))
+            conn.commit()
+
+    def get_stats(self) -> dict:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COUNT(*) as pages, MAX(checked_at) as last_checked_at
+                FROM crawl_page_fingerprints
+                WHERE shop_id = ? AND mode = ?
+            """, (self.shop_id, self.mode))
+            row = cursor.fetchone()
+            return {"pages": row["pages"], "last_checked_at": row["last_checked_at"]}
+
+
+def cards_fingerprint(cards: list[dict]) -> str:
+    """ページの商品リストのハッシュ（前回と同じなら取り込みを省略できる）"""
+    payload = json.dumps(cards, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+_db_writer_slots = threading.BoundedSemaphore(CRAWL_DB_WRITERS)
+_selenium_slots = threading.BoundedSemaphore(SELENIUM_POOL_SIZE)
+
+
+@contextmanager
+def db_writer():
+    """DB書き込みの同時実行数を CRAWL_DB_WRITERS までに制限"""
+    with _db_writer_slots:
+        yield
+
+
 class BaseCrawler(ABC):
     """クローラー基底クラス"""
     site_name: str = ""
     base_url: str = ""
     new_arrivals_path: str = ""  # 新着ページのパス
+    # 解析する一覧部分の要素（空ならページ全体を解析、scrapers/parsing.py参照）
+    list_tags: tuple[ListTag, ...] = ()
+    # 条件付きGET（httpxのクローラーのみ）: 取得前に前回の {"etag", "last_modified"} を
+    # request_validators にセットすると、今回の値が response_validators に入る
+    request_validators: dict = None
+    response_validators: dict = None
+    not_modified = False  # 直前の取得が 304 Not Modified だった
 
     @abstractmethod
     def fetch_page(self, page: int) -> tuple[list[dict], int]:
-        """ページを取得して (cards, total_pages) を返す"""
+        """ページを取得して (cards, total_pages) を返す（304なら ([], None)）"""
         pass
 
+    def _conditional_get(self, url: str):
+        """前回の ETag / Last-Modified を付けて取得する（304 Not Modified なら None）"""
+        headers = {}
+        validators = self.request_validators or {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        self.not_modified = False
+        self.response_validators = None
+        response = self.client.get(url, headers=headers)
+        if response.status_code == 304:
+            self.not_modified = True
+            return None
+        response.raise_for_status()
+
+        self.response_validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        return response
+
     def build_new_arrivals_url(self, page: int) -> str:
         """新着ページのURLを構築（サブクラスでオーバーライド可能）"""
         return self.base_url + self.new_arrivals_path
@@ -152,6 +308,8 @@ class CardrushCrawler(SeleniumScraper, BaseCrawler):
     site_name = "カードラッシュ"
     base_url = "https://www.cardrush-bs.jp"
     new_arrivals_path = "/new"
+    wait_strategy = WaitStrategy(("li.list_item_cell",))
+    list_tags = (ListTag("li", "list_item_cell"), ListTag("a", attr="href", contains="page="))
 
     def build_search_url(self, keyword: str) -> str:
         return f"{self.base_url}/product-list"
@@ -167,31 +325,18 @@ class CardrushCrawler(SeleniumScraper, BaseCrawler):
         return f"{self.base_url}/new?page={page}"
 
     def _fetch_with_selenium(self, page: int, url: str) -> tuple[list[dict], int]:
-        import time
-        from selenium.webdriver.common.by import By
-        from selenium.webdriver.support.ui import WebDriverWait
-        from selenium.webdriver.support import expected_conditions as EC
-
         driver = self._get_driver()
 
         print(f"[{self.site_name}] ページ {page} を取得中: {url}")
 
         driver.get(url)
-        time.sleep(3)
-
-        try:
-            WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "li.list_item_cell"))
-            )
-        except:
-            print(f"[{self.site_name}] ページ読み込みタイムアウト")
-
-        time.sleep(2)
+        waited = self._wait_ready(driver)
+        print(f"[{self.site_name}] 読み込み待ち {waited:.1f}s")
 
         html = driver.page_source
-        soup = BeautifulSoup(html, "lxml")
+        soup = parse_listing(html, self.list_tags)
 
-        total_pages = self._parse_total_pages(soup)
+        total_pages = self._parse_total_pages(soup, html)
         cards = self._parse_card_list(soup)
 
         return cards, total_pages
@@ -203,7 +348,7 @@ class CardrushCrawler(SeleniumScraper, BaseCrawler):
     def fetch_page_by_url(self, page: int, url: str) -> tuple[list[dict], int]:
         return self._fetch_with_selenium(page, url)
 
-    def _parse_total_pages(self, soup: BeautifulSoup) -> int:
+    def _parse_total_pages(self, soup: BeautifulSoup, html: str) -> int:
         try:
             max_page = 1
             page_links = soup.select("a[href*='page=']")
@@ -215,7 +360,7 @@ class CardrushCrawler(SeleniumScraper, BaseCrawler):
                     max_page = max(max_page, page_num)
 
             if max_page == 1:
-                text = soup.get_text()
+                text = page_text(html)
                 count_match = re.search(r'([\d,]+)件', text)
                 if count_match:
                     total_items = int(count_match.group(1).replace(",", ""))
@@ -259,7 +404,7 @@ class CardrushCrawler(SeleniumScraper, BaseCrawler):
             return None
 
         card_no = None
-        card_no_match = re.search(r'([A-Z]{2,3}\d{1,2}-[A-Z]?\d{1,3})', name)
+        card_no_match = CARD_NO_RE.search(name)
         if card_no_match:
             card_no = card_no_match.group(1)
 
@@ -268,7 +413,7 @@ class CardrushCrawler(SeleniumScraper, BaseCrawler):
         price_elem = item.select_one("span.figure")
         if price_elem:
             price_text = price_elem.get_text(strip=True)
-            price_match = re.search(r'([\d,]+)', price_text)
+            price_match = NUMBER_RE.search(price_text)
             if price_match:
                 price = int(price_match.group(1).replace(",", ""))
 
@@ -278,7 +423,7 @@ class CardrushCrawler(SeleniumScraper, BaseCrawler):
         stock_elem = item.select_one("p.stock")
         if stock_elem:
             stock_text = stock_elem.get_text(strip=True)
-            stock_match = re.search(r'(\d+)', stock_text)
+            stock_match = DIGITS_RE.search(stock_text)
             if stock_match:
                 stock = int(stock_match.group(1))
 
@@ -302,13 +447,7 @@ class CardrushCrawler(SeleniumScraper, BaseCrawler):
         return []
 
     def close(self):
-        import asyncio
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        loop.run_until_complete(super().close())
+        self.release_driver()
 
 
 class TieroneCrawler(BaseCrawler):
@@ -317,15 +456,17 @@ class TieroneCrawler(BaseCrawler):
     site_name = "Tier One"
     base_url = "https://tier-one.jp"
     new_arrivals_path = "/view/category/bs75"
-
-    def __init__(self):
-        self.client = httpx.Client(
-            timeout=30.0,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            },
-            follow_redirects=True
-        )
+    list_tags = (
+        ListTag("ul", "item-list"),
+        ListTag("li", "item-list-box"),
+        ListTag("div", "item-box"),
+        ListTag("a", attr="href", contains="page="),
+    )
+
+    @property
+    def client(self) -> httpx.Client:
+        """ショップ共通のHTTPクライアント（http_clientsで管理、接続を再利用）"""
+        return get_client(self.base_url)
 
     def build_list_url(self, page: int) -> str:
         if page == 1:
@@ -342,15 +483,17 @@ class TieroneCrawler(BaseCrawler):
         print(f"[{self.site_name}] ページ {page} を取得中: {url}")
 
         try:
-            response = self.client.get(url)
-            response.raise_for_status()
+            response = self._conditional_get(url)
         except Exception as e:
             print(f"[{self.site_name}] 取得エラー: {e}")
             return [], 1
+        if response is None:
+            return [], None
 
-        soup = BeautifulSoup(response.text, "lxml")
+        html = response.text
+        soup = parse_listing(html, self.list_tags)
 
-        total_pages = self._parse_total_pages(soup)
+        total_pages = self._parse_total_pages(soup, html)
         cards = self._parse_card_list(soup)
 
         return cards, total_pages
@@ -362,7 +505,7 @@ class TieroneCrawler(BaseCrawler):
     def fetch_page_by_url(self, page: int, url: str) -> tuple[list[dict], int]:
         return self._fetch_url(page, url)
 
-    def _parse_total_pages(self, soup: BeautifulSoup) -> int:
+    def _parse_total_pages(self, soup: BeautifulSoup, html: str) -> int:
         try:
             max_page = 1
 
@@ -377,7 +520,7 @@ class TieroneCrawler(BaseCrawler):
 
             # 総件数から計算（バックアップ）
             if max_page == 1:
-                text = soup.get_text()
+                text = page_text(html)
                 # "(全9694件)" のような形式
                 count_match = re.search(r'全([\d,]+)件', text)
                 if count_match:
@@ -431,7 +574,7 @@ class TieroneCrawler(BaseCrawler):
 
         # カード番号を抽出
         card_no = None
-        card_no_match = re.search(r'([A-Z]{2,3}\d{1,2}-[A-Z]?\d{1,3})', name)
+        card_no_match = CARD_NO_RE.search(name)
         if card_no_match:
             card_no = card_no_match.group(1)
 
@@ -440,7 +583,7 @@ class TieroneCrawler(BaseCrawler):
         price_elem = item.select_one("p.price")
         if price_elem:
             price_text = price_elem.get_text(strip=True)
-            price_match = re.search(r'[￥¥]([\d,]+)', price_text)
+            price_match = TIERONE_PRICE_RE.search(price_text)
             if price_match:
                 price = int(price_match.group(1).replace(",", ""))
 
@@ -450,7 +593,7 @@ class TieroneCrawler(BaseCrawler):
         stock_elem = item.select_one("p.tac, .stock")
         if stock_elem:
             stock_text = stock_elem.get_text(strip=True)
-            stock_match = re.search(r'(\d+)', stock_text)
+            stock_match = DIGITS_RE.search(stock_text)
             if stock_match:
                 stock = int(stock_match.group(1))
 
@@ -471,7 +614,8 @@ class TieroneCrawler(BaseCrawler):
         }
 
     def close(self):
-        self.client.close()
+        # クライアントはプロセス共通なのでここでは閉じない（close_http_clientsで閉じる）
+        pass
 
 
 class HobbyStationCrawler(BaseCrawler):
@@ -480,15 +624,13 @@ class HobbyStationCrawler(BaseCrawler):
     site_name = "ホビーステーション"
     base_url = "https://www.hobbystation-single.jp"
     new_arrivals_path = "/bs/product/list?page=66"
+    # li:has(.packageDetail) はどの li か事前に分からないので li はすべて残す
+    list_tags = (ListTag("li"), ListTag("a", attr="href", contains="pageno="))
 
-    def __init__(self):
-        self.client = httpx.Client(
-            timeout=30.0,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            },
-            follow_redirects=True
-        )
+    @property
+    def client(self) -> httpx.Client:
+        """ショップ共通のHTTPクライアント（http_clientsで管理、接続を再利用）"""
+        return get_client(self.base_url)
 
     def build_list_url(self, page: int) -> str:
         return f"{self.base_url}/bs/product/list?page=1&pageno={page}"
@@ -500,15 +642,17 @@ class HobbyStationCrawler(BaseCrawler):
         print(f"[{self.site_name}] ページ {page} を取得中: {url}")
 
         try:
-            response = self.client.get(url)
-            response.raise_for_status()
+            response = self._conditional_get(url)
         except Exception as e:
             print(f"[{self.site_name}] 取得エラー: {e}")
             return [], 1
+        if response is None:
+            return [], None
 
-        soup = BeautifulSoup(response.text, "lxml")
+        html = response.text
+        soup = parse_listing(html, self.list_tags)
 
-        total_pages = self._parse_total_pages(soup)
+        total_pages = self._parse_total_pages(soup, html)
         cards = self._parse_card_list(soup)
 
         return cards, total_pages
@@ -520,7 +664,7 @@ class HobbyStationCrawler(BaseCrawler):
     def fetch_page_by_url(self, page: int, url: str) -> tuple[list[dict], int]:
         return self._fetch_url(page, url)
 
-    def _parse_total_pages(self, soup: BeautifulSoup) -> int:
+    def _parse_total_pages(self, soup: BeautifulSoup, html: str) -> int:
         try:
             # 「最後へ」リンクからページ数を取得
             last_link = soup.select_one("a[href*='pageno=']:-soup-contains('最後')")
@@ -541,7 +685,7 @@ class HobbyStationCrawler(BaseCrawler):
                 return int(match.group(1))
 
             # 総件数から計算（バックアップ）
-            text = soup.get_text()
+            text = page_text(html)
             count_match = re.search(r'([\d,]+)件', text)
             if count_match:
                 total = int(count_match.group(1).replace(",", ""))
@@ -584,7 +728,7 @@ class HobbyStationCrawler(BaseCrawler):
 
         # カード番号を抽出
         card_no = None
-        card_no_match = re.search(r'([A-Z]{2,3}\d{1,2}-[A-Z]?\d{1,3})', name)
+        card_no_match = CARD_NO_RE.search(name)
         if card_no_match:
             card_no = card_no_match.group(1)
 
@@ -593,7 +737,7 @@ class HobbyStationCrawler(BaseCrawler):
         price_elem = item.select_one(".packageDetail")
         if price_elem:
             price_text = price_elem.get_text(strip=True)
-            price_match = re.search(r'([\d,]+)円', price_text)
+            price_match = YEN_RE.search(price_text)
             if price_match:
                 price = int(price_match.group(1).replace(",", ""))
 
@@ -607,7 +751,7 @@ class HobbyStationCrawler(BaseCrawler):
         else:
             # 在庫数を取得
             if price_elem:
-                stock_match = re.search(r'在庫数[：:]\s*(\d+)', price_elem.get_text())
+                stock_match = HOBBYSTATION_STOCK_RE.search(price_elem.get_text())
                 if stock_match:
                     stock = int(stock_match.group(1))
                     stock_text = f"在庫数: {stock}"
@@ -633,7 +777,8 @@ class HobbyStationCrawler(BaseCrawler):
         }
 
     def close(self):
-        self.client.close()
+        # クライアントはプロセス共通なのでここでは閉じない（close_http_clientsで閉じる）
+        pass
 
 
 class BatosukiCrawler(BaseCrawler):
@@ -642,15 +787,12 @@ class BatosukiCrawler(BaseCrawler):
     site_name = "バトスキ"
     base_url = "https://batosuki.shop"
     new_arrivals_path = "/?mode=cate&cbid=2587031&csid=39"
+    list_tags = (ListTag("li", "kr-productlist_list"), ListTag("a", attr="href", contains="page="))
 
-    def __init__(self):
-        self.client = httpx.Client(
-            timeout=30.0,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            },
-            follow_redirects=True
-        )
+    @property
+    def client(self) -> httpx.Client:
+        """ショップ共通のHTTPクライアント（http_clientsで管理、接続を再利用）"""
+        return get_client(self.base_url)
 
     def build_list_url(self, page: int) -> str:
         return f"{self.base_url}/?mode=srh&page={page}"
@@ -662,13 +804,14 @@ class BatosukiCrawler(BaseCrawler):
         print(f"[{self.site_name}] ページ {page} を取得中: {url}")
 
         try:
-            response = self.client.get(url)
-            response.raise_for_status()
+            response = self._conditional_get(url)
         except Exception as e:
             print(f"[{self.site_name}] 取得エラー: {e}")
             return [], 1
+        if response is None:
+            return [], None
 
-        soup = BeautifulSoup(response.text, "lxml")
+        soup = parse_listing(response.text, self.list_tags)
 
         total_pages = self._parse_total_pages(soup)
         cards = self._parse_card_list(soup)
@@ -734,7 +877,7 @@ class BatosukiCrawler(BaseCrawler):
 
         # カード番号を抽出
         card_no = None
-        card_no_match = re.search(r'([A-Z]{2,3}\d{1,2}-[A-Z]?\d{1,3})', name)
+        card_no_match = CARD_NO_RE.search(name)
         if card_no_match:
             card_no = card_no_match.group(1)
 
@@ -743,7 +886,7 @@ class BatosukiCrawler(BaseCrawler):
         price_elem = item.select_one("span.item_price")
         if price_elem:
             price_text = price_elem.get_text(strip=True)
-            price_match = re.search(r'([\d,]+)円', price_text)
+            price_match = YEN_RE.search(price_text)
             if price_match:
                 price = int(price_match.group(1).replace(",", ""))
 
@@ -775,7 +918,8 @@ class BatosukiCrawler(BaseCrawler):
         }
 
     def close(self):
-        self.client.close()
+        # クライアントはプロセス共通なのでここでは閉じない（close_http_clientsで閉じる）
+        pass
 
 
 class FullaheadCrawler(SeleniumScraper, BaseCrawler):
@@ -784,6 +928,9 @@ class FullaheadCrawler(SeleniumScraper, BaseCrawler):
     site_name = "フルアヘッド"
     base_url = "https://fullahead-tcg.com"
     new_arrivals_path = "/shopbrand/bs75/"
+    wait_strategy = WaitStrategy(("a[href*='/shopdetail/']",))
+    # 総件数（ページ全体のテキスト）と商品リンクの親要素を参照するので全体を解析する
+    list_tags = ()
 
     def build_search_url(self, keyword: str) -> str:
         return f"{self.base_url}/shopbrand/all_items/"
@@ -799,29 +946,16 @@ class FullaheadCrawler(SeleniumScraper, BaseCrawler):
         return f"{self.base_url}/shopbrand/bs75/page{page}/order/"
 
     def _fetch_with_selenium(self, page: int, url: str) -> tuple[list[dict], int]:
-        import time
-        from selenium.webdriver.common.by import By
-        from selenium.webdriver.support.ui import WebDriverWait
-        from selenium.webdriver.support import expected_conditions as EC
-
         driver = self._get_driver()
 
         print(f"[{self.site_name}] ページ {page} を取得中: {url}")
 
         driver.get(url)
-        time.sleep(5)
-
-        try:
-            WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "a[href*='/shopdetail/']"))
-            )
-        except:
-            print(f"[{self.site_name}] ページ読み込みタイムアウト")
-
-        time.sleep(2)
+        waited = self._wait_ready(driver)
+        print(f"[{self.site_name}] 読み込み待ち {waited:.1f}s")
 
         html = driver.page_source
-        soup = BeautifulSoup(html, "lxml")
+        soup = parse_listing(html, self.list_tags)
 
         total_pages = self._parse_total_pages(soup)
         cards = self._parse_card_list(soup)
@@ -897,7 +1031,7 @@ class FullaheadCrawler(SeleniumScraper, BaseCrawler):
 
         # カード番号を抽出
         card_no = None
-        card_no_match = re.search(r'([A-Z]{2,3}\d{1,2}-[A-Z]?\d{1,3})', name)
+        card_no_match = CARD_NO_RE.search(name)
         if card_no_match:
             card_no = card_no_match.group(1)
 
@@ -916,7 +1050,7 @@ class FullaheadCrawler(SeleniumScraper, BaseCrawler):
             price_elem = item.select_one("span.itemPrice strong")
         if price_elem:
             price_text = price_elem.get_text(strip=True)
-            price_match = re.search(r'([\d,]+)', price_text)
+            price_match = NUMBER_RE.search(price_text)
             if price_match:
                 price = int(price_match.group(1).replace(",", ""))
 
@@ -926,7 +1060,7 @@ class FullaheadCrawler(SeleniumScraper, BaseCrawler):
             stock_elem = item.select_one("span.M_item-stock-smallstock, span.M_category-smallstock")
         if stock_elem:
             stock_text = stock_elem.get_text(strip=True)
-            stock_match = re.search(r'(\d+)', stock_text)
+            stock_match = DIGITS_RE.search(stock_text)
             if stock_match:
                 stock = int(stock_match.group(1))
         else:
@@ -965,13 +1099,7 @@ class FullaheadCrawler(SeleniumScraper, BaseCrawler):
         return []
 
     def close(self):
-        import asyncio
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        loop.run_until_complete(super().close())
+        self.release_driver()
 
 
 class DorasutaCrawler(SeleniumScraper, BaseCrawler):
@@ -980,6 +1108,8 @@ class DorasutaCrawler(SeleniumScraper, BaseCrawler):
     site_name = "ドラスタ"
     base_url = "https://dorasuta.jp"
     new_arrivals_path = "/battlespirits/product-list?st0=1"  # 新着順ソート
+    wait_strategy = WaitStrategy(("div.element",))
+    list_tags = (ListTag("div", "element"), ListTag("div", "pager"))
 
     def __init__(self):
         self._current_page = 0
@@ -1009,41 +1139,31 @@ class DorasutaCrawler(SeleniumScraper, BaseCrawler):
 
     def _fetch_dorasuta_page(self, page: int, url: str) -> tuple[list[dict], int]:
         """ドラスタのページを取得する共通メソッド"""
-        import time
-        from selenium.webdriver.common.by import By
-        from selenium.webdriver.support.ui import WebDriverWait
-        from selenium.webdriver.support import expected_conditions as EC
-
         driver = self._get_driver()
 
+        previous_page = None
         if page == 1 or self._current_page == 0:
             # 初回: 指定URLでページを開く
             print(f"[{self.site_name}] ページ {page} を取得中: {url}")
             driver.get(url)
-            time.sleep(4)
         else:
             # 2ページ目以降: JavaScriptでページ遷移
             print(f"[{self.site_name}] ページ {page} を取得中...")
             try:
+                previous_page = self._mark_page(driver)
                 driver.execute_script(f"$.formSubmit('#form110200', 'search', ['pager', '{page}']);")
-                time.sleep(4)
             except Exception as e:
                 print(f"[{self.site_name}] ページ遷移エラー: {e}")
                 return [], page
 
         self._current_page = page
 
-        try:
-            WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.element"))
-            )
-        except:
-            pass
-
-        time.sleep(2)
+        # ページが切り替わって商品が描画されるまで待つ
+        waited = self._wait_ready(driver, previous_page=previous_page)
+        print(f"[{self.site_name}] 読み込み待ち {waited:.1f}s")
 
         html = driver.page_source
-        soup = BeautifulSoup(html, "lxml")
+        soup = parse_listing(html, self.list_tags)
 
         total_pages = self._parse_total_pages(soup)
         cards = self._parse_card_list(soup)
@@ -1097,7 +1217,7 @@ class DorasutaCrawler(SeleniumScraper, BaseCrawler):
 
         # カード番号を抽出
         card_no = None
-        card_no_match = re.search(r'([A-Z]{2,3}\d{1,2}-[A-Z]?\d{1,3})', name)
+        card_no_match = CARD_NO_RE.search(name)
         if card_no_match:
             card_no = card_no_match.group(1)
 
@@ -1107,7 +1227,7 @@ class DorasutaCrawler(SeleniumScraper, BaseCrawler):
         for li in price_elems:
             if "円" in li.get_text():
                 price_text = li.get_text(strip=True)
-                price_match = re.search(r'([\d,]+)円', price_text)
+                price_match = YEN_RE.search(price_text)
                 if price_match:
                     price = int(price_match.group(1).replace(",", ""))
                 break
@@ -1152,36 +1272,37 @@ class DorasutaCrawler(SeleniumScraper, BaseCrawler):
         return []
 
     def close(self):
-        import asyncio
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        loop.run_until_complete(super().close())
+        self.release_driver()
+
+
+CRAWLER_CLASSES = {
+    "cardrush": CardrushCrawler,
+    "tierone": TieroneCrawler,
+    "hobbystation": HobbyStationCrawler,
+    "batosuki": BatosukiCrawler,
+    "fullahead": FullaheadCrawler,
+    "dorasuta": DorasutaCrawler,
+}
 
 
 def get_crawler(shop_key: str) -> BaseCrawler:
     """ショップキーに対応するクローラーを返す"""
-    if shop_key == "cardrush":
-        return CardrushCrawler()
-    elif shop_key == "tierone":
-        return TieroneCrawler()
-    elif shop_key == "hobbystation":
-        return HobbyStationCrawler()
-    elif shop_key == "batosuki":
-        return BatosukiCrawler()
-    elif shop_key == "fullahead":
-        return FullaheadCrawler()
-    elif shop_key == "dorasuta":
-        return DorasutaCrawler()
-    else:
+    crawler_class = CRAWLER_CLASSES.get(shop_key)
+    if crawler_class is None:
         raise ValueError(f"Unknown shop: {shop_key}")
+    return crawler_class()
+
 
+def uses_selenium(shop_key: str) -> bool:
+    return issubclass(CRAWLER_CLASSES[shop_key], SeleniumScraper)
 
-def acquire_lock():
+
+def acquire_lock(shop_key: str):
+    """ショップのロックを取得（他のプロセスが同じショップを巡回中ならNone）"""
+    if sys.platform == 'win32':
+        return True
     try:
-        lock_fd = open(LOCK_FILE, 'w')
+        lock_fd = open(LOCK_DIR / f".batch_crawl.{shop_key}.lock", 'w')
         fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
         return lock_fd
     except (IOError, OSError):
@@ -1189,29 +1310,50 @@ def acquire_lock():
 
 
 def release_lock(lock_fd):
-    if lock_fd:
+    if lock_fd and lock_fd is not True:
         fcntl.flock(lock_fd, fcntl.LOCK_UN)
         lock_fd.close()
 
 
-def run_crawl(shop_key: str, max_pages: int = MAX_PAGES_PER_DAY, new_arrivals: bool = False):
-    """指定ショップの巡回を実行"""
+def run_crawl(shop_key: str, max_pages: int = MAX_PAGES_PER_DAY, new_arrivals: bool = False,
+              full: bool = False):
+    """
+    指定ショップの巡回を実行
+
+    Args:
+        shop_key: ショップキー（SUPPORTED_SHOPS）
+        max_pages: 取り込むページ数の上限（変更なしのページは数えない）
+        new_arrivals: 新着ページを巡回（取り込み済みのページが続いたら終了）
+        full: フィンガープリントを使わず、取得したページをすべて取り込む
+
+    Returns:
+        巡回結果 {"shop", "status", "pages_processed", "pages_unchanged",
+                  "cards_total", "cards_new", "cards_updated", "message"}
+    """
     shop_name = SUPPORTED_SHOPS.get(shop_key)
+    result = {"shop": shop_name or shop_key, "status": "error", "pages_processed": 0, "pages_unchanged": 0,
+              "cards_total": 0, "cards_new": 0, "cards_updated": 0, "message": None}
     if not shop_name:
         print(f"エラー: 未対応のショップ '{shop_key}'")
-        return
+        result["message"] = "未対応のショップ"
+        return result
 
     shop = get_shop_by_name(shop_name)
     if not shop:
         print(f"エラー: ショップ '{shop_name}' が見つかりません")
-        return
+        result["message"] = "ショップが見つかりません"
+        return result
 
     crawler = None
     total_cards = 0
     new_cards = 0
     updated_cards = 0
     pages_processed = 0
+    pages_ingested = 0
+    pages_unchanged = 0
+    seen_streak = 0
     started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    fingerprints = PageFingerprints(shop.id, "new_arrivals" if new_arrivals else "list")
 
     if new_arrivals:
         # 新着モード: 進捗管理不要、ページ1から全ページ巡回
@@ -1226,8 +1368,13 @@ def run_crawl(shop_key: str, max_pages: int = MAX_PAGES_PER_DAY, new_arrivals: b
     try:
         crawler = get_crawler(shop_key)
 
-        for i in range(max_pages):
-            page = current_page + i
+        page = current_page
+        while pages_ingested < max_pages and pages_processed < max_pages * MAX_FETCH_FACTOR:
+            if pages_processed:
+                time.sleep(PAGE_INTERVAL)
+
+            previous = None if full else fingerprints.get(page)
+            crawler.request_validators = previous
 
             if new_arrivals:
                 # 新着ページURLを使ってfetch
@@ -1237,35 +1384,32 @@ def run_crawl(shop_key: str, max_pages: int = MAX_PAGES_PER_DAY, new_arrivals: b
                 cards, total_pages = crawler.fetch_page(page)
             pages_processed += 1
 
-            print(f"[{shop_name}] ページ {page}/{total_pages}: {len(cards)} 件取得")
-
-            for card_data in cards:
-                total_cards += 1
-                card = get_or_create_card_v2(
-                    name=card_data["name"],
-                    card_no=card_data.get("card_no"),
-                    source_shop_id=shop.id,
-                    detail_url=card_data.get("detail_url"),
-                )
-                today_str = datetime.now().strftime("%Y-%m-%d")
-                if card.first_seen_at and str(card.first_seen_at).startswith(today_str):
-                    new_cards += 1
-
-                # 価格を保存
-                if card_data.get("price", 0) > 0:
-                    price_saved = save_price_if_changed(
-                        card_id=card.id,
-                        shop_id=shop.id,
-                        price=card_data["price"],
-                        stock=card_data.get("stock", 0),
-                        stock_text=card_data.get("stock_text", ""),
-                        url=card_data.get("detail_url", ""),
-                        image_url=card_data.get("image_url", ""),
-                    )
-                    # 既存カードで価格が保存された場合は更新としてカウント
-                    is_new = card.first_seen_at and str(card.first_seen_at).startswith(today_str)
-                    if price_saved and not is_new:
-                        updated_cards += 1
+            # 前回から変更がなければ取り込みを省略
+            if crawler.not_modified:
+                unchanged = True
+                total_pages = previous["total_pages"] or page
+                print(f"[{shop_name}] ページ {page}/{total_pages}: 変更なし (304)")
+            else:
+                content_hash = cards_fingerprint(cards)
+                unchanged = bool(previous and cards and previous["content_hash"] == content_hash)
+                print(f"[{shop_name}] ページ {page}/{total_pages}: {len(cards)} 件取得"
+                      + ("（変更なし）" if unchanged else ""))
+
+            if unchanged:
+                pages_unchanged += 1
+                with db_writer():
+                    fingerprints.touch(page)
+            else:
+                # カード登録・価格保存をページ単位で一括処理
+                with db_writer():
+                    ingest = bulk_ingest(shop.id, cards)
+                    if cards:
+                        fingerprints.save(page, content_hash, len(cards), total_pages, crawler.response_validators)
+                pages_ingested += 1
+                total_cards += ingest["total"]
+                new_cards += ingest["new"]
+                # 既存カードで価格が保存された場合は更新としてカウント
+                updated_cards += ingest["updated"]
 
             if page >= total_pages:
                 if not new_arrivals:
@@ -1276,15 +1420,28 @@ def run_crawl(shop_key: str, max_pages: int = MAX_PAGES_PER_DAY, new_arrivals: b
                 if not new_arrivals:
                     progress.update_progress(page + 1, total_pages, 'in_progress')
 
-            if i < max_pages - 1:
-                time.sleep(PAGE_INTERVAL)
+            # 新着モード: 取り込み済みのページが続いたら以降は既知のカードなので終了
+            if new_arrivals and not full:
+                if unchanged or (ingest["new"] == 0 and ingest["saved"] == 0):
+                    seen_streak += 1
+                else:
+                    seen_streak = 0
+                if seen_streak >= NEW_ARRIVALS_SEEN_PAGES:
+                    print(f"[{shop_name}] 取り込み済みのページに到達したため終了")
+                    break
+
+            page += 1
 
         print(f"\n[{shop_name}] 巡回完了")
-        print(f"  処理ページ数: {pages_processed}")
+        print(f"  処理ページ数: {pages_processed}（変更なし {pages_unchanged}）")
         print(f"  取得カード数: {total_cards}")
         print(f"  新規登録数: {new_cards}")
         print(f"  価格更新数: {updated_cards}")
+        wait_times = getattr(crawler, "wait_times", None)
+        if wait_times:
+            print(f"  読み込み待ち: 平均 {sum(wait_times) / len(wait_times):.1f}s / 最大 {max(wait_times):.1f}s")
 
+        result.update(status="success", message=f"{pages_processed}ページ巡回完了（変更なし{pages_unchanged}ページ）")
         # 成功ログを保存
         save_batch_log(
             batch_type='crawl',
@@ -1294,7 +1451,7 @@ def run_crawl(shop_key: str, max_pages: int = MAX_PAGES_PER_DAY, new_arrivals: b
             cards_total=total_cards,
             cards_new=new_cards,
             cards_updated=updated_cards,
-            message=f"{pages_processed}ページ巡回完了",
+            message=result["message"],
             started_at=started_at
         )
 
@@ -1303,6 +1460,7 @@ def run_crawl(shop_key: str, max_pages: int = MAX_PAGES_PER_DAY, new_arrivals: b
         import traceback
         traceback.print_exc()
 
+        result["message"] = str(e)
         # エラーログを保存
         save_batch_log(
             batch_type='crawl',
@@ -1319,6 +1477,78 @@ def run_crawl(shop_key: str, max_pages: int = MAX_PAGES_PER_DAY, new_arrivals: b
         if crawler:
             crawler.close()
 
+    result.update(pages_processed=pages_processed, pages_unchanged=pages_unchanged,
+                  cards_total=total_cards, cards_new=new_cards, cards_updated=updated_cards)
+    return result
+
+
+def run_shop(shop_key: str, max_pages: int = MAX_PAGES_PER_DAY, new_arrivals: bool = False,
+             full: bool = False) -> dict:
+    """ショップのロックを取って巡回（Seleniumのショップは空き枠を待ってから）"""
+    lock_fd = acquire_lock(shop_key)
+    if not lock_fd:
+        print(f"[{SUPPORTED_SHOPS[shop_key]}] 別のプロセスが巡回中のためスキップします")
+        return {"shop": SUPPORTED_SHOPS[shop_key], "status": "skipped", "pages_processed": 0,
+                "pages_unchanged": 0, "cards_total": 0, "cards_new": 0, "cards_updated": 0,
+                "message": "別のプロセスが巡回中"}
+    try:
+        if uses_selenium(shop_key):
+            with _selenium_slots:
+                return run_crawl(shop_key, max_pages=max_pages, new_arrivals=new_arrivals, full=full)
+        return run_crawl(shop_key, max_pages=max_pages, new_arrivals=new_arrivals, full=full)
+    finally:
+        release_lock(lock_fd)
+
+
+def run_all(max_pages: int = MAX_PAGES_PER_DAY, new_arrivals: bool = False, full: bool = False,
+            workers: int = CRAWL_WORKERS) -> list[dict]:
+    """
+    全ショップを並行して巡回し、全体の結果を batch_logs に記録
+
+    Seleniumを使うショップは先に始める（同時実行数の制限で待つ間にhttpxのショップを進める）
+    """
+    started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    started = time.monotonic()
+    shop_keys = sorted(SUPPORTED_SHOPS, key=lambda key: not uses_selenium(key))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="crawl") as executor:
+        futures = [
+            executor.submit(run_shop, shop_key, max_pages, new_arrivals, full)
+            for shop_key in shop_keys
+        ]
+        results = [future.result() for future in futures]
+
+    elapsed = time.monotonic() - started
+    totals = {
+        key: sum(r[key] for r in results)
+        for key in ("pages_processed", "pages_unchanged", "cards_total", "cards_new", "cards_updated")
+    }
+    failed = [r["shop"] for r in results if r["status"] == "error"]
+    skipped = [r["shop"] for r in results if r["status"] == "skipped"]
+
+    print(f"\n=== 全ショップ巡回完了（{elapsed / 60:.1f}分） ===")
+    for r in results:
+        print(f"  {r['shop']}: {r['status']} {r['pages_processed']}ページ"
+              f" / {r['cards_total']}件（新規 {r['cards_new']}、更新 {r['cards_updated']}）")
+
+    message = f"{len(results) - len(failed) - len(skipped)}/{len(results)}ショップ完了（{elapsed / 60:.1f}分）"
+    if failed:
+        message += f" エラー: {', '.join(failed)}"
+    if skipped:
+        message += f" スキップ: {', '.join(skipped)}"
+    save_batch_log(
+        batch_type='crawl_all',
+        shop_name=ALL_SHOPS_LOG_NAME,
+        status='error' if failed else 'success',
+        pages_processed=totals["pages_processed"],
+        cards_total=totals["cards_total"],
+        cards_new=totals["cards_new"],
+        cards_updated=totals["cards_updated"],
+        message=message,
+        started_at=started_at
+    )
+    return results
+
 
 def show_status(shop_key: str = None):
     """進捗状況を表示"""
@@ -1348,6 +1578,10 @@ def show_status(shop_key: str = None):
             pct = (stats['current_page'] / stats['total_pages']) * 100
             print(f"  進捗: {pct:.1f}%")
 
+        fingerprint_stats = PageFingerprints(shop.id, "list").get_stats()
+        print(f"  記録済みページ: {fingerprint_stats['pages']}"
+              f"（最終確認: {fingerprint_stats['last_checked_at'] or '未実行'}）")
+
 
 def reset_progress(shop_key: str):
     """進捗をリセット"""
@@ -1377,6 +1611,10 @@ def main():
                         help="新着ページのみ巡回（最新弾のカードを取得）")
     parser.add_argument("--status", action="store_true", help="進捗確認")
     parser.add_argument("--reset", action="store_true", help="進捗リセット")
+    parser.add_argument("--full", action="store_true",
+                        help="前回から変更のないページも取り込む（フィンガープリントを使わない）")
+    parser.add_argument("--workers", type=int, default=CRAWL_WORKERS,
+                        help=f"--shop all で同時に巡回するショップ数（デフォルト: {CRAWL_WORKERS}）")
 
     args = parser.parse_args()
 
@@ -1394,25 +1632,16 @@ def main():
         return
 
     print(f"[{datetime.now()}] バッチ開始")
-
-    if sys.platform != 'win32':
-        lock_fd = acquire_lock()
-        if not lock_fd:
-            print("別のバッチプロセスが実行中です。終了します。")
-            return
-    else:
-        lock_fd = None
+    # カード名→IDを読み込んでおく（既存カードの確認をDBに問い合わせない）
+    print(f"カードキャッシュ: {card_identity.preload()}件")
 
     try:
         if args.shop == "all":
-            for shop_key in SUPPORTED_SHOPS.keys():
-                run_crawl(shop_key, max_pages=args.pages, new_arrivals=args.new_arrivals)
-                print()
+            run_all(max_pages=args.pages, new_arrivals=args.new_arrivals, full=args.full, workers=args.workers)
         else:
-            run_crawl(args.shop, max_pages=args.pages, new_arrivals=args.new_arrivals)
+            run_shop(args.shop, max_pages=args.pages, new_arrivals=args.new_arrivals, full=args.full)
     finally:
-        if lock_fd:
-            release_lock(lock_fd)
+        close_http_clients()
 
     print(f"[{datetime.now()}] バッチ終了")
 
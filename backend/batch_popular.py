@@ -46,6 +46,7 @@ from scrapers import (
     FullaheadScraper,
     HobbystationScraper,
 )
+from http_clients import aclose_http_clients
 from scrapers.base import Product
 
 # ロックファイルパス
@@ -232,6 +233,9 @@ async def update_popular_card_prices(limit: int = DEFAULT_LIMIT):
     log(f"  Elapsed: {elapsed:.1f}s")
     log("=" * 60)
 
+    # 共有HTTPクライアントを閉じる
+    await aclose_http_clients()
+
 
 def refresh_popular_cards():
     """人気カード判定を更新"""
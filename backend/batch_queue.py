@@ -31,8 +31,7 @@ from database import (
     init_shops,
     get_connection,
     get_shop_by_name,
-    get_or_create_card,
-    save_price_if_changed,
+    bulk_ingest,
     get_pending_queue_items,
     update_queue_status,
     cleanup_old_queue,
@@ -44,6 +43,7 @@ from scrapers import (
     FullaheadScraper,
     HobbystationScraper,
 )
+from http_clients import aclose_http_clients
 from scrapers.base import Product
 
 # ロックファイルパス
@@ -120,20 +120,9 @@ async def fetch_and_save(keyword: str) -> dict:
             # DB保存
             shop = get_shop_by_name(shop_name)
             if shop and filtered:
-                for product in filtered:
-                    card = get_or_create_card(product.name)
-                    price_id = save_price_if_changed(
-                        card_id=card.id,
-                        shop_id=shop.id,
-                        price=product.price,
-                        stock=product.stock,
-                        stock_text=product.stock_text,
-                        url=product.url,
-                        image_url=product.image_url,
-                    )
-                    total_products += 1
-                    if price_id:
-                        total_saved += 1
+                result = bulk_ingest(shop.id, [p.to_dict() for p in filtered])
+                total_products += len(filtered)
+                total_saved += result["saved"]
 
                 log(f"  [{shop_name}] {len(filtered)} items")
 
@@ -212,6 +201,9 @@ async def process_queue(limit: int = DEFAULT_LIMIT):
     log(f"  Elapsed: {elapsed:.1f}s")
     log("=" * 60)
 
+    # 共有HTTPクライアントを閉じる
+    await aclose_http_clients()
+
 
 def show_status():
     """キュー状況表示"""
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+DBコネクション取得のマイクロベンチマーク
+
+接続ごとにconnect + PRAGMAを発行していた旧方式と、
+スレッドローカルの長寿命コネクションを再利用する現方式で
+1クエリあたりのオーバーヘッドを比較する（一時DBを使用、本番DBには触れない）
+
+使用方法:
+    python benchmarks/bench_db_connection.py
+    python benchmarks/bench_db_connection.py --iterations 5000
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database
+
+
+@contextmanager
+def connect_per_call():
+    """旧実装のget_connection（呼び出しごとに接続を開閉）"""
+    conn = sqlite3.connect(str(database.DB_PATH), timeout=30.0)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def run_queries(connection_factory, iterations: int) -> float:
+    """ショップ名検索を繰り返し、1クエリあたりの平均秒数を返す"""
+    start = time.perf_counter()
+    for i in range(iterations):
+        with connection_factory() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM shops WHERE name = ?", ("Tier One",))
+            cursor.fetchone()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DB connection overhead benchmark")
+    parser.add_argument("--iterations", "-n", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = Path(tmp) / "bench.db"
+        database.init_database()
+        database.init_shops()
+
+        # ウォームアップ
+        run_queries(connect_per_call, 50)
+        run_queries(database.get_connection, 50)
+
+        before = run_queries(connect_per_call, args.iterations)
+        after = run_queries(database.get_connection, args.iterations)
+        database.close_connection()
+
+    print(f"\n=== Connection overhead ({args.iterations} queries) ===")
+    print(f"  connect-per-call : {before * 1e6:8.1f} us/query")
+    print(f"  pooled           : {after * 1e6:8.1f} us/query")
+    print(f"  speedup          : {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
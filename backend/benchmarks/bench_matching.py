@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+カード名あいまいマッチング（card_matching.py）のベンチマーク（オフライン）
+
+data/*.json のダンプを使う。ドラスタのカード（名前にカード番号あり）を参照側、
+遊々亭のカード（名前に番号なし・ダンプに正解の card_no あり）を紐付ける側にして、
+基本名の完全一致（match_cards_by_name）とあいまいマッチングの精度・速度を比べる
+
+- precision: 紐付けたうち正しい番号だった割合
+- recall: 正解の番号が参照側にあるカードのうち、正しく紐付けた割合
+- 参照側の件数を変えたときの1件あたりの検索時間と、全件比較（総当たり）との比較
+
+使用方法:
+    python benchmarks/bench_matching.py
+    python benchmarks/bench_matching.py --threshold 0.8 --brute-force-sample 300
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+DATA_DIR = BACKEND_DIR.parent / "data"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+from card_matching import DEFAULT_THRESHOLD, CardMatcher, dice, match_key, ngrams  # noqa: E402
+from database import extract_base_card_name, extract_card_number  # noqa: E402
+
+
+def load_dump_cards(pattern: str) -> list[dict]:
+    """ダンプのカード（名前で重複除去）"""
+    cards = {}
+    for path in sorted(DATA_DIR.glob(pattern)):
+        with open(path, encoding="utf-8") as f:
+            for card in json.load(f)["cards"]:
+                cards.setdefault(card["name"], card)
+    return list(cards.values())
+
+
+def load_reference(pattern: str) -> list[tuple[int, str, str]]:
+    """参照側（名前からカード番号が取れるカード）→ [(id, name, card_no)]"""
+    reference = []
+    for card in load_dump_cards(pattern):
+        card_no = extract_card_number(card["name"])
+        if card_no:
+            reference.append((len(reference) + 1, card["name"], card_no))
+    return reference
+
+
+def load_queries(pattern: str) -> list[tuple[int, str, str, str]]:
+    """紐付ける側（名前に番号がないカード）→ [(id, name, ショップの番号, 正解の番号)]"""
+    queries = []
+    for card in load_dump_cards(pattern):
+        if extract_card_number(card["name"]):
+            continue
+        truth = extract_card_number(card.get("card_no") or "")
+        if truth:
+            queries.append((len(queries) + 1, card["name"], card.get("card_no"), truth))
+    return queries
+
+
+def evaluate(name: str, predict, queries, reference_numbers: set) -> dict:
+    """predict(query) -> 番号 or None の精度と時間"""
+    started = time.perf_counter()
+    predictions = [predict(query) for query in queries]
+    elapsed = time.perf_counter() - started
+
+    answerable = sum(1 for q in queries if q[3] in reference_numbers)
+    proposed = sum(1 for p in predictions if p)
+    correct = sum(1 for q, p in zip(queries, predictions) if p and p == q[3])
+    return {
+        "method": name,
+        "proposed": proposed,
+        "correct": correct,
+        "precision": correct / proposed if proposed else 0.0,
+        "recall": correct / answerable if answerable else 0.0,
+        "us_per_query": elapsed * 1e6 / len(queries),
+    }
+
+
+def exact_base_name(reference):
+    """現行の match_cards_by_name 相当（基本名の完全一致、最も古いカードの番号）"""
+    by_base_name = {}
+    for _, ref_name, card_no in reference:
+        by_base_name.setdefault(extract_base_card_name(ref_name), card_no)
+    return lambda query: by_base_name.get(extract_base_card_name(query[1]))
+
+
+def build_matcher(reference, threshold: float) -> tuple[CardMatcher, float]:
+    started = time.perf_counter()
+    matcher = CardMatcher(threshold=threshold)
+    for card_id, ref_name, card_no in reference:
+        matcher.add(card_id, ref_name, card_no)
+    return matcher, time.perf_counter() - started
+
+
+def fuzzy(matcher: CardMatcher, use_hint: bool):
+    def predict(query):
+        proposal = matcher.match(query[0], query[1], query[2] if use_hint else None)
+        return proposal.card_no if proposal else None
+    return predict
+
+
+def brute_force_us_per_query(reference, queries) -> float:
+    """インデックスを使わず全参照カードと比較した場合の1件あたりの時間"""
+    reference_grams = [ngrams(match_key(ref_name)) for _, ref_name, _ in reference]
+    started = time.perf_counter()
+    for query in queries:
+        grams = ngrams(match_key(query[1]))
+        max(dice(grams, ref) for ref in reference_grams)
+    return (time.perf_counter() - started) * 1e6 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzzy card matching benchmark")
+    parser.add_argument("--reference", default="dorasuta*.json", help="参照側のダンプ（data/ 以下のglob）")
+    parser.add_argument("--queries", default="yuyutei*.json", help="紐付ける側のダンプ（data/ 以下のglob）")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--brute-force-sample", type=int, default=200,
+                        help="総当たりの時間を測るクエリ数")
+    args = parser.parse_args()
+
+    reference = load_reference(args.reference)
+    queries = load_queries(args.queries)
+    if not reference or not queries:
+        print(f"ダンプがありません: {DATA_DIR}/{args.reference}, {args.queries}")
+        return
+    reference_numbers = {card_no for _, _, card_no in reference}
+    print(f"参照側: {len(reference)}件（{len(reference_numbers)}番号） / 紐付ける側: {len(queries)}件"
+          f"（正解の番号が参照側にある: {sum(1 for q in queries if q[3] in reference_numbers)}件）")
+
+    matcher, build_seconds = build_matcher(reference, args.threshold)
+    results = [
+        evaluate("exact base_name", exact_base_name(reference), queries, reference_numbers),
+        evaluate("fuzzy name", fuzzy(matcher, use_hint=False), queries, reference_numbers),
+        evaluate("fuzzy name + shop card_no", fuzzy(matcher, use_hint=True), queries, reference_numbers),
+    ]
+
+    print(f"\n=== 精度（threshold={args.threshold}、インデックス作成 {build_seconds:.2f}s） ===")
+    print(f"  {'method':<28}{'proposed':>9}{'correct':>9}{'precision':>11}{'recall':>9}{'us/query':>10}")
+    for r in results:
+        print(f"  {r['method']:<28}{r['proposed']:>9}{r['correct']:>9}{r['precision']:>11.1%}"
+              f"{r['recall']:>9.1%}{r['us_per_query']:>10.0f}")
+
+    # 参照側の件数と検索時間（インデックス vs 総当たり）
+    random.seed(0)
+    sample = random.sample(queries, min(args.brute_force_sample, len(queries)))
+    print("\n=== 参照側の件数と1件あたりの検索時間 ===")
+    print(f"  {'reference':>10}{'build s':>9}{'index us':>10}{'brute us':>10}{'speedup':>9}")
+    for fraction in (0.25, 0.5, 1.0):
+        subset = reference[:max(1, int(len(reference) * fraction))]
+        sub_matcher, sub_build = build_matcher(subset, args.threshold)
+        started = time.perf_counter()
+        for query in sample:
+            sub_matcher.match(query[0], query[1])
+        index_us = (time.perf_counter() - started) * 1e6 / len(sample)
+        brute_us = brute_force_us_per_query(subset, sample)
+        print(f"  {len(subset):>10}{sub_build:>9.2f}{index_us:>10.0f}{brute_us:>10.0f}{brute_us / index_us:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
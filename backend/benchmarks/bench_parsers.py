@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+HTMLパーサーのベンチマーク（オフライン）
+
+benchmarks/fixtures/ に保存した実ページ（capture_fixtures.py で取得）を各パーサーで
+繰り返し解析し、pages/sec・items/sec・ピークメモリを計測する。ネットワーク・Chromeは不要
+
+- パース結果の件数・ダイジェストが取得時（manifest.json）と違うページは「結果変化」として表示
+- --save で計測結果をJSONに保存し、--baseline でそのJSONと比較して遅くなった対象を表示
+- 結果変化・性能低下があれば終了コード1
+- 合成ページ（同梱のフィクスチャ）で計測した対象は * を付けて表示する。速度の比較は実ページで行うこと
+
+BeautifulSoupのバックエンド変更やパース範囲の絞り込みなどの前後で計測すること
+
+使用方法:
+    python benchmarks/bench_parsers.py
+    python benchmarks/bench_parsers.py --target cardrush --repeat 20
+    python benchmarks/bench_parsers.py --save /tmp/before.json
+    python benchmarks/bench_parsers.py --baseline /tmp/before.json --threshold 0.1
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_targets import get_targets, load_pages, result_digest
+
+DEFAULT_REPEAT = 5
+# baseline比でこの割合以上 pages/sec が落ちたら性能低下とみなす
+DEFAULT_THRESHOLD = 0.15
+
+
+def check_results(target, pages) -> list[str]:
+    """取得時のパース結果と一致しないページを返す"""
+    changed = []
+    for page in pages:
+        if page.items is None:
+            continue
+        results = target.parse(page)
+        if len(results) != page.items or (page.digest and result_digest(results) != page.digest):
+            changed.append(f"{page.file}: {page.items}件 -> {len(results)}件")
+    return changed
+
+
+def measure_throughput(target, pages, repeat: int) -> dict:
+    """全ページを repeat 回解析して処理速度を計測"""
+    # ウォームアップ（import・正規表現のコンパイルなど）
+    for page in pages:
+        target.parse(page)
+
+    gc.collect()
+    items = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            items += len(target.parse(page))
+    elapsed = time.perf_counter() - started
+
+    parsed_pages = len(pages) * repeat
+    return {
+        "pages": parsed_pages,
+        "items": items,
+        "seconds": round(elapsed, 4),
+        "pages_per_sec": round(parsed_pages / elapsed, 2) if elapsed else None,
+        "items_per_sec": round(items / elapsed, 1) if elapsed else None,
+        "ms_per_page": round(elapsed * 1000 / parsed_pages, 3),
+    }
+
+
+def measure_peak_memory(target, pages) -> float:
+    """1ページ解析あたりのピークメモリ（MB、最大のページ）"""
+    # tracemallocは処理を遅くするので速度計測とは別に1回ずつ測る
+    peak = 0
+    for page in pages:
+        gc.collect()
+        tracemalloc.start()
+        target.parse(page)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return round(peak / (1024 * 1024), 2)
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """baselineより pages/sec が threshold 以上落ちた対象を返す（件数の変化は check_results で検出）"""
+    slower = []
+    for name, result in results.items():
+        before = baseline.get(name, {}).get("pages_per_sec")
+        after = result.get("pages_per_sec")
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        result["vs_baseline"] = round(change, 3)
+        if change < -threshold:
+            slower.append(f"{name}: {before:.1f} -> {after:.1f} pages/sec ({change:+.0%})")
+    return slower
+
+
+def main():
+    targets = get_targets()
+
+    parser = argparse.ArgumentParser(description="Offline HTML parser benchmark")
+    parser.add_argument("--target", "-t", action="append", choices=sorted(targets),
+                        help="計測する対象（複数指定可、省略時はフィクスチャがある全対象）")
+    parser.add_argument("--repeat", "-n", type=int, default=DEFAULT_REPEAT, help="全ページを解析する回数")
+    parser.add_argument("--save", help="計測結果を保存するJSONファイル")
+    parser.add_argument("--baseline", help="比較する計測結果JSONファイル（--saveで保存したもの）")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="性能低下とみなす pages/sec の低下率")
+    args = parser.parse_args()
+
+    results = {}
+    changed = []
+    for name in args.target or sorted(targets):
+        target = targets[name]
+        pages = load_pages(name)
+        if not pages:
+            if args.target:
+                print(f"[{name}] フィクスチャなし（capture_fixtures.py --target {name} で取得）")
+            continue
+
+        changed += [f"{name} {line}" for line in check_results(target, pages)]
+        result = measure_throughput(target, pages, args.repeat)
+        result["fixture_pages"] = len(pages)
+        result["synthetic_pages"] = sum(page.synthetic for page in pages)
+        result["peak_mb"] = measure_peak_memory(target, pages)
+        results[name] = result
+
+    if not results:
+        print("フィクスチャがありません。先に benchmarks/capture_fixtures.py を実行してください")
+        return
+
+    slower = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            slower = compare(results, json.load(f), args.threshold)
+
+    print(f"\n=== Parser benchmark (repeat={args.repeat}) ===")
+    print(f"  {'target':<20}{'pages':>7}{'pages/s':>10}{'items/s':>11}{'ms/page':>10}{'peak MB':>9}{'vs base':>9}")
+    for name, r in results.items():
+        vs = f"{r['vs_baseline']:+.0%}" if "vs_baseline" in r else "-"
+        label = f"{name}*" if r["synthetic_pages"] else name
+        print(f"  {label:<20}{r['fixture_pages']:>7}{r['pages_per_sec']:>10.1f}{r['items_per_sec']:>11.0f}"
+              f"{r['ms_per_page']:>10.2f}{r['peak_mb']:>9.2f}{vs:>9}")
+
+    if any(r["synthetic_pages"] for r in results.values()):
+        print("\n  * 合成ページを含む（実ページは capture_fixtures.py --target <対象名> で取得）")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n計測結果を保存: {args.save}")
+
+    if changed:
+        print("\n[結果変化] 取得時とパース結果が異なるページ:")
+        for line in changed:
+            print(f"  {line}")
+    if slower:
+        print(f"\n[性能低下] baseline比 {args.threshold:.0%} 以上遅くなった対象:")
+        for line in slower:
+            print(f"  {line}")
+
+    if changed or slower:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+パーサーベンチマーク用フィクスチャの取得（ネットワーク・Chromeが必要）
+
+実際の一覧/検索ページを取得して benchmarks/fixtures/<対象名>/ に保存する。
+保存時に現在のパーサーで解析し、件数とダイジェストを manifest.json に記録する
+Seleniumのスクレイパーはスクレイパー自身の _search_sync で検索し、解析したページをそのまま保存する
+ドラスタはCloudflare対策のため local/crawl_dorasuta.py のブラウザ（画面表示あり）を使う
+取得した対象の同梱合成ページ（manifest で "synthetic": true）は実ページで置き換わる
+
+使用方法:
+    python benchmarks/capture_fixtures.py                        # 全対象（ドラスタ以外）
+    python benchmarks/capture_fixtures.py --target tierone_crawl --pages 10
+    python benchmarks/capture_fixtures.py --target dorasuta      # ローカルPCで実行
+    python benchmarks/capture_fixtures.py --replace              # 既存のフィクスチャを削除して取り直す
+    python benchmarks/capture_fixtures.py --rebaseline           # 保存済みHTMLの件数/ダイジェストを再記録
+"""
+import argparse
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_targets import (
+    BACKEND_DIR,
+    LOCAL_DIR,
+    add_page,
+    fixture_dir,
+    get_targets,
+    load_manifest,
+    load_pages,
+    result_digest,
+    save_manifest,
+    FixturePage,
+)
+
+DEFAULT_KEYWORDS = 5
+DEFAULT_PAGES = 5
+
+
+def load_keywords(limit: int) -> list[str]:
+    """keywords.txt の先頭から limit 件"""
+    keywords = []
+    with open(BACKEND_DIR / "keywords.txt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                keywords.append(line)
+    return keywords[:limit]
+
+
+def fetch_httpx(url: str) -> tuple[bytes, str]:
+    from http_clients import get_client
+    from rate_limit import rate_limiter
+
+    rate_limiter.acquire_sync(url)
+    response = get_client(url).get(url)
+    response.raise_for_status()
+    return response.content, response.encoding or "utf-8"
+
+
+def fetch_with_scraper(scraper, keyword: str) -> tuple[str, bytes, str]:
+    """スクレイパーの _search_sync で検索し、解析したページの (URL, 内容, 文字コード) を返す"""
+    from rate_limit import rate_limiter
+
+    rate_limiter.acquire_sync(scraper.base_url)
+    scraper._search_sync(keyword)
+    driver = scraper._driver
+    return driver.current_url, driver.page_source.encode("utf-8"), "utf-8"
+
+
+class DorasutaBrowser:
+    """ドラスタのページをローカルのブラウザで取得（Cloudflare対策）"""
+
+    def __init__(self):
+        self.driver = None
+
+    def fetch(self, url: str) -> tuple[bytes, str]:
+        from rate_limit import rate_limiter
+        from scrapers.page_wait import WaitStrategy, wait_until_ready
+
+        if self.driver is None:
+            sys.path.insert(0, str(LOCAL_DIR))
+            from crawl_dorasuta import get_driver
+            self.driver = get_driver()
+            self.driver.implicitly_wait(0)
+
+        rate_limiter.acquire_sync(url)
+        self.driver.get(url)
+        from crawl_dorasuta import wait_for_cloudflare
+        title = self.driver.title
+        if "お待ち" in title or "moment" in title.lower():
+            wait_for_cloudflare(self.driver)
+        wait_until_ready(self.driver, WaitStrategy(("div.element",), timeout=30.0))
+        return self.driver.page_source.encode("utf-8"), "utf-8"
+
+    def close(self):
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+
+
+def capture_target(target, keywords: list[str], pages: int, browser: DorasutaBrowser) -> int:
+    """1対象分のページを取得・保存し、保存したページ数を返す"""
+    if target.fetch == "scraper":
+        return capture_with_scraper(target, keywords)
+
+    saved = 0
+    for url in target.build_urls(keywords, pages):
+        try:
+            if target.fetch == "httpx":
+                content, encoding = fetch_httpx(url)
+            else:
+                content, encoding = browser.fetch(url)
+        except Exception as e:
+            print(f"  取得エラー: {url} ({e})")
+            continue
+        saved += _save_capture(target, url, "", content, encoding)
+    return saved
+
+
+def capture_with_scraper(target, keywords: list[str]) -> int:
+    """スクレイパー自身の検索処理でキーワードごとに1ページ保存する"""
+    saved = 0
+    scraper = target.scraper_class()
+    try:
+        for keyword in keywords:
+            try:
+                url, content, encoding = fetch_with_scraper(scraper, keyword)
+            except Exception as e:
+                print(f"  取得エラー: {keyword} ({e})")
+                continue
+            saved += _save_capture(target, url, keyword, content, encoding)
+    finally:
+        scraper.release_driver()
+    return saved
+
+
+def _save_capture(target, url: str, keyword: str, content: bytes, encoding: str) -> int:
+    """取得したページを現在のパーサーで解析して保存"""
+
+    # サイト固有の文字コード（バトスキのEUC-JPなど）はパーサー側の扱いに合わせる
+    if target.fetch == "httpx" and target.encoding != "utf-8":
+        encoding = target.encoding
+
+    page = FixturePage(file="", url=url, content=content, encoding=encoding, keyword=keyword)
+    results = target.parse(page)
+    file = add_page(target.name, url, content, encoding, len(results), result_digest(results), keyword)
+    print(f"  {file}: {len(results)}件 {url} {keyword}")
+    return 1
+
+
+def rebaseline(target) -> int:
+    """保存済みHTMLを現在のパーサーで解析し直して件数/ダイジェストを更新"""
+    manifest = load_manifest(target.name)
+    by_file = {page.file: page for page in load_pages(target.name)}
+    for entry in manifest["pages"]:
+        page = by_file.get(entry["file"])
+        if page is None:
+            continue
+        results = target.parse(page)
+        entry["items"] = len(results)
+        entry["digest"] = result_digest(results)
+    save_manifest(target.name, manifest)
+    return len(by_file)
+
+
+def main():
+    targets = get_targets()
+
+    parser = argparse.ArgumentParser(description="Capture parser benchmark fixtures")
+    parser.add_argument("--target", "-t", action="append", choices=sorted(targets),
+                        help="取得する対象（複数指定可、省略時はドラスタ以外すべて）")
+    parser.add_argument("--keywords", "-k", type=int, default=DEFAULT_KEYWORDS,
+                        help="検索ページの取得に使うキーワード数（keywords.txtの先頭から）")
+    parser.add_argument("--pages", "-p", type=int, default=DEFAULT_PAGES, help="一覧ページの取得ページ数")
+    parser.add_argument("--replace", action="store_true", help="既存のフィクスチャを削除してから取得")
+    parser.add_argument("--rebaseline", action="store_true",
+                        help="取得せず、保存済みHTMLの件数/ダイジェストを現在のパーサーで再記録")
+    args = parser.parse_args()
+
+    names = args.target or [name for name, target in targets.items() if target.fetch != "dorasuta"]
+
+    if args.rebaseline:
+        for name in names:
+            print(f"[{name}] {rebaseline(targets[name])}ページを再記録")
+        return
+
+    keywords = load_keywords(args.keywords)
+    dorasuta_browser = DorasutaBrowser()
+    try:
+        for name in names:
+            target = targets[name]
+            if args.replace and fixture_dir(name).exists():
+                shutil.rmtree(fixture_dir(name))
+            print(f"[{name}] {target.description}")
+            saved = capture_target(target, keywords, args.pages, dorasuta_browser)
+            print(f"[{name}] {saved}ページ保存")
+    finally:
+        dorasuta_browser.close()
+        from http_clients import close_http_clients
+        close_http_clients()
+
+
+if __name__ == "__main__":
+    main()
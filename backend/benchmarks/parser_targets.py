@@ -0,0 +1,315 @@
+"""
+パーサーベンチマークの対象とフィクスチャ（保存済みHTML）の管理
+
+フィクスチャは benchmarks/fixtures/<対象名>/ に保存する:
+    manifest.json   取得元URL・文字コード・取得日時・パース結果の件数とダイジェスト
+    001.html ...    取得したHTML（レスポンスのバイト列そのまま）
+
+manifest の items / digest は取得時点のパース結果。パーサーを変更したあとに
+bench_parsers.py で結果が変わっていないか確認できる
+
+リポジトリには各対象の一覧構造を再現した合成ページ（manifest で "synthetic": true）を
+同梱しているので、取得しなくてもすべての対象を計測・検証できる。合成ページはサイトの
+実際のマークアップ（スクリプト・広告・ページ全体の大きさ）を再現していないので、
+速度の計測には capture_fixtures.py で取得した実ページを使うこと（取得した対象の合成ページは置き換わる）
+"""
+import hashlib
+import json
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import quote
+
+BACKEND_DIR = Path(__file__).parent.parent
+LOCAL_DIR = BACKEND_DIR.parent / "local"
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+@dataclass
+class FixturePage:
+    """保存済みの1ページ"""
+    file: str
+    url: str
+    content: bytes
+    encoding: str = "utf-8"
+    items: Optional[int] = None  # 取得時点のパース件数
+    digest: Optional[str] = None  # 取得時点のパース結果のダイジェスト
+    keyword: str = ""  # 検索ページの場合の検索キーワード
+    synthetic: bool = False  # 同梱の合成ページ（実ページではない）
+    _text: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.content.decode(self.encoding, errors="replace")
+        return self._text
+
+
+@dataclass
+class ParserTarget:
+    """ベンチマーク対象のパーサー"""
+    name: str
+    description: str
+    fetch: str  # フィクスチャの取得方法: "httpx" / "scraper" / "dorasuta"
+    build_urls: Optional[Callable[[list[str], int], list[str]]]  # (キーワード, ページ数) -> 取得URL（scraperは不要）
+    parse: Callable[[FixturePage], list]  # ページ -> パース結果
+    encoding: str = "utf-8"
+    scraper_class: type = None  # fetch="scraper" の場合のスクレイパー（_search_sync で取得・解析する）
+
+
+class _ReplayResponse:
+    def __init__(self, page: FixturePage):
+        self.status_code = 200
+        self.content = page.content
+        self.text = page.text
+
+
+class ReplayClient:
+    """保存済みページを返すhttpx.Client互換の最小クライアント（オフライン実行用）"""
+
+    def __init__(self, page: FixturePage):
+        self._response = _ReplayResponse(page)
+
+    def get(self, url, **kwargs):
+        return self._response
+
+
+class _ReplayElement:
+    def clear(self):
+        pass
+
+    def send_keys(self, *keys):
+        pass
+
+
+class ReplayDriver:
+    """保存済みページを返すWebDriver互換の最小ドライバ（_search_sync のオフライン実行用）"""
+
+    def __init__(self, page: FixturePage):
+        self.page_source = page.text
+        self.current_url = page.url
+
+    def get(self, url):
+        pass
+
+    def execute_script(self, script, *args):
+        return None
+
+    def find_element(self, by, value):
+        return _ReplayElement()
+
+
+def search_offline(scraper_class, page: FixturePage) -> list:
+    """
+    スクレイパーの _search_sync をそのまま実行する（ドライバの取得と待機だけ保存済みページに差し替える）
+
+    本番と同じく parse_listing（list_tags）→ parse_products → キーワードでの絞り込みを通る
+    """
+    scraper = scraper_class()
+    driver = ReplayDriver(page)
+    scraper._get_driver = lambda: driver
+    scraper._wait_ready = lambda *args, **kwargs: 0.0
+    scraper._mark_page = lambda *args, **kwargs: None
+    return scraper._search_sync(page.keyword)
+
+
+def _soup(page: FixturePage, list_tags=()):
+    """本番と同じ方法で解析（list_tags があれば一覧部分だけ）"""
+    from scrapers.parsing import parse_listing
+    return parse_listing(page.text, list_tags)
+
+
+# =============================================================================
+# パース関数（HTMLの解析から結果リスト作成までを計測する）
+# =============================================================================
+
+def parse_cardrush(page: FixturePage) -> list:
+    from scrapers.cardrush import CardrushScraper
+    return search_offline(CardrushScraper, page)
+
+
+def parse_batosuki(page: FixturePage) -> list:
+    from scrapers.batosuki import BatosukiScraper
+    return search_offline(BatosukiScraper, page)
+
+
+def parse_hobbystation(page: FixturePage) -> list:
+    from scrapers.hobbystation import HobbystationScraper
+    return search_offline(HobbystationScraper, page)
+
+
+def parse_tierone_crawl(page: FixturePage) -> list:
+    from batch_crawl import TieroneCrawler
+    crawler = TieroneCrawler()
+    return crawler._parse_card_list(_soup(page, crawler.list_tags))
+
+
+def parse_featured_fullahead(page: FixturePage) -> list:
+    from update_featured_prices import search_fullahead
+    return search_fullahead(ReplayClient(page), "")
+
+
+def parse_featured_batosuki(page: FixturePage) -> list:
+    from update_featured_prices import search_batosuki
+    return search_batosuki(ReplayClient(page), "")
+
+
+def parse_featured_tierone(page: FixturePage) -> list:
+    from update_featured_prices import search_tierone
+    return search_tierone(ReplayClient(page), "")
+
+
+def parse_dorasuta(page: FixturePage) -> list:
+    if str(LOCAL_DIR) not in sys.path:
+        sys.path.insert(0, str(LOCAL_DIR))
+    from bs4 import BeautifulSoup
+    from crawl_dorasuta import LISTING_STRAINER, parse_products
+    return parse_products(BeautifulSoup(page.text, "lxml", parse_only=LISTING_STRAINER), "bench", "bench")
+
+
+# =============================================================================
+# 対象一覧
+# =============================================================================
+
+def _batosuki_urls(keywords, pages):
+    return [f"https://batosuki.shop/?mode=srh&keyword={quote(k, encoding='euc-jp')}" for k in keywords]
+
+
+def _tierone_list_urls(keywords, pages):
+    return ["https://tier-one.jp/view/category/all_items"] + [
+        f"https://tier-one.jp/view/category/all_items?page={p}" for p in range(2, pages + 1)
+    ]
+
+
+def _fullahead_urls(keywords, pages):
+    return [f"https://fullahead-tcg.com/shop/shopbrand.html?search={quote(k)}" for k in keywords]
+
+
+def _tierone_search_urls(keywords, pages):
+    return [f"https://tier-one.jp/view/search?search_keyword={quote(k)}" for k in keywords]
+
+
+def _dorasuta_urls(keywords, pages):
+    return [
+        "https://dorasuta.jp/battlespirits/product-list?cocd=2",
+        "https://dorasuta.jp/battlespirits/product-list?cid=75&cocd=3",
+    ]
+
+
+def _targets() -> dict[str, ParserTarget]:
+    from scrapers.batosuki import BatosukiScraper
+    from scrapers.cardrush import CardrushScraper
+    from scrapers.hobbystation import HobbystationScraper
+
+    targets = [
+        ParserTarget("cardrush", "CardrushScraper._search_sync", "scraper", None, parse_cardrush,
+                     scraper_class=CardrushScraper),
+        ParserTarget("batosuki", "BatosukiScraper._search_sync", "scraper", None, parse_batosuki,
+                     scraper_class=BatosukiScraper),
+        ParserTarget("hobbystation", "HobbystationScraper._search_sync", "scraper", None, parse_hobbystation,
+                     scraper_class=HobbystationScraper),
+        ParserTarget("tierone_crawl", "TieroneCrawler._parse_card_list", "httpx", _tierone_list_urls,
+                     parse_tierone_crawl),
+        ParserTarget("featured_fullahead", "update_featured_prices.search_fullahead", "httpx", _fullahead_urls,
+                     parse_featured_fullahead),
+        ParserTarget("featured_batosuki", "update_featured_prices.search_batosuki", "httpx", _batosuki_urls,
+                     parse_featured_batosuki, encoding="euc-jp"),
+        ParserTarget("featured_tierone", "update_featured_prices.search_tierone", "httpx", _tierone_search_urls,
+                     parse_featured_tierone),
+        ParserTarget("dorasuta", "local/crawl_dorasuta.parse_product", "dorasuta", _dorasuta_urls,
+                     parse_dorasuta),
+    ]
+    return {target.name: target for target in targets}
+
+
+_TARGETS = None
+
+
+def get_targets() -> dict[str, ParserTarget]:
+    """ベンチマーク対象（名前 -> ParserTarget）"""
+    global _TARGETS
+    if _TARGETS is None:
+        _TARGETS = _targets()
+    return _TARGETS
+
+
+# =============================================================================
+# フィクスチャの読み書き
+# =============================================================================
+
+def result_digest(results: list) -> str:
+    """パース結果のダイジェスト（パーサー変更前後の一致確認用）"""
+    rows = [r.to_dict() if hasattr(r, "to_dict") else r for r in results]
+    payload = json.dumps(rows, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def fixture_dir(name: str) -> Path:
+    return FIXTURES_DIR / name
+
+
+def load_manifest(name: str) -> dict:
+    path = fixture_dir(name) / "manifest.json"
+    if not path.exists():
+        return {"target": name, "pages": []}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(name: str, manifest: dict):
+    directory = fixture_dir(name)
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def load_pages(name: str) -> list[FixturePage]:
+    """保存済みページを読み込む（フィクスチャがなければ空）"""
+    directory = fixture_dir(name)
+    pages = []
+    for entry in load_manifest(name)["pages"]:
+        path = directory / entry["file"]
+        if not path.exists():
+            continue
+        pages.append(FixturePage(
+            file=entry["file"],
+            url=entry.get("url", ""),
+            content=path.read_bytes(),
+            encoding=entry.get("encoding", "utf-8"),
+            items=entry.get("items"),
+            digest=entry.get("digest"),
+            keyword=entry.get("keyword", ""),
+            synthetic=entry.get("synthetic", False),
+        ))
+    return pages
+
+
+def add_page(name: str, url: str, content: bytes, encoding: str, items: int, digest: str,
+             keyword: str = "") -> str:
+    """ページを保存してmanifestに追記し、ファイル名を返す（合成ページは実ページで置き換える）"""
+    manifest = load_manifest(name)
+    directory = fixture_dir(name)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    for entry in [entry for entry in manifest["pages"] if entry.get("synthetic")]:
+        (directory / entry["file"]).unlink(missing_ok=True)
+        manifest["pages"].remove(entry)
+
+    file = f"{len(manifest['pages']) + 1:03d}.html"
+    (directory / file).write_bytes(content)
+    manifest["pages"].append({
+        "file": file,
+        "url": url,
+        "encoding": encoding,
+        "captured_at": datetime.now().isoformat(timespec="seconds"),
+        "items": items,
+        "digest": digest,
+        **({"keyword": keyword} if keyword else {}),
+    })
+    save_manifest(name, manifest)
+    return file
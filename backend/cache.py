@@ -0,0 +1,340 @@
+"""
+集計系APIのプロセス内キャッシュ
+
+/api/home・/api/ranking のように全ユーザー共通で重い集計を行うAPIの結果を
+TTL付きでメモリに保持する
+
+- 同じキーのキャッシュミスが同時に発生しても再計算は1回だけ（single-flight）
+- バッチ完了時（save_batch_log）にデータ世代番号が変わり、キャッシュは無効になる
+  バッチは別プロセスで動くため、世代番号はDBから取得する
+- get_payload でシリアライズ済みのレスポンス（JSONPayload）を保持する。ETagは内容ではなく
+  世代番号とキーごとの変更回数から作るので、有効なキャッシュがあれば etag() で集計前に
+  If-None-Match と比較できる（一致すれば集計もシリアライズもせずに304を返せる）
+- キャッシュがない・有効期限が切れている場合、etag() は None を返す。作り直してから比較するので、
+  世代番号を変えずに変わるデータ（クリック数の集計など）も有効期限ごとに新しいETagになる
+- 変更回数は invalidate(key) のとき、または作り直した内容が前回と違ったときに進む
+  （内容が同じならETagも前回と同じなので、作り直したあとでも304を返せる）
+- カード詳細はカードごとに CardDetailCache で保持し、世代番号が変わったときだけ
+  カードごとの更新番号（card_versions）で変更の有無を確認する（有効期間を過ぎたら作り直す）
+"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+# キャッシュの有効期間（秒）
+API_CACHE_TTL = float(os.environ.get("API_CACHE_TTL", "60"))
+
+# 世代番号をDBに確認する間隔（秒）
+VERSION_CHECK_INTERVAL = 2.0
+
+# カード詳細を保持するカード数
+CARD_DETAIL_CACHE_SIZE = int(os.environ.get("CARD_DETAIL_CACHE_SIZE", "2000"))
+
+# カード詳細の有効期間（秒）。世代番号を進めずに変わったデータもこの時間で作り直す
+CARD_DETAIL_CACHE_TTL = float(os.environ.get("CARD_DETAIL_CACHE_TTL", "600"))
+
+
+@dataclass
+class JSONPayload:
+    """シリアライズ済みのJSONレスポンスとETag"""
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_value(cls, value: Any) -> "JSONPayload":
+        """内容のハッシュをETagにする"""
+        body = cls.encode(value)
+        return cls(body=body, etag=_etag(body))
+
+    @staticmethod
+    def encode(value: Any) -> bytes:
+        # FastAPIのJSONResponseと同じ形式でシリアライズ
+        return json.dumps(
+            jsonable_encoder(value), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+def _etag(data: bytes) -> str:
+    return f'"{hashlib.sha1(data).hexdigest()[:20]}"'
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+    version: Any
+
+
+class TTLCache:
+    """TTL・世代番号付きキャッシュ（スレッドセーフ）"""
+
+    def __init__(self, ttl: float, version_func: Optional[Callable[[], Any]] = None):
+        """
+        Args:
+            ttl: 有効期間（秒）
+            version_func: データ世代番号を返す関数。値が変わるとキャッシュを無効化する
+        """
+        self.ttl = ttl
+        self._version_func = version_func
+        self._entries: dict[str, _Entry] = {}
+        self._key_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = 0.0
+        # ETag用: キーごとの変更回数・全件破棄の回数・前回の内容のハッシュ
+        self._revisions: dict[str, int] = {}
+        self._epoch = 0
+        self._digests: dict[str, str] = {}
+        # 再起動前に渡したETagと一致しないようにプロセスごとに変える
+        self._instance = uuid.uuid4().hex
+        self._hits = 0
+        self._misses = 0
+        self._not_modified = 0
+        self._invalidations = 0
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """キャッシュがあれば返し、なければcomputeで計算して保存する"""
+        version = self.current_version()
+
+        entry = self._fresh_entry(key, version)
+        if entry is not None:
+            self._count(hit=True)
+            return entry.value
+
+        # 同じキーの再計算は1スレッドだけが行い、他は結果を待つ
+        with self._key_lock(key):
+            entry = self._fresh_entry(key, version)
+            if entry is not None:
+                self._count(hit=True)
+                return entry.value
+
+            self._count(hit=False)
+            value = compute()
+            with self._lock:
+                self._entries[key] = _Entry(value, time.monotonic() + self.ttl, version)
+            return value
+
+    def get_payload(self, key: str, build: Callable[[], Any]) -> JSONPayload:
+        """
+        build() の値をシリアライズして保持する（ETagは etag(key) と同じ値）
+
+        作成中にバッチが終わった場合は次回の世代番号の確認で作り直されるよう、
+        作成前の世代番号でETagを作る
+        """
+        version = self.current_version()
+        return self.get_or_compute(key, lambda: self._build_payload(key, build, version))
+
+    def _build_payload(self, key: str, build: Callable[[], Any], version: Any) -> JSONPayload:
+        body = JSONPayload.encode(build())
+        digest = hashlib.sha1(body).hexdigest()
+        with self._lock:
+            previous = self._digests.get(key)
+            if previous is not None and previous != digest:
+                # 世代番号・invalidate を経ずに内容が変わった（有効期限後の作り直し）
+                self._revisions[key] = self._revisions.get(key, 0) + 1
+            self._digests[key] = digest
+            etag = self._state_etag(key, version)
+        return JSONPayload(body=body, etag=etag)
+
+    def etag(self, key: str) -> Optional[str]:
+        """
+        get_payload で保持している内容のETag（集計せずに If-None-Match と比較する用）
+
+        有効なキャッシュがなければ None（内容が変わっているかもしれないので、作り直してから比較する）
+        """
+        version = self.current_version()
+        if self._fresh_entry(key, version) is None:
+            return None
+        with self._lock:
+            return self._state_etag(key, version)
+
+    def _state_etag(self, key: str, version: Any) -> str:
+        """self._lock を取得して呼ぶ"""
+        state = f"{self._instance}:{key}:{version}:{self._epoch}:{self._revisions.get(key, 0)}"
+        return _etag(state.encode("utf-8"))
+
+    def count_not_modified(self):
+        """etag() の比較で304を返した回数を数える"""
+        with self._lock:
+            self._not_modified += 1
+
+    def invalidate(self, key: str = None):
+        """キャッシュを無効化（key省略時は全件）。以前のETagも一致しなくなる"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._digests.clear()
+                self._epoch += 1
+            else:
+                self._entries.pop(key, None)
+                self._digests.pop(key, None)
+                self._revisions[key] = self._revisions.get(key, 0) + 1
+            self._invalidations += 1
+
+    def stats(self) -> dict:
+        """ヒット/ミス数などの統計"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 3) if total else None,
+                "not_modified": self._not_modified,
+                "invalidations": self._invalidations,
+                "size": len(self._entries),
+                "ttl": self.ttl,
+                "version": self._version,
+            }
+
+    def _fresh_entry(self, key: str, version: Any) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic() or entry.version != version:
+            return None
+        return entry
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def current_version(self) -> Any:
+        # 世代番号の確認はVERSION_CHECK_INTERVALごとに1回だけ
+        if self._version_func is None:
+            return None
+        now = time.monotonic()
+        if now - self._version_checked_at >= VERSION_CHECK_INTERVAL:
+            version = self._version_func()
+            with self._lock:
+                if version != self._version and self._version is not None:
+                    self._invalidations += 1
+                self._version = version
+                self._version_checked_at = now
+        return self._version
+
+
+@dataclass
+class _CardEntry:
+    payload: JSONPayload
+    card_ids: list[int]  # 内容に含まれるカード（統合・関連カード）
+    card_versions: int  # card_ids の更新番号の合計
+    generation: Any  # 最後に有効と確認した世代番号
+    day: date  # 価格履歴の期間が日付で変わるので当日だけ有効
+    expires_at: float  # time.monotonic() の値。世代番号が変わらなくてもこの時刻で作り直す
+
+
+class CardDetailCache:
+    """
+    カード詳細（/api/card/{id}）のキャッシュ（スレッドセーフ、LRU）
+
+    世代番号が変わっていなければそのまま返す。変わっていたら内容に含まれるカードの
+    更新番号の合計を確認し、同じなら（そのカードに関係のないバッチだった）引き続き使う。
+    世代番号を進めない書き込みがあっても古い内容を返し続けないよう、有効期間を過ぎたら作り直す
+    """
+
+    def __init__(self, generation_func: Callable[[], Any], versions_func: Callable[[list[int]], int],
+                 max_size: int = CARD_DETAIL_CACHE_SIZE, ttl: float = CARD_DETAIL_CACHE_TTL):
+        """
+        Args:
+            generation_func: 現在のデータ世代番号を返す関数（TTLCache.current_version など）
+            versions_func: カードIDのリスト -> 更新番号の合計
+            max_size: 保持するカード数
+            ttl: 有効期間（秒）
+        """
+        self._generation_func = generation_func
+        self._versions_func = versions_func
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[int, _CardEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._revalidated = 0
+        self._misses = 0
+
+    def get(self, card_id: int) -> Optional[JSONPayload]:
+        """有効なキャッシュがあれば返す"""
+        generation = self._generation_func()
+        with self._lock:
+            entry = self._entries.get(card_id)
+            if entry is None or entry.day != date.today() or entry.expires_at <= time.monotonic():
+                self._misses += 1
+                return None
+            self._entries.move_to_end(card_id)
+            if entry.generation == generation:
+                self._hits += 1
+                return entry.payload
+
+        if self._versions_func(entry.card_ids) != entry.card_versions:
+            with self._lock:
+                self._entries.pop(card_id, None)
+                self._misses += 1
+            return None
+        with self._lock:
+            entry.generation = generation
+            self._revalidated += 1
+        return entry.payload
+
+    def get_or_compute(self, card_id: int,
+                       compute: Callable[[], Optional[tuple[Any, list[int]]]]) -> Optional[JSONPayload]:
+        """
+        キャッシュがあれば返し、なければ compute で作成して保存する
+
+        Args:
+            compute: () -> (レスポンスの値, 内容に含まれるカードIDのリスト)。カードがなければ None
+        """
+        payload = self.get(card_id)
+        if payload is not None:
+            return payload
+
+        # 作成中にバッチが終わった場合に次回確認し直すよう、作成前の世代番号を記録する
+        generation = self._generation_func()
+        result = compute()
+        if result is None:
+            return None
+        value, card_ids = result
+        payload = JSONPayload.from_value(value)
+        entry = _CardEntry(payload, card_ids, self._versions_func(card_ids), generation, date.today(),
+                           time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[card_id] = entry
+            self._entries.move_to_end(card_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return payload
+
+    def invalidate(self, card_id: int = None):
+        with self._lock:
+            if card_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(card_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._hits + self._revalidated + self._misses
+            return {
+                "hits": self._hits,
+                "revalidated": self._revalidated,
+                "misses": self._misses,
+                "hit_rate": round((self._hits + self._revalidated) / total, 3) if total else None,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+カード番号・基本名のバックフィル
+
+cards.extracted_card_no / base_name を抽出し直し、番号のないカードを基本名で紐付ける。
+カード数が多くてもDBを長時間ロックしないよう、チャンクごとに短いトランザクションで書き込む
+
+- 抽出（正規表現）はプロセスプールで並列に行い、書き込みは executemany でまとめて行う
+- 対象は identity_version が現在の抽出ルール（CARD_IDENTITY_RULES_VERSION）と違うカードだけ
+  （カード名が変わったカードはトリガーで identity_version が NULL に戻る）
+- 進捗は backfill_checkpoints に記録し、中断しても次回はその続きから再開する
+
+使用方法:
+    python card_backfill.py                    # 未抽出・ルール変更後のカードのみ
+    python card_backfill.py --workers 4 --chunk-size 5000
+    python card_backfill.py --restart          # チェックポイントを無視して最初から
+    python card_backfill.py --all              # 全カードを再抽出
+    python card_backfill.py --skip-match       # 基本名での紐付けを行わない
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from database import (
+    CARD_IDENTITY_RULES_VERSION,
+    bump_data_generation,
+    extract_base_card_name,
+    extract_card_number,
+    get_connection,
+    match_cards_by_name,
+)
+
+# 1トランザクションで書き込むカード数
+DEFAULT_CHUNK_SIZE = 2000
+# 抽出に使うプロセス数
+DEFAULT_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))
+
+EXTRACT_JOB = "card_identity"
+MATCH_JOB = "match_by_base_name"
+
+
+def extract_chunk(rows: list[tuple[int, str]]) -> list[tuple]:
+    """1チャンク分を抽出（ワーカープロセスで実行）→ UPDATEのパラメータ"""
+    return [
+        (extract_card_number(name), extract_base_card_name(name), CARD_IDENTITY_RULES_VERSION, card_id, name)
+        for card_id, name in rows
+    ]
+
+
+# =============================================================================
+# チェックポイント
+# =============================================================================
+
+def load_checkpoint(job: str) -> int:
+    """前回中断したときの最終ID（抽出ルールが変わっていれば最初から）"""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT last_id, rules_version FROM backfill_checkpoints WHERE job = ?", (job,)
+        ).fetchone()
+    if row is None or row["rules_version"] != CARD_IDENTITY_RULES_VERSION:
+        return 0
+    return row["last_id"]
+
+
+def save_checkpoint(cursor, job: str, last_id: int, processed: int):
+    cursor.execute("""
+        INSERT INTO backfill_checkpoints (job, last_id, rules_version, processed, updated_at)
+        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(job) DO UPDATE SET
+            last_id = excluded.last_id,
+            rules_version = excluded.rules_version,
+            processed = backfill_checkpoints.processed + excluded.processed,
+            updated_at = excluded.updated_at
+    """, (job, last_id, CARD_IDENTITY_RULES_VERSION, processed))
+
+
+def clear_checkpoint(job: str):
+    """最後まで処理したらチェックポイントを消す"""
+    with get_connection() as conn:
+        conn.execute("DELETE FROM backfill_checkpoints WHERE job = ?", (job,))
+        conn.commit()
+
+
+# =============================================================================
+# 抽出
+# =============================================================================
+
+def _read_chunk(after_id: int, chunk_size: int, recompute: bool) -> list[tuple[int, str]]:
+    """after_id より後の処理対象カードを chunk_size 件"""
+    version_sql = "" if recompute else "AND (identity_version IS NULL OR identity_version != ?)"
+    params = (after_id,) + (() if recompute else (CARD_IDENTITY_RULES_VERSION,)) + (chunk_size,)
+    with get_connection() as conn:
+        rows = conn.execute(f"""
+            SELECT id, name FROM cards
+            WHERE id > ? {version_sql}
+            ORDER BY id
+            LIMIT ?
+        """, params).fetchall()
+    return [(row["id"], row["name"]) for row in rows]
+
+
+def _write_chunk(updates: list[tuple], last_id: int):
+    """抽出結果と進捗を1トランザクションで書き込む"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # 読み込み後に名前が変わったカードは書き込まない（次回の対象になる）
+            cursor.executemany("""
+                UPDATE cards
+                SET extracted_card_no = ?, base_name = ?, identity_version = ?
+                WHERE id = ? AND name = ?
+            """, updates)
+            save_checkpoint(cursor, EXTRACT_JOB, last_id, len(updates))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def backfill_card_identity(chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = DEFAULT_WORKERS,
+                           restart: bool = False, recompute: bool = False) -> int:
+    """
+    カード番号・基本名を抽出して書き込む
+
+    Args:
+        chunk_size: 1トランザクションで書き込むカード数
+        workers: 抽出に使うプロセス数（1ならこのプロセスで抽出）
+        restart: チェックポイントを無視して最初から
+        recompute: identity_version に関係なく全カードを再抽出
+
+    Returns:
+        処理したカード数
+    """
+    after_id = 0 if restart else load_checkpoint(EXTRACT_JOB)
+    if after_id:
+        print(f"チェックポイントから再開: id > {after_id}")
+
+    processed = 0
+    started = time.monotonic()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while True:
+            # ワーカー数分のチャンクを読んでまとめて抽出に回す
+            chunks = []
+            for _ in range(max(1, workers)):
+                rows = _read_chunk(after_id, chunk_size, recompute)
+                if not rows:
+                    break
+                chunks.append(rows)
+                after_id = rows[-1][0]
+            if not chunks:
+                break
+
+            results = executor.map(extract_chunk, chunks) if executor else map(extract_chunk, chunks)
+            for rows, updates in zip(chunks, results):
+                _write_chunk(updates, last_id=rows[-1][0])
+                processed += len(updates)
+            print(f"  抽出: {processed}件（id <= {after_id}、{time.monotonic() - started:.1f}s）")
+    finally:
+        if executor:
+            executor.shutdown()
+
+    clear_checkpoint(EXTRACT_JOB)
+    if processed:
+        bump_data_generation()
+    print(f"カード番号・基本名を抽出: {processed}件")
+    return processed
+
+
+# =============================================================================
+# 基本名での紐付け
+# =============================================================================
+
+def backfill_name_matches(chunk_size: int = DEFAULT_CHUNK_SIZE, restart: bool = False) -> int:
+    """番号のないカードを基本名で紐付ける（IDの範囲ごとに1トランザクション）"""
+    start_id = 0 if restart else load_checkpoint(MATCH_JOB)
+    with get_connection() as conn:
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM cards").fetchone()[0]
+
+    matched = 0
+    while start_id < max_id:
+        end_id = min(start_id + chunk_size, max_id)
+        count = match_cards_by_name(start_id, end_id)
+        with get_connection() as conn:
+            save_checkpoint(conn.cursor(), MATCH_JOB, end_id, count)
+            conn.commit()
+        matched += count
+        start_id = end_id
+
+    clear_checkpoint(MATCH_JOB)
+    if matched:
+        # カード詳細・集計APIのキャッシュを無効化
+        bump_data_generation()
+    print(f"Matched {matched} cards by base name")
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="カード番号・基本名のバックフィル")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"1トランザクションで書き込むカード数（デフォルト: {DEFAULT_CHUNK_SIZE}）")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"抽出に使うプロセス数（デフォルト: {DEFAULT_WORKERS}）")
+    parser.add_argument("--restart", action="store_true", help="チェックポイントを無視して最初から")
+    parser.add_argument("--all", action="store_true", help="全カードを再抽出")
+    parser.add_argument("--skip-match", action="store_true", help="基本名での紐付けを行わない")
+    args = parser.parse_args()
+
+    backfill_card_identity(chunk_size=args.chunk_size, workers=args.workers,
+                           restart=args.restart, recompute=args.all)
+    if not args.skip_match:
+        backfill_name_matches(chunk_size=args.chunk_size, restart=args.restart)
+
+
+if __name__ == "__main__":
+    main()
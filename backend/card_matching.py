@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+カード名のあいまいマッチング（ショップ間のカード紐付け）
+
+match_cards_by_name は基本名の完全一致しか紐付けないため、表記の揺れ（「・」の有無、
+装飾の括弧、全角/半角など）がある遊々亭・ホビーステーションのカードが統合されないことがある。
+ここでは番号のないカードを、番号付きカードとの名前の類似度で紐付け、card_group_members に追加する
+
+- 文字n-gram（トライグラム）の転置インデックスで候補を絞るので、全カード同士を比較しない
+  （多くのカードに出てくるn-gramは候補の列挙に使わない）
+- 類似度は n-gram 集合の Dice 係数。上位候補のカード番号が複数に割れて差が小さければ保留
+- ショップが番号を別に持っている場合（cards.card_no）は、その番号のカードだけを候補にする
+
+使用方法:
+    python card_matching.py                  # 紐付け候補を表示（DBは変更しない）
+    python card_matching.py --apply          # threshold 以上の候補を card_group_members に追加
+    python card_matching.py --threshold 0.9 --show-below 0.7
+"""
+import argparse
+import heapq
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Optional
+
+from database import (
+    bump_data_generation,
+    extract_base_card_name,
+    extract_card_number,
+    get_connection,
+    normalize_card_name,
+)
+
+# この類似度以上なら紐付ける
+DEFAULT_THRESHOLD = 0.85
+# ショップの番号と一致する候補はこの類似度以上で紐付ける
+HINT_THRESHOLD = 0.5
+# 1位と、別の番号の最上位候補との差がこれ未満なら保留
+AMBIGUITY_MARGIN = 0.05
+# n-gramの長さ
+NGRAM_SIZE = 3
+# 類似度を計算する候補数（共有n-gram数の上位）
+CANDIDATE_LIMIT = 20
+# このカード数以上に出てくるn-gramは候補の列挙に使わない（インデックス全体に対する割合・下限）
+MAX_DF_RATIO = 0.01
+MIN_MAX_DF = 50
+
+# 名前の比較で無視する記号
+_IGNORED_CHARS_RE = re.compile(r'[\s・･\.\-_/／|｜~〜!！?？\'"’”\[\]【】《》()（）「」『』]')
+
+
+def match_key(name: str) -> str:
+    """比較用の名前（基本名を正規化し、記号を除いたもの）"""
+    key = normalize_card_name(extract_base_card_name(name))
+    return _IGNORED_CHARS_RE.sub("", key)
+
+
+def ngrams(key: str, n: int = NGRAM_SIZE) -> frozenset[str]:
+    """文字n-gram（前後に境界記号を付ける。短い名前でも1つ以上になる）"""
+    padded = f"^{key}$"
+    if len(padded) <= n:
+        return frozenset((padded,))
+    return frozenset(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+
+def dice(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class NgramIndex:
+    """文字n-gramの転置インデックス"""
+
+    def __init__(self, n: int = NGRAM_SIZE, max_df_ratio: float = MAX_DF_RATIO, min_max_df: int = MIN_MAX_DF):
+        self.n = n
+        self.max_df_ratio = max_df_ratio
+        self.min_max_df = min_max_df
+        self._grams: list[frozenset] = []
+        self._postings: dict[str, list[int]] = defaultdict(list)
+
+    def __len__(self):
+        return len(self._grams)
+
+    def add(self, key: str) -> int:
+        """キーを追加して位置を返す"""
+        position = len(self._grams)
+        grams = ngrams(key, self.n)
+        self._grams.append(grams)
+        for gram in grams:
+            self._postings[gram].append(position)
+        return position
+
+    @property
+    def max_df(self) -> int:
+        return max(self.min_max_df, int(len(self._grams) * self.max_df_ratio))
+
+    def query(self, key: str, limit: int = CANDIDATE_LIMIT) -> list[tuple[int, float]]:
+        """類似度の高い順に (位置, 類似度)"""
+        grams = ngrams(key, self.n)
+        max_df = self.max_df
+        shared = defaultdict(int)
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is None or len(postings) > max_df:
+                continue
+            for position in postings:
+                shared[position] += 1
+        if not shared:
+            return []
+
+        top = heapq.nlargest(limit, shared.items(), key=lambda item: item[1])
+        scored = [(position, dice(grams, self._grams[position])) for position, _ in top]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored
+
+
+@dataclass
+class MatchProposal:
+    """紐付け候補"""
+    card_id: int
+    name: str
+    target_card_id: int
+    target_name: str
+    card_no: str
+    confidence: float
+    method: str  # "name": 名前の類似度 / "card_no": ショップの番号と名前の類似度
+
+    def accepted(self, threshold: float = DEFAULT_THRESHOLD) -> bool:
+        """紐付けてよいか（ショップの番号と一致していれば HINT_THRESHOLD まで下げる）"""
+        if self.method == "card_no":
+            return self.confidence >= min(threshold, HINT_THRESHOLD)
+        return self.confidence >= threshold
+
+    def to_dict(self) -> dict:
+        return {
+            "card_id": self.card_id,
+            "name": self.name,
+            "target_card_id": self.target_card_id,
+            "target_name": self.target_name,
+            "card_no": self.card_no,
+            "confidence": round(self.confidence, 3),
+            "method": self.method,
+        }
+
+
+class CardMatcher:
+    """番号付きカード（参照側）を登録し、番号のないカードに最も近いカードを探す"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, margin: float = AMBIGUITY_MARGIN):
+        self.threshold = threshold
+        self.margin = margin
+        self.index = NgramIndex()
+        self._cards: list[tuple[int, str, str]] = []  # 位置 -> (card_id, name, card_no)
+        self._numbers: set[str] = set()
+
+    def add(self, card_id: int, name: str, card_no: str):
+        self.index.add(match_key(name))
+        self._cards.append((card_id, name, card_no))
+        self._numbers.add(card_no)
+
+    def match(self, card_id: int, name: str, hint_card_no: str = None,
+              threshold: float = None) -> Optional[MatchProposal]:
+        """
+        最も近いカードを返す（threshold 未満・あいまいなら None）
+
+        Args:
+            hint_card_no: ショップが持っているカード番号（あればその番号のカードだけが候補）
+            threshold: self.threshold の代わりに使う下限（確認用に低めの候補も見るとき）
+        """
+        threshold = self.threshold if threshold is None else threshold
+        hint = extract_card_number(hint_card_no) if hint_card_no else None
+        if hint and hint not in self._numbers:
+            return None
+
+        # カード番号ごとの最上位候補
+        best_by_number = {}
+        for position, score in self.index.query(match_key(name)):
+            target_id, target_name, card_no = self._cards[position]
+            if hint and card_no != hint:
+                continue
+            if card_no not in best_by_number or score > best_by_number[card_no][1]:
+                best_by_number[card_no] = (position, score)
+        if not best_by_number:
+            return None
+
+        ranked = sorted(best_by_number.values(), key=lambda item: item[1], reverse=True)
+        position, score = ranked[0]
+        if hint:
+            if score < min(threshold, HINT_THRESHOLD):
+                return None
+            method = "card_no"
+        else:
+            if score < threshold:
+                return None
+            if len(ranked) > 1 and score - ranked[1][1] < self.margin:
+                return None
+            method = "name"
+
+        target_id, target_name, card_no = self._cards[position]
+        return MatchProposal(card_id, name, target_id, target_name, card_no, score, method)
+
+
+# =============================================================================
+# DB
+# =============================================================================
+
+def build_matcher(threshold: float = DEFAULT_THRESHOLD) -> CardMatcher:
+    """番号付きカードを読み込んでインデックスを作成"""
+    matcher = CardMatcher(threshold=threshold)
+    with get_connection() as conn:
+        rows = conn.execute("""
+            SELECT id, name, extracted_card_no FROM cards
+            WHERE extracted_card_no IS NOT NULL
+            ORDER BY id
+        """).fetchall()
+    for row in rows:
+        matcher.add(row["id"], row["name"], row["extracted_card_no"])
+    return matcher
+
+
+def propose_links(threshold: float = DEFAULT_THRESHOLD, show_below: float = None) -> list[MatchProposal]:
+    """
+    番号がなく、どのグループにも入っていないカードの紐付け候補を作成
+
+    Args:
+        threshold: 紐付ける類似度の下限
+        show_below: これ以上 threshold 未満の候補も返す（確認用。apply_links では threshold で絞る）
+    """
+    matcher = build_matcher(threshold)
+    with get_connection() as conn:
+        rows = conn.execute("""
+            SELECT c.id, c.name, c.card_no FROM cards c
+            WHERE c.extracted_card_no IS NULL
+            AND NOT EXISTS (SELECT 1 FROM card_group_members m WHERE m.card_id = c.id)
+            ORDER BY c.id
+        """).fetchall()
+
+    lower = threshold if show_below is None else min(show_below, threshold)
+    proposals = []
+    for row in rows:
+        proposal = matcher.match(row["id"], row["name"], row["card_no"], threshold=lower)
+        if proposal:
+            proposals.append(proposal)
+    return proposals
+
+
+def apply_links(proposals: list[MatchProposal], threshold: float = DEFAULT_THRESHOLD) -> int:
+    """
+    threshold 以上の候補を card_group_members に追加
+
+    紐付け先の番号のカードが入っているグループがあればそこに、なければ紐付け先のカードを
+    代表（is_primary）にしたグループを作成して追加する
+
+    Returns:
+        追加したカード数
+    """
+    linked = 0
+    group_by_number = {}
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            for proposal in proposals:
+                if not proposal.accepted(threshold):
+                    continue
+
+                group_id = group_by_number.get(proposal.card_no)
+                if group_id is None:
+                    cursor.execute("""
+                        SELECT m.group_id FROM card_group_members m
+                        JOIN cards c ON c.id = m.card_id
+                        WHERE c.extracted_card_no = ?
+                        ORDER BY m.group_id
+                        LIMIT 1
+                    """, (proposal.card_no,))
+                    row = cursor.fetchone()
+                    if row:
+                        group_id = row["group_id"]
+                    else:
+                        cursor.execute(
+                            "INSERT INTO card_groups (name, base_name) VALUES (?, ?)",
+                            (proposal.target_name, extract_base_card_name(proposal.target_name))
+                        )
+                        group_id = cursor.lastrowid
+                        cursor.execute("""
+                            INSERT OR IGNORE INTO card_group_members (group_id, card_id, is_primary)
+                            VALUES (?, ?, 1)
+                        """, (group_id, proposal.target_card_id))
+                    group_by_number[proposal.card_no] = group_id
+
+                cursor.execute("""
+                    INSERT OR IGNORE INTO card_group_members (group_id, card_id)
+                    VALUES (?, ?)
+                """, (group_id, proposal.card_id))
+                linked += cursor.rowcount
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    if linked:
+        # カード詳細・集計APIのキャッシュを無効化
+        bump_data_generation()
+    return linked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="カード名のあいまいマッチング")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"紐付ける類似度の下限（デフォルト: {DEFAULT_THRESHOLD}）")
+    parser.add_argument("--show-below", type=float, default=None,
+                        help="この類似度以上の候補も表示する（紐付けはしない）")
+    parser.add_argument("--apply", action="store_true", help="threshold 以上の候補を card_group_members に追加")
+    args = parser.parse_args()
+
+    proposals = propose_links(args.threshold, args.show_below)
+    for p in proposals:
+        mark = "○" if p.accepted(args.threshold) else "?"
+        print(f"{mark} {p.confidence:.2f} [{p.method}] {p.name} -> {p.target_name} ({p.card_no})")
+    accepted = sum(1 for p in proposals if p.accepted(args.threshold))
+    print(f"\n紐付け候補: {accepted}件（threshold {args.threshold}）")
+
+    if args.apply:
+        print(f"card_group_members に追加: {apply_links(proposals, args.threshold)}件")
+
+
+if __name__ == "__main__":
+    main()
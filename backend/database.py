@@ -2,10 +2,14 @@
 データベース操作モジュール
 SQLite使用、WALモード有効
 """
+import os
 import sqlite3
+import threading
 import unicodedata
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 from contextlib import contextmanager
 
@@ -14,7 +18,11 @@ from models import Shop, Card, Price, Click, SearchLog, BatchProgress, FetchQueu
 # DBファイルパス
 DB_PATH = Path(__file__).parent / "card_price.db"
 
+# カード名の正規化・番号抽出結果をキャッシュする件数（同じ名前は巡回のたびに何度も来る）
+NAME_CACHE_SIZE = 65536
 
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
 def normalize_card_name(name: str) -> str:
     """カード名を検索用に正規化"""
     # NFKC正規化（全角→半角、カタカナ→ひらがな等）
@@ -28,6 +36,39 @@ def normalize_card_name(name: str) -> str:
 
 import re
 
+# カード番号・基本名の抽出ルールのバージョン（下のパターンを変更したら上げる）
+# cards.identity_version がこれと違うカードは card_backfill.py で再抽出される
+CARD_IDENTITY_RULES_VERSION = 1
+
+# カード番号パターン（優先度順）
+_CARD_NUMBER_PATTERNS = [
+    # 《》括弧内のパターン（最優先）: 《BSC46-CX04》
+    re.compile(r'《([A-Z]{2,3}\d{1,2}-[A-Z]{0,2}\d{1,3})》', re.IGNORECASE),
+    # 標準パターン: BS01-001, BSC48-X02, SD01-001, BS52-RV007, BSC46-CX04等
+    re.compile(r'([A-Z]{2,3}\d{1,2}-[A-Z]{0,2}\d{1,3})', re.IGNORECASE),
+    # プロモパターン: P-001, X-001
+    re.compile(r'([PX]-\d{1,3})', re.IGNORECASE),
+    # ()括弧内のパターン
+    re.compile(r'[（\(]([A-Z]{2,3}\d{1,2}-[A-Z]{0,2}\d{1,3})[）\)]', re.IGNORECASE),
+    re.compile(r'[（\(]([PX]-\d{1,3})[）\)]', re.IGNORECASE),
+]
+
+# 基本名の抽出で除去するパターン（適用順）
+_BASE_NAME_STRIP_PATTERNS = [
+    # カード番号
+    re.compile(r'《[A-Z]{2,3}\d{1,2}-[A-Z]{0,2}\d{1,3}》'),
+    re.compile(r'[（\(][A-Z]{2,3}\d{1,2}-[A-Z]{0,2}\d{1,3}[）\)]'),
+    re.compile(r'[（\(][PX]-\d{1,3}[）\)]'),
+    re.compile(r'[A-Z]{2,3}\d{1,2}-[A-Z]{0,2}\d{1,3}'),
+    # レアリティ記号 [X], [M], [R]等
+    re.compile(r'\[[A-Z]+\]'),
+    re.compile(r'【[^】]+】'),
+    # 括弧内の装飾（SECRET, WINNER, etc.）
+    re.compile(r'[（\(](SECRET|WINNER|Xレア加工|ペンタン|ヴィシュヌ)[）\)]'),
+]
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
 def extract_card_number(name: str) -> Optional[str]:
     """
     カード名からカード番号を抽出
@@ -43,47 +84,26 @@ def extract_card_number(name: str) -> Optional[str]:
     # NFKC正規化（全角→半角）
     normalized = unicodedata.normalize("NFKC", name)
 
-    # カード番号パターン（優先度順）
-    patterns = [
-        # 《》括弧内のパターン（最優先）: 《BSC46-CX04》
-        r'《([A-Z]{2,3}\d{1,2}-[A-Z]{0,2}\d{1,3})》',
-        # 標準パターン: BS01-001, BSC48-X02, SD01-001, BS52-RV007, BSC46-CX04等
-        r'([A-Z]{2,3}\d{1,2}-[A-Z]{0,2}\d{1,3})',
-        # プロモパターン: P-001, X-001
-        r'([PX]-\d{1,3})',
-        # ()括弧内のパターン
-        r'[（\(]([A-Z]{2,3}\d{1,2}-[A-Z]{0,2}\d{1,3})[）\)]',
-        r'[（\(]([PX]-\d{1,3})[）\)]',
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, normalized, re.IGNORECASE)
+    for pattern in _CARD_NUMBER_PATTERNS:
+        match = pattern.search(normalized)
         if match:
             return match.group(1).upper()
 
     return None
 
 
+@lru_cache(maxsize=NAME_CACHE_SIZE)
 def extract_base_card_name(name: str) -> str:
     """
     カード名から番号や記号を除いた基本名を抽出
     例: "[リバイバル]ジークフリード（BSC48-X02）" → "ジークフリード"
     """
     # NFKC正規化
-    normalized = unicodedata.normalize("NFKC", name)
-
-    # カード番号を除去（改良版パターン）
-    result = re.sub(r'《[A-Z]{2,3}\d{1,2}-[A-Z]{0,2}\d{1,3}》', '', normalized)
-    result = re.sub(r'[（\(][A-Z]{2,3}\d{1,2}-[A-Z]{0,2}\d{1,3}[）\)]', '', result)
-    result = re.sub(r'[（\(][PX]-\d{1,3}[）\)]', '', result)
-    result = re.sub(r'[A-Z]{2,3}\d{1,2}-[A-Z]{0,2}\d{1,3}', '', result)
-
-    # レアリティ記号を除去 [X], [M], [R]等
-    result = re.sub(r'\[[A-Z]+\]', '', result)
-    result = re.sub(r'【[^】]+】', '', result)
+    result = unicodedata.normalize("NFKC", name)
 
-    # 括弧内の装飾を除去（SECRET, WINNER, etc.）
-    result = re.sub(r'[（\(](SECRET|WINNER|Xレア加工|ペンタン|ヴィシュヌ)[）\)]', '', result)
+    # カード番号・レアリティ記号・装飾を除去
+    for pattern in _BASE_NAME_STRIP_PATTERNS:
+        result = pattern.sub('', result)
 
     # 前後の空白・記号を除去
     result = result.strip(' 　・-《》')
@@ -91,69 +111,102 @@ def extract_base_card_name(name: str) -> str:
     return result
 
 
-def match_cards_by_name():
+def card_identity_fields(name: str) -> tuple[str, Optional[str], str]:
+    """カード作成時に保存する (name_normalized, extracted_card_no, base_name)"""
+    return normalize_card_name(name), extract_card_number(name), extract_base_card_name(name)
+
+
+def match_cards_by_name(start_id: int = 0, end_id: int = None) -> int:
     """
-    カード番号がないカードを、名前の類似度で他カードと紐付ける
+    カード番号がないカードを、基本名が同じ番号付きカードと紐付ける
     遊々亭・ホビステなど番号のないショップ向け
+
+    同じ基本名の番号付きカードのうち最も古いカードの番号を使う。1回のUPDATEで処理し、
+    start_id < id <= end_id の範囲に絞れる（card_backfill.py が範囲ごとに呼ぶ）
+
+    Returns:
+        紐付けたカード数
     """
+    range_sql = "AND id > ?" + (" AND id <= ?" if end_id is not None else "")
+    range_params = (start_id,) + ((end_id,) if end_id is not None else ())
+
     with get_connection() as conn:
         cursor = conn.cursor()
+        cursor.execute(f"""
+            UPDATE cards
+            SET extracted_card_no = (
+                SELECT src.extracted_card_no FROM cards src
+                WHERE src.base_name = cards.base_name AND src.extracted_card_no IS NOT NULL
+                ORDER BY src.id
+                LIMIT 1
+            )
+            WHERE extracted_card_no IS NULL
+            AND base_name IS NOT NULL AND base_name != ''
+            {range_sql}
+            AND EXISTS (
+                SELECT 1 FROM cards src
+                WHERE src.base_name = cards.base_name AND src.extracted_card_no IS NOT NULL
+            )
+        """, range_params)
+        matched = cursor.rowcount
+        conn.commit()
+        return matched
 
-        # 番号がないカードを取得
-        cursor.execute("""
-            SELECT c.id, c.name, c.base_name, c.name_normalized
-            FROM cards c
-            WHERE c.extracted_card_no IS NULL
-            AND c.base_name IS NOT NULL
-        """)
-        cards_without_no = cursor.fetchall()
 
-        # 番号があるカードの基本名とIDのマッピングを作成
-        cursor.execute("""
-            SELECT id, base_name, extracted_card_no
-            FROM cards
-            WHERE extracted_card_no IS NOT NULL
-            AND base_name IS NOT NULL
-        """)
-        cards_with_no = cursor.fetchall()
-
-        # base_nameでグループ化
-        base_name_to_card_no = {}
-        for card in cards_with_no:
-            bn = card['base_name']
-            if bn and bn not in base_name_to_card_no:
-                base_name_to_card_no[bn] = card['extracted_card_no']
-
-        # マッチング実行
-        matched = 0
-        for card in cards_without_no:
-            base_name = card['base_name']
-            if base_name and base_name in base_name_to_card_no:
-                # 完全一致でマッチ
-                card_no = base_name_to_card_no[base_name]
-                cursor.execute("""
-                    UPDATE cards SET extracted_card_no = ?
-                    WHERE id = ?
-                """, (card_no, card['id']))
-                matched += 1
+# コネクション設定（接続ごとに1回だけ適用）
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",      # 同時読み書き性能向上
+    "PRAGMA synchronous=NORMAL",    # WALではNORMALでも破損しない（コミット時のfsyncを削減）
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA mmap_size=268435456",   # 256MB
+    "PRAGMA cache_size=-65536",     # 64MB
+    "PRAGMA temp_store=MEMORY",
+]
 
-        conn.commit()
-        print(f"Matched {matched} cards by base name")
-        return matched
+_local = threading.local()
 
 
-@contextmanager
-def get_connection():
-    """DBコネクション取得（コンテキストマネージャ）"""
+def _open_connection() -> sqlite3.Connection:
+    """新しいコネクションを開いて設定を適用"""
     conn = sqlite3.connect(str(DB_PATH), timeout=30.0)
     conn.row_factory = sqlite3.Row
-    # WALモード有効化（同時読み書き性能向上）
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA foreign_keys=ON")
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+@contextmanager
+def get_connection():
+    """
+    DBコネクション取得（コンテキストマネージャ）
+
+    スレッドごとに1本の長寿命コネクションを再利用する（FastAPIのワーカースレッド・
+    バッチスクリプトどちらからも利用可）。ネストした呼び出しは同じコネクションを共有し、
+    最外側のブロックを抜けた時点で未コミットの変更はロールバックされる。
+    """
+    state = getattr(_local, "state", None)
+    # fork後の子プロセスやDB_PATH変更時は新しいコネクションを開く
+    if state is None or state["pid"] != os.getpid() or state["path"] != str(DB_PATH):
+        state = {"pid": os.getpid(), "path": str(DB_PATH), "conn": _open_connection(), "depth": 0}
+        _local.state = state
+
+    conn = state["conn"]
+    state["depth"] += 1
     try:
         yield conn
     finally:
-        conn.close()
+        state["depth"] -= 1
+        if state["depth"] == 0 and conn.in_transaction:
+            conn.rollback()
+
+
+def close_connection():
+    """現在のスレッドのコネクションを閉じる（シャットダウン時用）"""
+    state = getattr(_local, "state", None)
+    if state is not None:
+        if state["pid"] == os.getpid():
+            state["conn"].close()
+        _local.state = None
 
 
 def init_database():
@@ -600,34 +653,6 @@ def migrate_v9_x_post_queue():
         print("Migration v9 (x_post_queue) completed")
 
 
-def update_card_numbers():
-    """既存カードのカード番号・基本名を抽出して更新"""
-    with get_connection() as conn:
-        cursor = conn.cursor()
-
-        # 未処理のカードを取得
-        cursor.execute("""
-            SELECT id, name FROM cards
-            WHERE extracted_card_no IS NULL OR base_name IS NULL
-        """)
-        cards = cursor.fetchall()
-
-        updated = 0
-        for card in cards:
-            card_no = extract_card_number(card['name'])
-            base_name = extract_base_card_name(card['name'])
-
-            cursor.execute("""
-                UPDATE cards
-                SET extracted_card_no = ?, base_name = ?
-                WHERE id = ?
-            """, (card_no, base_name, card['id']))
-            updated += 1
-
-        conn.commit()
-        print(f"Updated card numbers for {updated} cards")
-
-
 def init_shops():
     """ショップマスタ初期データ投入"""
     shops = [
@@ -682,8 +707,6 @@ def get_shop_by_name(name: str) -> Optional[Shop]:
 
 def get_or_create_card(name: str) -> Card:
     """カードを取得または作成"""
-    name_normalized = normalize_card_name(name)
-
     with get_connection() as conn:
         cursor = conn.cursor()
 
@@ -694,12 +717,14 @@ def get_or_create_card(name: str) -> Card:
         if row:
             return Card(**dict(row))
 
-        # 新規作成
-        cursor.execute(
-            "INSERT INTO cards (name, name_normalized) VALUES (?, ?)",
-            (name, name_normalized)
-        )
+        # 新規作成（カード番号・基本名もここで抽出しておく）
+        name_normalized, extracted_card_no, base_name = card_identity_fields(name)
+        cursor.execute("""
+            INSERT INTO cards (name, name_normalized, extracted_card_no, base_name, identity_version)
+            VALUES (?, ?, ?, ?, ?)
+        """, (name, name_normalized, extracted_card_no, base_name, CARD_IDENTITY_RULES_VERSION))
         conn.commit()
+        card_identity.add({name: cursor.lastrowid})
 
         cursor.execute("SELECT * FROM cards WHERE id = ?", (cursor.lastrowid,))
         row = cursor.fetchone()
@@ -707,19 +732,50 @@ def get_or_create_card(name: str) -> Card:
 
 
 def search_cards(keyword: str) -> list[Card]:
-    """カード名で検索"""
+    """カード名で検索（完全一致→前方一致→部分一致の順に並べる）"""
     keyword_normalized = normalize_card_name(keyword)
 
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            "SELECT * FROM cards WHERE name_normalized LIKE ?",
-            (f"%{keyword_normalized}%",)
-        )
+        match_sql, match_params = _card_name_match(cursor, keyword_normalized)
+        cursor.execute(f"""
+            SELECT c.* FROM cards c
+            WHERE {match_sql}
+            ORDER BY
+                c.name_normalized = ? DESC,
+                instr(c.name_normalized, ?) = 1 DESC,
+                length(c.name_normalized) ASC,
+                c.id ASC
+        """, match_params + [keyword_normalized, keyword_normalized])
         rows = cursor.fetchall()
         return [Card(**dict(row)) for row in rows]
 
 
+def _card_name_match(cursor, keyword_normalized: str) -> tuple[str, list]:
+    """
+    カード名の部分一致条件（cardsテーブルの別名c用）を返す
+
+    cards_fts（trigram）が使える場合はFTS5インデックスで絞り込み、
+    3文字未満のキーワードやFTS5非対応環境ではLIKEにフォールバックする
+    """
+    if len(keyword_normalized) >= 3 and _has_cards_fts(cursor):
+        phrase = '"' + keyword_normalized.replace('"', '""') + '"'
+        return "c.id IN (SELECT rowid FROM cards_fts WHERE cards_fts MATCH ?)", [phrase]
+    return "c.name_normalized LIKE ?", [f"%{keyword_normalized}%"]
+
+
+_cards_fts_available = None
+
+
+def _has_cards_fts(cursor) -> bool:
+    """cards_fts仮想テーブルが作成済みか（結果はプロセス内でキャッシュ）"""
+    global _cards_fts_available
+    if _cards_fts_available is None:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cards_fts'")
+        _cards_fts_available = cursor.fetchone() is not None
+    return _cards_fts_available
+
+
 # =============================================================================
 # 価格操作
 # =============================================================================
@@ -728,24 +784,37 @@ def save_price(card_id: int, shop_id: int, price: int, stock: int,
                stock_text: str, url: str, image_url: str = "") -> int:
     """価格データを保存（常に新規レコード追加）"""
     # stock_textに売切表示がある場合はstockを0に強制
-    if stock_text and ("×" in stock_text or "売切" in stock_text or "SOLD" in stock_text.upper()):
+    if _is_sold_out_text(stock_text):
         stock = 0
 
     with get_connection() as conn:
         cursor = conn.cursor()
+
+        # 直前の価格（値動き記録用）
+        cursor.execute("""
+            SELECT price FROM latest_prices
+            WHERE card_id = ? AND shop_id = ?
+        """, (card_id, shop_id))
+        row = cursor.fetchone()
+
         cursor.execute("""
             INSERT INTO prices (card_id, shop_id, price, stock, stock_text, url, image_url)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (card_id, shop_id, price, stock, stock_text, url, image_url))
+        price_id = cursor.lastrowid
+        if row:
+            _record_price_movement(cursor, price_id, card_id, shop_id, row["price"], price)
+        _upsert_latest_price(cursor, price_id, card_id, shop_id, price, stock)
+        _bump_data_generation(cursor)
         conn.commit()
-        return cursor.lastrowid
+        return price_id
 
 
 def save_price_if_changed(card_id: int, shop_id: int, price: int, stock: int,
                           stock_text: str, url: str, image_url: str = "") -> Optional[int]:
     """価格に変更がある場合のみ保存"""
     # stock_textに売切表示がある場合はstockを0に強制
-    if stock_text and ("×" in stock_text or "売切" in stock_text or "SOLD" in stock_text.upper()):
+    if _is_sold_out_text(stock_text):
         stock = 0
 
     with get_connection() as conn:
@@ -753,10 +822,8 @@ def save_price_if_changed(card_id: int, shop_id: int, price: int, stock: int,
 
         # 最新価格を取得
         cursor.execute("""
-            SELECT price, stock FROM prices
+            SELECT price, stock FROM latest_prices
             WHERE card_id = ? AND shop_id = ?
-            ORDER BY fetched_at DESC
-            LIMIT 1
         """, (card_id, shop_id))
         row = cursor.fetchone()
 
@@ -769,49 +836,395 @@ def save_price_if_changed(card_id: int, shop_id: int, price: int, stock: int,
             INSERT INTO prices (card_id, shop_id, price, stock, stock_text, url, image_url)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (card_id, shop_id, price, stock, stock_text, url, image_url))
+        price_id = cursor.lastrowid
+        if row:
+            _record_price_movement(cursor, price_id, card_id, shop_id, row["price"], price)
+        _upsert_latest_price(cursor, price_id, card_id, shop_id, price, stock)
+        _bump_data_generation(cursor)
         conn.commit()
         # 価格履歴を保存
         save_to_price_history(card_id, shop_id, price)
-        return cursor.lastrowid
+        return price_id
+
+
+def _upsert_latest_price(cursor, price_id: int, card_id: int, shop_id: int,
+                         price: int, stock: int):
+    """latest_pricesを最新の価格レコードで更新（呼び出し側のトランザクション内で実行）"""
+    cursor.execute("""
+        INSERT INTO latest_prices (card_id, shop_id, price_id, price, stock, fetched_at)
+        SELECT card_id, shop_id, id, price, stock, fetched_at FROM prices WHERE id = ?
+        ON CONFLICT(card_id, shop_id) DO UPDATE SET
+            price_id = excluded.price_id,
+            price = excluded.price,
+            stock = excluded.stock,
+            fetched_at = excluded.fetched_at
+    """, (price_id,))
+
+
+def _record_price_movement(cursor, price_id: int, card_id: int, shop_id: int,
+                           previous_price: int, price: int):
+    """price_movementsに直前の価格からの値動きを記録（呼び出し側のトランザクション内で実行）"""
+    cursor.execute("""
+        INSERT INTO price_movements (card_id, shop_id, price_id, previous_price, current_price, delta, moved_at)
+        SELECT card_id, shop_id, id, ?, price, price - ?, fetched_at FROM prices WHERE id = ?
+        ON CONFLICT(card_id, shop_id) DO UPDATE SET
+            price_id = excluded.price_id,
+            previous_price = excluded.previous_price,
+            current_price = excluded.current_price,
+            delta = excluded.delta,
+            moved_at = excluded.moved_at
+    """, (previous_price, previous_price, price_id))
+
+
+def _is_sold_out_text(stock_text: str) -> bool:
+    """在庫表示が売切を示しているか"""
+    return bool(stock_text) and ("×" in stock_text or "売切" in stock_text or "SOLD" in stock_text.upper())
+
+
+# IN句1回あたりのパラメータ数（SQLiteの変数上限対策）
+_IN_CHUNK_SIZE = 500
+
+# カード名→IDキャッシュの上限件数（preload時は全件を保持する）
+CARD_IDENTITY_CACHE_SIZE = 20000
+
+
+class CardIdentityCache:
+    """
+    カード名→カードIDのキャッシュ（スレッドセーフ）
+
+    カードは名前で一意・削除されないので、一度解決したIDは変わらない。
+    バッチは開始時に preload() で全件を読み込み、以降の既存カード確認をDBに問い合わせずに行う。
+    APIなど preload しないプロセスでは最近使った CARD_IDENTITY_CACHE_SIZE 件だけを保持する（LRU）。
+    キャッシュにない名前はDBで確認する（他プロセスが作成したカードも見落とさない）
+    """
+
+    def __init__(self, max_size: int = CARD_IDENTITY_CACHE_SIZE):
+        self.max_size = max_size
+        self._ids: OrderedDict[str, int] = OrderedDict()
+        self._path = None
+        self._preloaded = False
+        self._lock = threading.Lock()
+
+    def _check_path(self):
+        # DB_PATHが変わったら（テスト・別DB）捨てる
+        if self._path != str(DB_PATH):
+            self._ids.clear()
+            self._path = str(DB_PATH)
+            self._preloaded = False
+
+    def preload(self) -> int:
+        """全カードを読み込む（バッチ開始時に1回）"""
+        with get_connection() as conn:
+            rows = conn.execute("SELECT name, id FROM cards").fetchall()
+        with self._lock:
+            self._check_path()
+            self._ids = OrderedDict((row["name"], row["id"]) for row in rows)
+            self._preloaded = True
+        return len(rows)
+
+    def lookup(self, names) -> dict[str, int]:
+        """キャッシュにある名前だけ {name: id} で返す"""
+        found = {}
+        with self._lock:
+            self._check_path()
+            for name in names:
+                card_id = self._ids.get(name)
+                if card_id is not None:
+                    found[name] = card_id
+                    if not self._preloaded:
+                        self._ids.move_to_end(name)
+        return found
+
+    def add(self, ids: dict[str, int]):
+        """解決したIDを登録（コミット後に呼ぶ）"""
+        with self._lock:
+            self._check_path()
+            self._ids.update(ids)
+            if not self._preloaded:
+                for name in ids:
+                    self._ids.move_to_end(name)
+                while len(self._ids) > self.max_size:
+                    self._ids.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+            self._preloaded = False
+
+
+# シングルトン
+card_identity = CardIdentityCache()
+
+
+def bulk_ingest(shop_id: int, cards: list[dict]) -> dict:
+    """
+    クローラー1ページ分（またはインポートの1バッチ分）の結果を1トランザクションで取り込む
+
+    カードの取得/作成・detail_urlの補完・最新価格との差分判定・価格と価格履歴の保存を
+    まとめて行う（get_or_create_card_v2 + save_price_if_changedを1件ずつ呼ぶのと同等）
+
+    Args:
+        shop_id: ショップID
+        cards: [{"name", "card_no", "detail_url", "url", "price", "stock", "stock_text", "image_url"}, ...]
+               urlがなければdetail_urlを価格の商品URLとして使う。price <= 0の行はカード登録のみ
+
+    Returns:
+        {"total": 件数, "new": 新規カード数, "saved": 価格保存数,
+         "skipped": 価格変更なし数, "updated": 既存カードの価格保存数}
+    """
+    result = {"total": len(cards), "new": 0, "saved": 0, "skipped": 0, "updated": 0}
+    if not cards:
+        return result
+
+    # 同一ページ内で同名カードが複数ある場合は最後の行を採用
+    rows_by_name = {}
+    for card_data in cards:
+        rows_by_name[card_data["name"]] = card_data
+    names = list(rows_by_name)
 
+    # キャッシュ済みのカードはDBで確認しない
+    card_ids = card_identity.lookup(names)
 
-def get_latest_prices_by_keyword(keyword: str, limit: int = 100) -> list[Price]:
-    """キーワードで最新価格を検索（検索API用）"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # キャッシュにないカードの存在を確認
+            uncached = [name for name in names if name not in card_ids]
+            for i in range(0, len(uncached), _IN_CHUNK_SIZE):
+                chunk = uncached[i:i + _IN_CHUNK_SIZE]
+                cursor.execute(
+                    f"SELECT id, name FROM cards WHERE name IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                card_ids.update((row["name"], row["id"]) for row in cursor.fetchall())
+            existing = set(card_ids)
+
+            # 新規カードを一括作成（カード番号・基本名もここで抽出しておく）
+            new_names = [name for name in names if name not in existing]
+            new_rows = []
+            for name in new_names:
+                name_normalized, extracted_card_no, base_name = card_identity_fields(name)
+                new_rows.append((name, name_normalized, rows_by_name[name].get("card_no"), shop_id,
+                                 rows_by_name[name].get("detail_url"), extracted_card_no, base_name,
+                                 CARD_IDENTITY_RULES_VERSION))
+            cursor.executemany("""
+                INSERT OR IGNORE INTO cards
+                    (name, name_normalized, card_no, source_shop_id, detail_url, extracted_card_no, base_name,
+                     identity_version)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, new_rows)
+            result["new"] = len(new_names)
+
+            # 既存カードにdetail_urlがなければ補完
+            cursor.executemany("""
+                UPDATE cards SET detail_url = ?, card_no = ?
+                WHERE name = ? AND (detail_url IS NULL OR detail_url = '')
+            """, [
+                (rows_by_name[name]["detail_url"], rows_by_name[name].get("card_no"), name)
+                for name in existing if rows_by_name[name].get("detail_url")
+            ])
+
+            # 新規カードのIDを解決
+            for i in range(0, len(new_names), _IN_CHUNK_SIZE):
+                chunk = new_names[i:i + _IN_CHUNK_SIZE]
+                cursor.execute(
+                    f"SELECT id, name FROM cards WHERE name IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                card_ids.update((row["name"], row["id"]) for row in cursor.fetchall())
+
+            # 価格候補を一時テーブルへ
+            cursor.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS ingest_prices (
+                    seq INTEGER PRIMARY KEY,
+                    card_id INTEGER NOT NULL,
+                    price INTEGER NOT NULL,
+                    stock INTEGER NOT NULL,
+                    stock_text TEXT,
+                    url TEXT NOT NULL,
+                    image_url TEXT,
+                    is_new INTEGER NOT NULL
+                )
+            """)
+            cursor.execute("DELETE FROM ingest_prices")
+            price_rows = []
+            for seq, name in enumerate(names):
+                card_data = rows_by_name[name]
+                price = card_data.get("price", 0) or 0
+                if price <= 0:
+                    continue
+                stock_text = card_data.get("stock_text", "") or ""
+                stock = 0 if _is_sold_out_text(stock_text) else (card_data.get("stock", 0) or 0)
+                price_rows.append((
+                    seq, card_ids[name], price, stock, stock_text,
+                    card_data.get("url") or card_data.get("detail_url") or "",
+                    card_data.get("image_url", "") or "",
+                    1 if name not in existing else 0,
+                ))
+            cursor.executemany("INSERT INTO ingest_prices VALUES (?, ?, ?, ?, ?, ?, ?, ?)", price_rows)
+
+            # 最新価格と差分がある行だけ保存
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM prices")
+            last_price_id = cursor.fetchone()[0]
+            cursor.execute("""
+                INSERT INTO prices (card_id, shop_id, price, stock, stock_text, url, image_url)
+                SELECT r.card_id, ?, r.price, r.stock, r.stock_text, r.url, r.image_url
+                FROM ingest_prices r
+                LEFT JOIN latest_prices lp ON lp.card_id = r.card_id AND lp.shop_id = ?
+                WHERE lp.card_id IS NULL OR lp.price != r.price OR lp.stock != r.stock
+                ORDER BY r.seq
+            """, (shop_id, shop_id))
+            result["saved"] = cursor.rowcount
+            result["skipped"] = len(price_rows) - result["saved"]
+
+            if result["saved"]:
+                cursor.execute("""
+                    SELECT COUNT(*) FROM prices p
+                    JOIN ingest_prices r ON r.card_id = p.card_id
+                    WHERE p.id > ? AND r.is_new = 0
+                """, (last_price_id,))
+                result["updated"] = cursor.fetchone()[0]
+
+                # 値動きを記録（latest_prices更新前の価格と比較）
+                cursor.execute("""
+                    INSERT INTO price_movements
+                        (card_id, shop_id, price_id, previous_price, current_price, delta, moved_at)
+                    SELECT p.card_id, p.shop_id, p.id, lp.price, p.price, p.price - lp.price, p.fetched_at
+                    FROM prices p
+                    JOIN latest_prices lp ON lp.card_id = p.card_id AND lp.shop_id = p.shop_id
+                    WHERE p.id > ?
+                    ON CONFLICT(card_id, shop_id) DO UPDATE SET
+                        price_id = excluded.price_id,
+                        previous_price = excluded.previous_price,
+                        current_price = excluded.current_price,
+                        delta = excluded.delta,
+                        moved_at = excluded.moved_at
+                """, (last_price_id,))
+
+                # 最新価格テーブルを更新
+                cursor.execute("""
+                    INSERT INTO latest_prices (card_id, shop_id, price_id, price, stock, fetched_at)
+                    SELECT card_id, shop_id, id, price, stock, fetched_at FROM prices WHERE id > ?
+                    ON CONFLICT(card_id, shop_id) DO UPDATE SET
+                        price_id = excluded.price_id,
+                        price = excluded.price,
+                        stock = excluded.stock,
+                        fetched_at = excluded.fetched_at
+                """, (last_price_id,))
+
+                # 価格履歴（1日1レコード）: 当日分があれば更新、なければ追加
+                cursor.execute("""
+                    UPDATE price_history
+                    SET price = (
+                            SELECT p.price FROM prices p
+                            WHERE p.id > ? AND p.card_id = price_history.card_id
+                            AND p.shop_id = price_history.shop_id
+                        ),
+                        recorded_at = CURRENT_TIMESTAMP
+                    WHERE shop_id = ? AND DATE(recorded_at) = DATE('now')
+                    AND card_id IN (SELECT card_id FROM prices WHERE id > ?)
+                """, (last_price_id, shop_id, last_price_id))
+                cursor.execute("""
+                    INSERT INTO price_history (card_id, shop_id, price)
+                    SELECT p.card_id, p.shop_id, p.price FROM prices p
+                    WHERE p.id > ?
+                    AND NOT EXISTS (
+                        SELECT 1 FROM price_history ph
+                        WHERE ph.card_id = p.card_id AND ph.shop_id = p.shop_id
+                        AND DATE(ph.recorded_at) = DATE('now')
+                    )
+                """, (last_price_id,))
+
+            if result["saved"] or result["new"]:
+                _bump_data_generation(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    card_identity.add(card_ids)
+    return result
+
+
+# 検索結果のソート順（sortパラメータ → ORDER BY）
+_SEARCH_SORT_ORDERS = {
+    "price-asc": "lp.price ASC, lp.price_id ASC",
+    "price-desc": "lp.price DESC, lp.price_id ASC",
+    "site": "s.name ASC, lp.price ASC, lp.price_id ASC",
+}
+
+# 在庫フィルター（stockパラメータ → WHERE条件）
+_SEARCH_STOCK_FILTERS = {
+    "all": "",
+    "in-stock": "AND lp.stock > 0",
+    "out-of-stock": "AND lp.stock = 0",
+}
+
+
+def get_latest_prices_by_keyword(keyword: str, limit: int = 100, offset: int = 0,
+                                 sort: str = "price-asc", stock: str = "all") -> list[Price]:
+    """
+    キーワードで最新価格を検索（検索API用）
+
+    Args:
+        keyword: 検索キーワード
+        limit: 取得件数
+        offset: 開始位置（ページネーション用）
+        sort: ソート順（price-asc, price-desc, site）。不明な値はprice-asc
+        stock: 在庫フィルター（all, in-stock, out-of-stock）。不明な値はall
+    """
     keyword_normalized = normalize_card_name(keyword)
+    order_sql = _SEARCH_SORT_ORDERS.get(sort, _SEARCH_SORT_ORDERS["price-asc"])
+    stock_sql = _SEARCH_STOCK_FILTERS.get(stock, "")
 
     with get_connection() as conn:
         cursor = conn.cursor()
+        match_sql, match_params = _card_name_match(cursor, keyword_normalized)
         # 各カード×ショップの最新価格のみ取得
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT p.*, c.name as card_name, s.name as shop_name
-            FROM prices p
-            JOIN cards c ON p.card_id = c.id
-            JOIN shops s ON p.shop_id = s.id
-            WHERE c.name_normalized LIKE ?
-            AND p.id IN (
-                SELECT MAX(id) FROM prices
-                GROUP BY card_id, shop_id
-            )
-            ORDER BY p.price ASC
-            LIMIT ?
-        """, (f"%{keyword_normalized}%", limit))
+            FROM latest_prices lp
+            JOIN prices p ON p.id = lp.price_id
+            JOIN cards c ON lp.card_id = c.id
+            JOIN shops s ON lp.shop_id = s.id
+            WHERE {match_sql} {stock_sql}
+            ORDER BY {order_sql}
+            LIMIT ? OFFSET ?
+        """, match_params + [limit, offset])
 
         rows = cursor.fetchall()
         return [Price(**dict(row)) for row in rows]
 
 
+def count_latest_prices_by_keyword(keyword: str, stock: str = "all") -> int:
+    """キーワードに一致する最新価格の件数（検索APIの総件数用）"""
+    keyword_normalized = normalize_card_name(keyword)
+    stock_sql = _SEARCH_STOCK_FILTERS.get(stock, "")
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        match_sql, match_params = _card_name_match(cursor, keyword_normalized)
+        cursor.execute(f"""
+            SELECT COUNT(*)
+            FROM latest_prices lp
+            JOIN cards c ON lp.card_id = c.id
+            WHERE {match_sql} {stock_sql}
+        """, match_params)
+        return cursor.fetchone()[0]
+
+
 def get_latest_price(card_id: int, shop_id: int) -> Optional[Price]:
     """特定カード×ショップの最新価格を取得"""
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT p.*, c.name as card_name, s.name as shop_name
-            FROM prices p
+            FROM latest_prices lp
+            JOIN prices p ON p.id = lp.price_id
             JOIN cards c ON p.card_id = c.id
             JOIN shops s ON p.shop_id = s.id
-            WHERE p.card_id = ? AND p.shop_id = ?
-            ORDER BY p.fetched_at DESC
-            LIMIT 1
+            WHERE lp.card_id = ? AND lp.shop_id = ?
         """, (card_id, shop_id))
         row = cursor.fetchone()
         return Price(**dict(row)) if row else None
@@ -823,17 +1236,13 @@ def get_card_all_prices(card_id: int) -> list[Price]:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT p.*, c.name as card_name, s.name as shop_name
-            FROM prices p
+            FROM latest_prices lp
+            JOIN prices p ON p.id = lp.price_id
             JOIN cards c ON p.card_id = c.id
             JOIN shops s ON p.shop_id = s.id
-            WHERE p.card_id = ?
-            AND p.id IN (
-                SELECT MAX(id) FROM prices
-                WHERE card_id = ?
-                GROUP BY shop_id
-            )
+            WHERE lp.card_id = ?
             ORDER BY p.price ASC
-        """, (card_id, card_id))
+        """, (card_id,))
         rows = cursor.fetchall()
         return [Price(**dict(row)) for row in rows]
 
@@ -888,30 +1297,42 @@ def get_unified_card_prices(card_id: int) -> dict:
             related_card_ids.extend([row['id'] for row in cursor.fetchall()])
 
         # グループに属している場合、グループメンバーも追加
-        cursor.execute("""
-            SELECT cm2.card_id FROM card_group_members cm1
+        # （同じ番号のカードが入っているグループも対象。card_matching.py の紐付けは番号ごとに1グループ）
+        placeholders = ','.join(['?' for _ in related_card_ids])
+        cursor.execute(f"""
+            SELECT DISTINCT cm2.card_id, c.extracted_card_no FROM card_group_members cm1
             JOIN card_group_members cm2 ON cm1.group_id = cm2.group_id
-            WHERE cm1.card_id = ? AND cm2.card_id != ?
-        """, (card_id, card_id))
+            JOIN cards c ON c.id = cm2.card_id
+            WHERE cm1.card_id IN ({placeholders})
+        """, related_card_ids)
+        member_numbers = set()
         for row in cursor.fetchall():
             if row['card_id'] not in related_card_ids:
                 related_card_ids.append(row['card_id'])
+            if row['extracted_card_no'] and row['extracted_card_no'] != card_no:
+                member_numbers.add(row['extracted_card_no'])
+
+        # グループメンバーと同じ番号のカードも追加
+        if member_numbers:
+            number_placeholders = ','.join(['?' for _ in member_numbers])
+            cursor.execute(f"""
+                SELECT id FROM cards WHERE extracted_card_no IN ({number_placeholders})
+            """, list(member_numbers))
+            for row in cursor.fetchall():
+                if row['id'] not in related_card_ids:
+                    related_card_ids.append(row['id'])
 
         # 全ての関連カードから価格を取得
         placeholders = ','.join(['?' for _ in related_card_ids])
         cursor.execute(f"""
             SELECT p.*, c.name as card_name, s.name as shop_name
-            FROM prices p
+            FROM latest_prices lp
+            JOIN prices p ON p.id = lp.price_id
             JOIN cards c ON p.card_id = c.id
             JOIN shops s ON p.shop_id = s.id
-            WHERE p.card_id IN ({placeholders})
-            AND p.id IN (
-                SELECT MAX(id) FROM prices
-                WHERE card_id IN ({placeholders})
-                GROUP BY card_id, shop_id
-            )
+            WHERE lp.card_id IN ({placeholders})
             ORDER BY p.price ASC
-        """, related_card_ids + related_card_ids)
+        """, related_card_ids)
         prices = [Price(**dict(row)) for row in cursor.fetchall()]
 
         return {
@@ -1046,31 +1467,21 @@ def get_recently_updated(limit: int = 20) -> list[Price]:
 
 
 def get_price_increased_cards(limit: int = 20) -> list[dict]:
-    """値上がりしたカード"""
+    """値上がりしたカード（直近の価格更新で値上がりしたもの）"""
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
-            WITH ranked AS (
-                SELECT
-                    p.card_id,
-                    p.shop_id,
-                    p.price,
-                    p.fetched_at,
-                    ROW_NUMBER() OVER (PARTITION BY p.card_id, p.shop_id ORDER BY p.fetched_at DESC) as rn
-                FROM prices p
-            )
             SELECT
                 c.name as card_name,
                 s.name as shop_name,
-                curr.price as current_price,
-                prev.price as previous_price,
-                (curr.price - prev.price) as diff
-            FROM ranked curr
-            JOIN ranked prev ON curr.card_id = prev.card_id AND curr.shop_id = prev.shop_id
-            JOIN cards c ON curr.card_id = c.id
-            JOIN shops s ON curr.shop_id = s.id
-            WHERE curr.rn = 1 AND prev.rn = 2 AND curr.price > prev.price
-            ORDER BY diff DESC
+                m.current_price,
+                m.previous_price,
+                m.delta as diff
+            FROM price_movements m
+            JOIN cards c ON m.card_id = c.id
+            JOIN shops s ON m.shop_id = s.id
+            WHERE m.delta > 0
+            ORDER BY m.delta DESC
             LIMIT ?
         """, (limit,))
         rows = cursor.fetchall()
@@ -1078,31 +1489,21 @@ def get_price_increased_cards(limit: int = 20) -> list[dict]:
 
 
 def get_price_decreased_cards(limit: int = 20) -> list[dict]:
-    """値下がりしたカード"""
+    """値下がりしたカード（直近の価格更新で値下がりしたもの）"""
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
-            WITH ranked AS (
-                SELECT
-                    p.card_id,
-                    p.shop_id,
-                    p.price,
-                    p.fetched_at,
-                    ROW_NUMBER() OVER (PARTITION BY p.card_id, p.shop_id ORDER BY p.fetched_at DESC) as rn
-                FROM prices p
-            )
             SELECT
                 c.name as card_name,
                 s.name as shop_name,
-                curr.price as current_price,
-                prev.price as previous_price,
-                (prev.price - curr.price) as diff
-            FROM ranked curr
-            JOIN ranked prev ON curr.card_id = prev.card_id AND curr.shop_id = prev.shop_id
-            JOIN cards c ON curr.card_id = c.id
-            JOIN shops s ON curr.shop_id = s.id
-            WHERE curr.rn = 1 AND prev.rn = 2 AND curr.price < prev.price
-            ORDER BY diff DESC
+                m.current_price,
+                m.previous_price,
+                -m.delta as diff
+            FROM price_movements m
+            JOIN cards c ON m.card_id = c.id
+            JOIN shops s ON m.shop_id = s.id
+            WHERE m.delta < 0
+            ORDER BY m.delta ASC
             LIMIT ?
         """, (limit,))
         rows = cursor.fetchall()
@@ -1158,6 +1559,44 @@ def record_search(keyword: str, result_count: int) -> int:
         return cursor.lastrowid
 
 
+def write_activity_logs(clicks: list[tuple], searches: list[tuple]) -> int:
+    """
+    クリック・検索ログをまとめて記録（activity_log.py のまとめ書き用、1トランザクション）
+
+    存在しないカード・ショップを指すクリックは外部キー違反でまとめて失敗しないよう、書き込まずに飛ばす
+
+    Args:
+        clicks: [(card_id, shop_id, price_id, clicked_at)]
+        searches: [(keyword, result_count, searched_at)]
+
+    Returns:
+        書き込んだ件数（飛ばしたクリックは含まない）
+    """
+    written = len(searches)
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            if clicks:
+                cursor.executemany("""
+                    INSERT INTO clicks (card_id, shop_id, price_id, clicked_at)
+                    SELECT ?1, ?2, ?3, ?4
+                    WHERE (?1 IS NULL OR EXISTS (SELECT 1 FROM cards WHERE id = ?1))
+                      AND (?2 IS NULL OR EXISTS (SELECT 1 FROM shops WHERE id = ?2))
+                """, clicks)
+                written += cursor.rowcount
+            if searches:
+                cursor.executemany(
+                    "INSERT INTO search_logs (keyword, result_count, searched_at) VALUES (?, ?, ?)",
+                    searches
+                )
+            conn.commit()
+            return written
+        except Exception:
+            conn.rollback()
+            raise
+
+
 # =============================================================================
 # メンテナンス
 # =============================================================================
@@ -1171,6 +1610,11 @@ def cleanup_old_prices(days: int = 90):
             WHERE fetched_at < datetime('now', ? || ' days')
         """, (f"-{days}",))
         deleted = cursor.rowcount
+        # 最新価格自体が削除された組み合わせはlatest_pricesからも外す
+        cursor.execute("""
+            DELETE FROM latest_prices
+            WHERE fetched_at < datetime('now', ? || ' days')
+        """, (f"-{days}",))
         conn.commit()
         print(f"Deleted {deleted} old price records")
         return deleted
@@ -1480,7 +1924,7 @@ def save_batch_log(batch_type: str, shop_name: str, status: str,
                    pages_processed: int = 0, cards_total: int = 0,
                    cards_new: int = 0, cards_updated: int = 0, message: str = None,
                    started_at: str = None) -> int:
-    """バッチ実行ログを保存"""
+    """バッチ実行ログを保存（データ世代番号も同じトランザクションで進める）"""
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
@@ -1488,10 +1932,62 @@ def save_batch_log(batch_type: str, shop_name: str, status: str,
             (batch_type, shop_name, status, pages_processed, cards_total, cards_new, cards_updated, message, started_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (batch_type, shop_name, status, pages_processed, cards_total, cards_new, cards_updated, message, started_at))
+        _bump_data_generation(cursor)
         conn.commit()
         return cursor.lastrowid
 
 
+def _bump_data_generation(cursor):
+    cursor.execute("""
+        UPDATE data_generation SET generation = generation + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE id = 1
+    """)
+
+
+def bump_data_generation():
+    """
+    データ世代番号を進める
+
+    価格の保存（save_price・save_price_if_changed・bulk_ingest）とsave_batch_logは同じ
+    トランザクションで進めるので、それ以外でデータを変更する処理（カードの紐付けなど）の後に呼ぶ
+    """
+    with get_connection() as conn:
+        _bump_data_generation(conn.cursor())
+        conn.commit()
+
+
+def get_data_generation() -> int:
+    """
+    データ世代番号を取得
+
+    価格の保存・バッチの完了（save_batch_log）で世代番号が進むため、この値が変わったら
+    集計系APIのキャッシュ・ETagを無効化する
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT generation FROM data_generation WHERE id = 1")
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+
+def get_card_versions(card_ids: list[int]) -> int:
+    """
+    カードごとの更新番号の合計（card_versions。カード詳細のETag確認用）
+
+    最新価格・カード番号・グループが変わるとトリガーで該当カードの番号が増えるので、
+    合計が変わっていなければどのカードも変わっていない
+    """
+    if not card_ids:
+        return 0
+    placeholders = ','.join(['?' for _ in card_ids])
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT COALESCE(SUM(version), 0) FROM card_versions WHERE card_id IN ({placeholders})
+        """, list(card_ids))
+        return cursor.fetchone()[0]
+
+
 def get_recent_batch_logs(limit: int = 10, per_shop: bool = False) -> list[dict]:
     """最近のバッチ実行ログを取得
 
@@ -1827,8 +2323,6 @@ def get_or_create_card_v2(name: str, card_no: str = None,
                           source_shop_id: int = None,
                           detail_url: str = None) -> Card:
     """カードを取得または作成（v2拡張版）"""
-    name_normalized = normalize_card_name(name)
-
     with get_connection() as conn:
         cursor = conn.cursor()
 
@@ -1846,12 +2340,16 @@ def get_or_create_card_v2(name: str, card_no: str = None,
                 conn.commit()
             return Card(**dict(row))
 
-        # 新規作成
+        # 新規作成（カード番号・基本名もここで抽出しておく）
+        name_normalized, extracted_card_no, base_name = card_identity_fields(name)
         cursor.execute("""
-            INSERT INTO cards (name, name_normalized, card_no, source_shop_id, detail_url)
-            VALUES (?, ?, ?, ?, ?)
-        """, (name, name_normalized, card_no, source_shop_id, detail_url))
+            INSERT INTO cards (name, name_normalized, card_no, source_shop_id, detail_url,
+                               extracted_card_no, base_name, identity_version)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (name, name_normalized, card_no, source_shop_id, detail_url, extracted_card_no, base_name,
+              CARD_IDENTITY_RULES_VERSION))
         conn.commit()
+        card_identity.add({name: cursor.lastrowid})
 
         cursor.execute("SELECT * FROM cards WHERE id = ?", (cursor.lastrowid,))
         row = cursor.fetchone()
@@ -1871,6 +2369,25 @@ def get_card_by_id(card_id: int) -> Optional[Card]:
         return Card(**dict(row)) if row else None
 
 
+def get_card_id_by_name(name: str) -> Optional[int]:
+    """カード名（完全一致）からカードIDを取得（card_identity のキャッシュを優先）"""
+    card_id = card_identity.lookup([name]).get(name)
+    if card_id is not None:
+        return card_id
+    with get_connection() as conn:
+        row = conn.execute("SELECT id FROM cards WHERE name = ?", (name,)).fetchone()
+    if row is None:
+        return None
+    card_identity.add({name: row["id"]})
+    return row["id"]
+
+
+def card_exists(card_id: int) -> bool:
+    """カードIDが存在するか（主キーの確認のみ）"""
+    with get_connection() as conn:
+        return conn.execute("SELECT 1 FROM cards WHERE id = ?", (card_id,)).fetchone() is not None
+
+
 def get_admin_stats() -> dict:
     """管理者用統計情報"""
     with get_connection() as conn:
@@ -2561,38 +3078,23 @@ def get_users_with_favorite_card(card_id: int) -> list[dict]:
 
 
 def detect_price_changes_for_favorites() -> list[dict]:
-    """お気に入りカードの価格変動を検出"""
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        # お気に入りに登録されているカードの最新価格と前回価格を比較
-        cursor.execute("""
-            WITH latest_prices AS (
-                SELECT card_id, shop_id, price, fetched_at,
-                       ROW_NUMBER() OVER (PARTITION BY card_id, shop_id ORDER BY fetched_at DESC) as rn
-                FROM prices
-                WHERE fetched_at > datetime('now', '-2 days')
-            ),
-            previous_prices AS (
-                SELECT card_id, shop_id, price, fetched_at,
-                       ROW_NUMBER() OVER (PARTITION BY card_id, shop_id ORDER BY fetched_at DESC) as rn
-                FROM prices
-                WHERE fetched_at <= datetime('now', '-1 days')
-                  AND fetched_at > datetime('now', '-7 days')
-            )
-            SELECT DISTINCT
-                l.card_id,
-                l.shop_id,
-                p.price as old_price,
-                l.price as new_price,
+    """お気に入りカードの価格変動を検出（過去2日以内に価格が変わったもの）"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT
+                m.card_id,
+                m.shop_id,
+                m.previous_price as old_price,
+                m.current_price as new_price,
                 c.name as card_name,
                 s.name as shop_name
-            FROM latest_prices l
-            JOIN previous_prices p ON l.card_id = p.card_id AND l.shop_id = p.shop_id
-            JOIN cards c ON l.card_id = c.id
-            JOIN shops s ON l.shop_id = s.id
-            WHERE l.rn = 1 AND p.rn = 1
-              AND l.price != p.price
-              AND l.card_id IN (SELECT DISTINCT card_id FROM favorites)
+            FROM price_movements m
+            JOIN cards c ON m.card_id = c.id
+            JOIN shops s ON m.shop_id = s.id
+            WHERE m.card_id IN (SELECT DISTINCT card_id FROM favorites)
+              AND m.moved_at > datetime('now', '-2 days')
+              AND m.delta != 0
         """)
         return [dict(row) for row in cursor.fetchall()]
 
@@ -2936,3 +3438,300 @@ def delete_article(article_id: int) -> bool:
         cursor.execute("DELETE FROM articles WHERE id = ?", (article_id,))
         conn.commit()
         return cursor.rowcount > 0
+
+
+# =============================================================================
+# v12: 最新価格テーブル
+# =============================================================================
+
+def migrate_v12_latest_prices():
+    """v12: カード×ショップごとの最新価格テーブル追加（既存データをバックフィル）"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS latest_prices (
+                card_id INTEGER NOT NULL,
+                shop_id INTEGER NOT NULL,
+                price_id INTEGER NOT NULL,
+                price INTEGER NOT NULL,
+                stock INTEGER DEFAULT 0,
+                fetched_at TEXT,
+                PRIMARY KEY (card_id, shop_id),
+                FOREIGN KEY (card_id) REFERENCES cards(id),
+                FOREIGN KEY (shop_id) REFERENCES shops(id)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_latest_prices_shop ON latest_prices(shop_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_latest_prices_price_id ON latest_prices(price_id)")
+
+        # 空の場合のみpricesからバックフィル（起動のたびに全件走査しない）
+        cursor.execute("SELECT 1 FROM latest_prices LIMIT 1")
+        if cursor.fetchone() is None:
+            cursor.execute("""
+                INSERT INTO latest_prices (card_id, shop_id, price_id, price, stock, fetched_at)
+                SELECT p.card_id, p.shop_id, p.id, p.price, p.stock, p.fetched_at
+                FROM prices p
+                WHERE p.id IN (
+                    SELECT MAX(id) FROM prices
+                    GROUP BY card_id, shop_id
+                )
+            """)
+            if cursor.rowcount > 0:
+                print(f"v12 migration: backfilled {cursor.rowcount} latest prices")
+
+        conn.commit()
+        print("Migration v12 (latest_prices) completed")
+
+
+# =============================================================================
+# v13: カード名全文検索インデックス
+# =============================================================================
+
+def migrate_v13_cards_fts():
+    """v13: カード名検索用FTS5（trigram）インデックス追加"""
+    global _cards_fts_available
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cards_fts'")
+        exists = cursor.fetchone() is not None
+
+        if not exists:
+            try:
+                # cardsを外部コンテンツとするtrigramインデックス（name_normalizedの部分一致用）
+                cursor.execute("""
+                    CREATE VIRTUAL TABLE cards_fts USING fts5(
+                        name_normalized,
+                        content='cards',
+                        content_rowid='id',
+                        tokenize='trigram'
+                    )
+                """)
+            except sqlite3.OperationalError as e:
+                # FTS5/trigram非対応のSQLite（3.34未満など）ではLIKE検索のまま
+                print(f"Migration v13 skipped (FTS5 trigram unavailable): {e}")
+                _cards_fts_available = False
+                return
+
+        # cardsへの変更をインデックスへ反映
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS cards_fts_ai AFTER INSERT ON cards BEGIN
+                INSERT INTO cards_fts(rowid, name_normalized) VALUES (new.id, new.name_normalized);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS cards_fts_ad AFTER DELETE ON cards BEGIN
+                INSERT INTO cards_fts(cards_fts, rowid, name_normalized)
+                VALUES ('delete', old.id, old.name_normalized);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS cards_fts_au AFTER UPDATE OF name_normalized ON cards BEGIN
+                INSERT INTO cards_fts(cards_fts, rowid, name_normalized)
+                VALUES ('delete', old.id, old.name_normalized);
+                INSERT INTO cards_fts(rowid, name_normalized) VALUES (new.id, new.name_normalized);
+            END
+        """)
+
+        if not exists:
+            # 既存カードからインデックスを構築
+            cursor.execute("INSERT INTO cards_fts(cards_fts) VALUES ('rebuild')")
+
+        conn.commit()
+        _cards_fts_available = True
+        print("Migration v13 (cards_fts) completed")
+
+
+# =============================================================================
+# v14: 値動きテーブル
+# =============================================================================
+
+def migrate_v14_price_movements():
+    """v14: カード×ショップごとの直近の値動き（前回価格・今回価格・差額）テーブル追加"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS price_movements (
+                card_id INTEGER NOT NULL,
+                shop_id INTEGER NOT NULL,
+                price_id INTEGER NOT NULL,
+                previous_price INTEGER NOT NULL,
+                current_price INTEGER NOT NULL,
+                delta INTEGER NOT NULL,
+                moved_at TEXT,
+                PRIMARY KEY (card_id, shop_id),
+                FOREIGN KEY (card_id) REFERENCES cards(id),
+                FOREIGN KEY (shop_id) REFERENCES shops(id)
+            )
+        """)
+        # 値上がり/値下がりランキング用
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_movements_delta ON price_movements(delta)")
+        # お気に入り価格変動検知用
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_movements_moved_at ON price_movements(moved_at)")
+
+        # 空の場合のみpricesの最新2件からバックフィル
+        cursor.execute("SELECT 1 FROM price_movements LIMIT 1")
+        if cursor.fetchone() is None:
+            cursor.execute("""
+                WITH ranked AS (
+                    SELECT id, card_id, shop_id, price, fetched_at,
+                           ROW_NUMBER() OVER (PARTITION BY card_id, shop_id ORDER BY fetched_at DESC, id DESC) as rn
+                    FROM prices
+                )
+                INSERT INTO price_movements
+                    (card_id, shop_id, price_id, previous_price, current_price, delta, moved_at)
+                SELECT curr.card_id, curr.shop_id, curr.id, prev.price, curr.price,
+                       curr.price - prev.price, curr.fetched_at
+                FROM ranked curr
+                JOIN ranked prev ON curr.card_id = prev.card_id AND curr.shop_id = prev.shop_id
+                WHERE curr.rn = 1 AND prev.rn = 2
+            """)
+            if cursor.rowcount > 0:
+                print(f"v14 migration: backfilled {cursor.rowcount} price movements")
+
+        conn.commit()
+        print("Migration v14 (price_movements) completed")
+
+
+# =============================================================================
+# v15: 巡回ページのフィンガープリント
+# =============================================================================
+
+def migrate_v15_crawl_page_fingerprints():
+    """v15: 巡回ページごとのフィンガープリント（ETag/Last-Modified・商品リストのハッシュ）テーブル追加"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_page_fingerprints (
+                shop_id INTEGER NOT NULL,
+                mode TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                item_count INTEGER DEFAULT 0,
+                total_pages INTEGER,
+                ingested_at TEXT,
+                checked_at TEXT,
+                PRIMARY KEY (shop_id, mode, page),
+                FOREIGN KEY (shop_id) REFERENCES shops(id)
+            )
+        """)
+
+        conn.commit()
+        print("Migration v15 (crawl_page_fingerprints) completed")
+
+
+# =============================================================================
+# v16: カード番号・基本名の抽出ルールバージョンとバックフィルのチェックポイント
+# =============================================================================
+
+def migrate_v16_card_identity_version():
+    """v16: cards.identity_version（抽出ルールのバージョン）とバックフィルのチェックポイントテーブル追加"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("ALTER TABLE cards ADD COLUMN identity_version INTEGER")
+        except sqlite3.OperationalError:
+            pass  # 既に存在
+
+        # カード名が変わったら再抽出の対象に戻す
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS cards_identity_au AFTER UPDATE OF name ON cards BEGIN
+                UPDATE cards SET identity_version = NULL WHERE id = new.id;
+            END
+        """)
+
+        # バックフィルの進捗（中断したところから再開する）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+                job TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL DEFAULT 0,
+                rules_version INTEGER,
+                processed INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        conn.commit()
+        print("Migration v16 (card_identity_version) completed")
+
+
+def migrate_v17_data_versions():
+    """v17: データ世代番号（data_generation）とカードごとの更新番号（card_versions）テーブル追加"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        # データ世代番号（1行だけ）。save_batch_logで進める
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS data_generation (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                generation INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # 以前の世代番号（batch_logsの最新ID）から続ける
+        cursor.execute("""
+            INSERT OR IGNORE INTO data_generation (id, generation)
+            SELECT 1, COALESCE(MAX(id), 0) FROM batch_logs
+        """)
+
+        # カードごとの更新番号（カード詳細のETag用）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS card_versions (
+                card_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+        # 最新価格が変わったカード
+        for event, row in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS card_versions_latest_prices_{event.lower()}
+                AFTER {event} ON latest_prices BEGIN
+                    INSERT INTO card_versions (card_id, version) VALUES ({row}.card_id, 1)
+                    ON CONFLICT(card_id) DO UPDATE SET version = version + 1;
+                END
+            """)
+
+        # グループのメンバーが変わったら、そのグループの全カード
+        for event, row in (("INSERT", "new"), ("DELETE", "old")):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS card_versions_group_members_{event.lower()}
+                AFTER {event} ON card_group_members BEGIN
+                    INSERT INTO card_versions (card_id, version)
+                    SELECT card_id, 1 FROM card_group_members WHERE group_id = {row}.group_id
+                    ON CONFLICT(card_id) DO UPDATE SET version = version + 1;
+                    INSERT INTO card_versions (card_id, version) VALUES ({row}.card_id, 1)
+                    ON CONFLICT(card_id) DO UPDATE SET version = version + 1;
+                END
+            """)
+
+        # カードが増えた・番号や基本名が変わったら、同じ番号・基本名のカード（統合・関連カードが変わる）
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS card_versions_cards_insert AFTER INSERT ON cards BEGIN
+                INSERT INTO card_versions (card_id, version)
+                SELECT id, 1 FROM cards
+                WHERE extracted_card_no = new.extracted_card_no OR base_name = new.base_name
+                ON CONFLICT(card_id) DO UPDATE SET version = version + 1;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS card_versions_cards_update
+            AFTER UPDATE OF extracted_card_no, base_name ON cards BEGIN
+                INSERT INTO card_versions (card_id, version)
+                SELECT id, 1 FROM cards
+                WHERE id = new.id
+                   OR extracted_card_no IN (old.extracted_card_no, new.extracted_card_no)
+                   OR base_name IN (old.base_name, new.base_name)
+                ON CONFLICT(card_id) DO UPDATE SET version = version + 1;
+            END
+        """)
+
+        conn.commit()
+        print("Migration v17 (data_versions) completed")
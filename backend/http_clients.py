@@ -0,0 +1,113 @@
+"""
+プロセス共通のHTTPクライアント管理
+
+ショップごと（ホストごと）にhttpxクライアントを1つだけ作り、スクレイパー・クローラー・
+画像プロキシで使い回す。同じショップへの連続リクエストでTLS接続を再利用できる
+
+- ホストごとの同時接続数を HTTP_MAX_CONNECTIONS_PER_HOST で制限
+- keep-alive接続は HTTP_KEEPALIVE_EXPIRY 秒まで保持
+- HTTP_ENABLE_HTTP2=1 かつ h2 パッケージがあればHTTP/2を使用
+
+使い方:
+    client = get_client("https://tier-one.jp")          # 同期（httpx.Client）
+    client = get_async_client("https://tier-one.jp")    # 非同期（httpx.AsyncClient）
+
+取得したクライアントは共有物なので呼び出し側で close しないこと。
+プロセス終了時に close_http_clients() / aclose_http_clients() でまとめて閉じる
+"""
+import asyncio
+import os
+import threading
+from urllib.parse import urlparse
+
+import httpx
+
+# ホストごとの最大同時接続数
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.environ.get("HTTP_MAX_CONNECTIONS_PER_HOST", "4"))
+# keep-alive接続の保持秒数
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "30"))
+# HTTP/2を有効にするか（h2パッケージが必要）
+HTTP_ENABLE_HTTP2 = os.environ.get("HTTP_ENABLE_HTTP2", "0") == "1"
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
+_lock = threading.Lock()
+_sync_clients: dict[str, httpx.Client] = {}
+# ホスト -> (イベントループ, クライアント)。AsyncClientは作成したループでしか使えない
+_async_clients: dict[str, tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+
+def _host_key(url: str) -> str:
+    """URL（またはホスト名）からレジストリのキーを作る"""
+    netloc = urlparse(url).netloc
+    return (netloc or url).lower()
+
+
+def _http2_enabled() -> bool:
+    if not HTTP_ENABLE_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _client_options() -> dict:
+    return {
+        "timeout": DEFAULT_TIMEOUT,
+        "headers": DEFAULT_HEADERS,
+        "follow_redirects": True,
+        "http2": _http2_enabled(),
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    }
+
+
+def get_client(url: str) -> httpx.Client:
+    """ホスト共通の同期クライアントを取得（スレッド間で共有可）"""
+    key = _host_key(url)
+    with _lock:
+        client = _sync_clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.Client(**_client_options())
+            _sync_clients[key] = client
+        return client
+
+
+def get_async_client(url: str) -> httpx.AsyncClient:
+    """ホスト共通の非同期クライアントを取得（実行中のイベントループごと）"""
+    key = _host_key(url)
+    loop = asyncio.get_running_loop()
+    with _lock:
+        entry = _async_clients.get(key)
+        if entry is None or entry[0] is not loop or entry[1].is_closed:
+            # 別のループで作られたクライアントは使えないので作り直す
+            entry = (loop, httpx.AsyncClient(**_client_options()))
+            _async_clients[key] = entry
+        return entry[1]
+
+
+def close_http_clients():
+    """同期クライアントをすべて閉じる"""
+    with _lock:
+        clients = list(_sync_clients.values())
+        _sync_clients.clear()
+    for client in clients:
+        client.close()
+
+
+async def aclose_http_clients():
+    """現在のイベントループの非同期クライアントをすべて閉じる"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        keys = [key for key, (client_loop, _) in _async_clients.items() if client_loop is loop]
+        clients = [_async_clients.pop(key)[1] for key in keys]
+    for client in clients:
+        await client.aclose()
@@ -0,0 +1,352 @@
+"""
+画像プロキシ（/api/image-proxy）のディスクキャッシュ
+
+ホットリンク対策のあるショップの画像を毎回取りに行かないよう、取得した画像をディスクに保存して
+そこから配信する
+
+- 画像は内容のSHA-256をファイル名にして保存（内容が同じなら別URLでも1ファイル）。
+  ハッシュはそのまま強いETagとして使える
+- URLごとのメタデータ（ハッシュ・Content-Type・取得日時）は urls/ 以下のJSONに保存し、
+  再起動時に読み込み直す
+- 合計サイズが IMAGE_CACHE_MAX_BYTES を超えたら最後に使われたのが古い順に削除（LRU）
+- IMAGE_CACHE_TTL を過ぎた画像は取得し直す（取得に失敗したら古い画像を返す）
+- 同じURLのキャッシュミスが同時に発生しても取得は1回だけ（他のリクエストは結果を待つ）
+- ファイルの読み書き（インデックスの読み込み・画像の保存）はスレッドで行い、イベントループを止めない
+- 使われた日時（メタデータの更新日時、再起動後のLRUの順序に使う）はメモリに溜めておき、
+  画像の保存時か IMAGE_CACHE_TOUCH_INTERVAL ごとにスレッドでまとめて書き込む
+
+使い方:
+    entry = await image_cache.fetch(url, headers={"Referer": ...})
+    return FileResponse(entry.path, media_type=entry.content_type, headers={"ETag": entry.etag})
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+import anyio
+import httpx
+
+from http_clients import get_async_client
+
+# キャッシュの保存先
+IMAGE_CACHE_DIR = Path(os.environ.get("IMAGE_CACHE_DIR", Path(__file__).parent / "image_cache"))
+# キャッシュ全体の上限サイズ（バイト）
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get("IMAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# 取得し直すまでの秒数
+IMAGE_CACHE_TTL = float(os.environ.get("IMAGE_CACHE_TTL", str(7 * 24 * 3600)))
+# ブラウザにキャッシュさせる秒数（Cache-Control: max-age）
+IMAGE_CACHE_MAX_AGE = int(os.environ.get("IMAGE_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+# 1枚あたりの上限サイズ（これより大きい画像は保存しない）
+IMAGE_MAX_BYTES = 10 * 1024 * 1024
+# 使われた日時をディスクに書き込む間隔（秒）
+IMAGE_CACHE_TOUCH_INTERVAL = 60.0
+
+FETCH_TIMEOUT = 10.0
+
+
+class ImageFetchError(Exception):
+    """画像を取得できなかった（status_code: 呼び出し側で返すHTTPステータス）"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class CachedImage:
+    """キャッシュ済みの画像1件"""
+    url: str
+    digest: str  # 内容のSHA-256
+    content_type: str
+    size: int
+    fetched_at: float
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest}"'
+
+    @property
+    def path(self) -> Path:
+        return _blob_path(self.digest)
+
+    def is_expired(self, ttl: float = IMAGE_CACHE_TTL) -> bool:
+        return time.time() - self.fetched_at > ttl
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _blob_path(digest: str) -> Path:
+    return IMAGE_CACHE_DIR / "blobs" / digest[:2] / digest
+
+
+def _meta_path(url: str) -> Path:
+    key = _url_key(url)
+    return IMAGE_CACHE_DIR / "urls" / key[:2] / f"{key}.json"
+
+
+class ImageCache:
+    """画像のディスクキャッシュ（LRU・TTL・同一URLの取得をまとめる）"""
+
+    def __init__(self, max_bytes: int = IMAGE_CACHE_MAX_BYTES, ttl: float = IMAGE_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # URL -> CachedImage（末尾ほど最近使われた）
+        self._entries: OrderedDict[str, CachedImage] = OrderedDict()
+        # 内容のハッシュ -> 参照しているURL数
+        self._refs: dict[str, int] = {}
+        self._total_bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        # 前回の書き込み以降に使われたURL（使われた日時はまとめて書き込む）
+        self._touched: set[str] = set()
+        self._touched_flushed_at = time.monotonic()
+        # URL -> 取得中のタスク
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._stale_served = 0
+        self._evictions = 0
+
+    # -------------------------------------------------------------------------
+    # 取得
+    # -------------------------------------------------------------------------
+
+    async def fetch(self, url: str, headers: dict = None) -> CachedImage:
+        """
+        キャッシュ済みの画像を返す（なければ・期限切れなら取得して保存）
+
+        Raises:
+            ImageFetchError: 取得できず、古い画像もない
+        """
+        if not self._loaded:
+            await anyio.to_thread.run_sync(self._ensure_loaded)
+        entry = self._lookup(url)
+        if entry is not None and not entry.is_expired(self.ttl):
+            self._count("_hits")
+            if time.monotonic() - self._touched_flushed_at >= IMAGE_CACHE_TOUCH_INTERVAL:
+                await anyio.to_thread.run_sync(self.flush_touched)
+            return entry
+
+        task = self._inflight.get(url)
+        if task is None:
+            self._count("_misses")
+            task = asyncio.ensure_future(self._download(url, headers))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        else:
+            self._count("_coalesced")
+
+        try:
+            # 待っているリクエストが切断されても取得自体は続ける
+            return await asyncio.shield(task)
+        except ImageFetchError:
+            if entry is not None and await anyio.to_thread.run_sync(entry.path.exists):
+                self._count("_stale_served")
+                return entry
+            raise
+
+    async def _download(self, url: str, headers: dict = None) -> CachedImage:
+        """取得して（IMAGE_MAX_BYTES まではメモリに溜める）、保存はスレッドで行う"""
+        chunks = []
+        size = 0
+        try:
+            client = get_async_client(url)
+            async with client.stream("GET", url, headers=headers, timeout=FETCH_TIMEOUT) as response:
+                if response.status_code != 200:
+                    raise ImageFetchError(404, "Image not found")
+                content_type = response.headers.get("content-type", "image/jpeg")
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > IMAGE_MAX_BYTES:
+                        raise ImageFetchError(502, "Image too large")
+                    chunks.append(chunk)
+        except httpx.RequestError:
+            raise ImageFetchError(502, "Failed to fetch image")
+
+        return await anyio.to_thread.run_sync(self._save, url, chunks, content_type)
+
+    def _save(self, url: str, chunks: list[bytes], content_type: str) -> CachedImage:
+        """一時ファイルに書きながらハッシュを計算し、ハッシュ名のファイルに移してインデックスに追加"""
+        blob_dir = IMAGE_CACHE_DIR / "blobs"
+        blob_dir.mkdir(parents=True, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=blob_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    size += len(chunk)
+                    hasher.update(chunk)
+                    f.write(chunk)
+
+            digest = hasher.hexdigest()
+            blob = _blob_path(digest)
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_name, blob)
+        finally:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+
+        entry = CachedImage(url=url, digest=digest, content_type=content_type, size=size, fetched_at=time.time())
+        self._store(entry)
+        # スレッドで動いているので、ついでに溜まっている使われた日時も書き込む
+        self.flush_touched()
+        return entry
+
+    # -------------------------------------------------------------------------
+    # インデックス
+    # -------------------------------------------------------------------------
+
+    def _lookup(self, url: str) -> Optional[CachedImage]:
+        """インデックスを引く（ファイルには触らない。使われた日時は flush_touched で書き込む）"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            self._entries.move_to_end(url)
+            self._touched.add(url)
+        return entry
+
+    def flush_touched(self):
+        """
+        溜まっている使われた日時をメタデータの更新日時に書き込む（スレッド・終了時に呼ぶ）
+
+        再起動後もLRUの順序が分かるようにするためのもので、書き込む前に落ちても順序が少しずれるだけ
+        """
+        with self._lock:
+            touched, self._touched = self._touched, set()
+            self._touched_flushed_at = time.monotonic()
+        for url in touched:
+            try:
+                os.utime(_meta_path(url))
+            except OSError:
+                pass
+
+    def _store(self, entry: CachedImage):
+        meta = _meta_path(entry.url)
+        meta.parent.mkdir(parents=True, exist_ok=True)
+        tmp = meta.with_suffix(".tmp")
+        tmp.write_text(json.dumps(asdict(entry)), encoding="utf-8")
+        os.replace(tmp, meta)
+
+        with self._lock:
+            old = self._entries.pop(entry.url, None)
+            orphaned = old is not None and self._release(old) and old.digest != entry.digest
+            self._add(entry)
+            evicted = self._evict()
+        if orphaned:
+            # 取得し直して内容が変わった場合、古い画像ファイルは参照されなくなる
+            old.path.unlink(missing_ok=True)
+        self._delete_files(evicted)
+
+    def _add(self, entry: CachedImage):
+        """インデックスに追加（self._lock を取得して呼ぶ）"""
+        self._entries[entry.url] = entry
+        if self._refs.get(entry.digest, 0) == 0:
+            self._total_bytes += entry.size
+        self._refs[entry.digest] = self._refs.get(entry.digest, 0) + 1
+
+    def _release(self, entry: CachedImage) -> bool:
+        """インデックスから外す。内容を参照するURLがなくなったら True（self._lock を取得して呼ぶ）"""
+        refs = self._refs.get(entry.digest, 0) - 1
+        if refs > 0:
+            self._refs[entry.digest] = refs
+            return False
+        self._refs.pop(entry.digest, None)
+        self._total_bytes -= entry.size
+        return True
+
+    def _evict(self) -> list[tuple[CachedImage, bool]]:
+        """上限サイズを超えた分を古い順に外す → [(エントリ, 画像ファイルも消すか)]（self._lock を取得して呼ぶ）"""
+        evicted = []
+        # 最後の1件（今追加したもの）は残す
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            evicted.append((entry, self._release(entry)))
+            self._evictions += 1
+        return evicted
+
+    def _delete_files(self, evicted: list[tuple[CachedImage, bool]]):
+        for entry, delete_blob in evicted:
+            paths = [_meta_path(entry.url)] + ([entry.path] if delete_blob else [])
+            for path in paths:
+                path.unlink(missing_ok=True)
+
+    def load(self):
+        """ディスク上のメタデータを読み込む（起動時にスレッドで呼ぶ。済んでいれば何もしない）"""
+        self._ensure_loaded()
+
+    def _ensure_loaded(self):
+        """初回だけディスク上のメタデータを読み込む（使われた日時の古い順に並べる）"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            loaded = []
+            for meta in (IMAGE_CACHE_DIR / "urls").glob("*/*.json"):
+                try:
+                    entry = CachedImage(**json.loads(meta.read_text(encoding="utf-8")))
+                    used_at = meta.stat().st_mtime
+                except (OSError, ValueError, TypeError):
+                    continue
+                if entry.path.exists():
+                    loaded.append((used_at, entry))
+            loaded.sort(key=lambda item: item[0])
+            for _, entry in loaded:
+                self._add(entry)
+            evicted = self._evict()
+            self._loaded = True
+        self._delete_files(evicted)
+
+    # -------------------------------------------------------------------------
+    # 管理
+    # -------------------------------------------------------------------------
+
+    def clear(self):
+        """キャッシュを全て削除"""
+        with self._lock:
+            evicted = [(entry, True) for entry in self._entries.values()]
+            self._entries.clear()
+            self._refs.clear()
+            self._touched.clear()
+            self._total_bytes = 0
+            self._loaded = True
+        self._delete_files(evicted)
+
+    def stats(self) -> dict:
+        """ヒット/ミス数などの統計"""
+        with self._lock:
+            total = self._hits + self._misses + self._coalesced
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "hit_rate": round(self._hits / total, 3) if total else None,
+                "stale_served": self._stale_served,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "inflight": len(self._inflight),
+            }
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+# プロセス共通のキャッシュ
+image_cache = ImageCache()
@@ -0,0 +1,119 @@
+"""
+バックグラウンドジョブ管理
+
+管理画面から起動される長時間処理（人気キーワードの価格更新など）を
+リクエストとは別スレッドで実行し、状態をポーリングで確認できるようにする
+
+- ジョブは1本ずつ順番に実行（Seleniumドライバを共有しているため）
+- 状態はプロセス内のメモリにのみ保持（再起動で消える）
+"""
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+# 保持するジョブ履歴の上限（古い完了済みジョブから削除）
+MAX_JOB_HISTORY = 50
+
+
+@dataclass
+class Job:
+    """バックグラウンドジョブ"""
+    id: str
+    name: str
+    status: str = "queued"  # queued, running, success, failed
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class JobRunner:
+    """ジョブを単一ワーカースレッドで順番に実行する"""
+
+    def __init__(self, max_workers: int = 1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, func: Callable[..., Any], *args, **kwargs) -> Job:
+        """ジョブを登録して実行キューに入れる"""
+        job = Job(id=uuid.uuid4().hex, name=name, created_at=_now())
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def submit_unique(self, name: str, func: Callable[..., Any], *args, **kwargs) -> Job:
+        """同名の未完了ジョブがあればそれを返し、なければ登録する（確認と登録を同じロック内で行う）"""
+        with self._lock:
+            job = self._find_active(name)
+            if job is not None:
+                return job
+            job = Job(id=uuid.uuid4().hex, name=name, created_at=_now())
+            self._jobs[job.id] = job
+            self._prune()
+            self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """ジョブを取得"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list[Job]:
+        """ジョブ一覧を取得（新しい順）"""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def find_active(self, name: str) -> Optional[Job]:
+        """同名の未完了ジョブを取得（二重起動防止用）"""
+        with self._lock:
+            return self._find_active(name)
+
+    def shutdown(self):
+        """未開始のジョブを破棄してワーカーを停止"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: Job, func: Callable[..., Any], args: tuple, kwargs: dict):
+        job.status = "running"
+        job.started_at = _now()
+        try:
+            job.result = func(*args, **kwargs)
+            job.status = "success"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = _now()
+
+    def _find_active(self, name: str) -> Optional[Job]:
+        """self._lock を取得して呼ぶ"""
+        for job in self._jobs.values():
+            if job.name == name and job.status in ("queued", "running"):
+                return job
+        return None
+
+    def _prune(self):
+        # 上限を超えたら完了済みの古いジョブから削除
+        overflow = len(self._jobs) - MAX_JOB_HISTORY
+        if overflow <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.status in ("success", "failed")][:overflow]:
+            del self._jobs[job_id]
+
+
+# アプリ全体で共有するジョブランナー
+job_runner = JobRunner()
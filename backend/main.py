@@ -6,18 +6,26 @@
 - 2026/01/27: リダイレクトAPI追加（クリック計測）
 - 2026/01/27: DB参照方式に変更（スクレイピング廃止）
 - 旧実装は main_old.py に保存
+
+実行モデル:
+- DBアクセスなど同期処理を行うルートは通常の def で定義し、
+  FastAPIのスレッドプール（上限 API_THREADPOOL_SIZE）で実行する
+- イベントループ上（async def）では await する処理のみ行う
+- スクレイピングなどの長時間処理は jobs.job_runner でバックグラウンド実行し、
+  /api/admin/jobs/{job_id} で状態を確認する
 """
+import os
 import secrets
 import time
 import re
 from pathlib import Path
 from urllib.parse import unquote
-from fastapi import FastAPI, Query, Depends, HTTPException, status, UploadFile, File as FastAPIFile
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, BackgroundTasks, Request, Query, Header, Depends, HTTPException, status, UploadFile, File as FastAPIFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse, RedirectResponse, Response
 from pydantic import BaseModel
-import httpx
-from typing import Optional
+import anyio
+from typing import Any, Callable, Optional
 
 # キーワードファイルのパス
 KEYWORDS_FILE = Path(__file__).parent / "keywords.txt"
@@ -61,19 +69,19 @@ from database import (
     migrate_v4_featured_keywords,
     migrate_v5_amazon_products,
     get_connection,
+    close_connection,
     get_all_shops,
-    get_shop_by_name,
     get_latest_prices_by_keyword,
+    count_latest_prices_by_keyword,
     get_recently_updated,
     get_price_increased_cards,
     get_price_decreased_cards,
     get_hot_cards,
     get_database_stats,
-    search_cards,
-    record_search,
-    record_click,
     add_to_fetch_queue,
     get_recent_batch_logs,
+    get_data_generation,
+    get_card_versions,
     # 認証関連
     create_user,
     get_user_by_username,
@@ -90,6 +98,8 @@ from database import (
     get_all_admin_invites,
     get_admin_stats,
     get_card_by_id,
+    get_card_id_by_name,
+    card_exists,
     get_card_all_prices,
     get_card_price_history,
     get_unified_card_prices,
@@ -100,7 +110,6 @@ from database import (
     remove_card_from_group,
     delete_card_group,
     migrate_v7_card_groups,
-    update_card_numbers,
     get_or_create_card_v2,
     update_popular_cards,
     # 人気キーワード関連
@@ -148,6 +157,18 @@ from database import (
     create_article,
     update_article,
     delete_article,
+    # 最新価格テーブル
+    migrate_v12_latest_prices,
+    # カード名全文検索
+    migrate_v13_cards_fts,
+    # 値動きテーブル
+    migrate_v14_price_movements,
+    # 巡回ページのフィンガープリント
+    migrate_v15_crawl_page_fingerprints,
+    # カード番号抽出ルールのバージョン
+    migrate_v16_card_identity_version,
+    # データ世代番号・カードごとの更新番号
+    migrate_v17_data_versions,
 )
 
 from auth import (
@@ -163,17 +184,77 @@ from auth import (
     Token,
 )
 from models import User
+from jobs import job_runner
+from http_clients import aclose_http_clients
+from cache import TTLCache, API_CACHE_TTL, CardDetailCache, JSONPayload
+from image_cache import image_cache, ImageFetchError, IMAGE_CACHE_MAX_AGE
+from activity_log import activity_log
+from static_assets import PrecompressedStaticFiles
+
+# 同期ルートを実行するスレッドプールの上限
+API_THREADPOOL_SIZE = int(os.environ.get("API_THREADPOOL_SIZE", "16"))
 
 app = FastAPI(title="カード価格比較API")
 
+# 集計系API（/api/home, /api/ranking など）のキャッシュ
+# バッチ完了（save_batch_log）でデータ世代番号が変わると無効化される
+api_cache = TTLCache(ttl=API_CACHE_TTL, version_func=get_data_generation)
+
+# カード詳細（/api/card/{id}）のキャッシュ。世代番号が変わったらカードごとの更新番号で確認する
+card_detail_cache = CardDetailCache(generation_func=api_cache.current_version, versions_func=get_card_versions)
+
+# 公開APIのCache-Control（データはバッチ完了時にしか変わらないので、短時間はブラウザにキャッシュさせ、
+# 期限切れ後もしばらくは古い内容を表示しながら裏で再検証させる）
+CACHE_CONTROL_HOME = "public, max-age=60, stale-while-revalidate=300"
+CACHE_CONTROL_CARD = "public, max-age=60, stale-while-revalidate=600"
+CACHE_CONTROL_SHOPS = "public, max-age=300, stale-while-revalidate=3600"
+CACHE_CONTROL_SITES = "public, max-age=3600, stale-while-revalidate=86400"
+CACHE_CONTROL_PRODUCTS = "public, max-age=300, stale-while-revalidate=3600"
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match にETagが含まれるか（弱い比較）"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+def _json_response(payload: JSONPayload, if_none_match: Optional[str], cache_control: str) -> Response:
+    """シリアライズ済みのJSONを返す（If-None-Match が一致すれば304）"""
+    headers = {"ETag": payload.etag, "Cache-Control": cache_control}
+    if _etag_matches(if_none_match, payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
+def _cached_json_response(key: str, build: Callable[[], Any], if_none_match: Optional[str],
+                          cache_control: str) -> Response:
+    """
+    api_cache のJSONを返す
+
+    有効なキャッシュがあればETag（世代番号・変更回数から作る）を先に比較し、一致すれば集計せずに304。
+    キャッシュがない・期限切れなら作り直し、内容が変わっていなければ同じETagなので304
+    """
+    etag = api_cache.etag(key)
+    if etag is not None and _etag_matches(if_none_match, etag):
+        api_cache.count_not_modified()
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    return _json_response(api_cache.get_payload(key, build), if_none_match, cache_control)
+
 # フロントエンドの静的ファイルを配信
+# static_assets.py でビルド済みなら圧縮済み・ハッシュ付きのファイルを返す
 frontend_path = Path(__file__).parent.parent / "frontend"
-app.mount("/static", StaticFiles(directory=frontend_path), name="static")
+static_files = PrecompressedStaticFiles(directory=frontend_path)
+app.mount("/static", static_files, name="static")
 
 
 @app.on_event("startup")
 async def startup():
     """アプリ起動時にDB初期化"""
+    # 同期ルート用スレッドプールの同時実行数を制限
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+
     init_database()
     migrate_v2()  # v2マイグレーション実行
     migrate_v3_auth()  # v3認証マイグレーション実行
@@ -182,106 +263,132 @@ async def startup():
     migrate_v8_notifications()  # v8通知機能マイグレーション実行
     migrate_v9_x_post_queue()  # v9 X投稿キューマイグレーション実行
     migrate_v11_articles()  # v11 ブログ記事マイグレーション実行
+    migrate_v12_latest_prices()  # v12 最新価格テーブルマイグレーション実行
+    migrate_v13_cards_fts()  # v13 カード名全文検索マイグレーション実行
+    migrate_v14_price_movements()  # v14 値動きテーブルマイグレーション実行
+    migrate_v15_crawl_page_fingerprints()  # v15 巡回ページフィンガープリントマイグレーション実行
+    migrate_v16_card_identity_version()  # v16 カード番号抽出ルールバージョンマイグレーション実行
+    migrate_v17_data_versions()  # v17 データ世代番号・カード更新番号マイグレーション実行
     init_shops()
     # ブログ画像アップロードディレクトリ作成
     (frontend_path / "uploads" / "blog").mkdir(parents=True, exist_ok=True)
+    # 画像キャッシュのインデックスを読み込む（初回の画像リクエストで読み込まないように）
+    await run_in_threadpool(image_cache.load)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """アプリ終了時にジョブランナー・HTTPクライアント・DBコネクションを閉じる"""
+    job_runner.shutdown()
+    # 溜まっている検索ログ・クリックを書き込む
+    activity_log.shutdown()
+    # 画像キャッシュの使われた日時を書き込む
+    await run_in_threadpool(image_cache.flush_touched)
+    await aclose_http_clients()
+    close_connection()
 
 
 @app.get("/")
-async def root():
+def root(request: Request):
     """フロントエンドのindex.htmlを返す"""
-    return FileResponse(frontend_path / "index.html")
+    return static_files.page(request, "index.html")
 
 
 @app.get("/login")
-async def login_page():
+def login_page(request: Request):
     """ログインページを返す"""
-    return FileResponse(frontend_path / "login.html")
+    return static_files.page(request, "login.html")
 
 
 @app.get("/admin")
-async def admin_page():
+def admin_page(request: Request):
     """管理者ページを返す"""
-    return FileResponse(frontend_path / "admin.html")
+    return static_files.page(request, "admin.html")
 
 
 @app.get("/search")
-async def search_page():
+def search_page(request: Request):
     """検索結果ページを返す"""
-    return FileResponse(frontend_path / "search.html")
+    return static_files.page(request, "search.html")
 
 
 @app.get("/privacy")
-async def privacy_page():
+def privacy_page(request: Request):
     """プライバシーポリシーページを返す"""
-    return FileResponse(frontend_path / "privacy.html")
+    return static_files.page(request, "privacy.html")
 
 
 @app.get("/about")
-async def about_page():
+def about_page(request: Request):
     """このサイトについてページを返す"""
-    return FileResponse(frontend_path / "about.html")
+    return static_files.page(request, "about.html")
 
 
 @app.get("/ranking")
-async def ranking_page():
+def ranking_page(request: Request):
     """ランキングページを返す"""
-    return FileResponse(frontend_path / "ranking.html")
+    return static_files.page(request, "ranking.html")
 
 
 @app.get("/shops")
-async def shops_page():
+def shops_page(request: Request):
     """ショップ一覧ページを返す"""
-    return FileResponse(frontend_path / "shops.html")
+    return static_files.page(request, "shops.html")
 
 
 @app.get("/favorites")
-async def favorites_page():
+def favorites_page(request: Request):
     """お気に入りページを返す"""
-    return FileResponse(frontend_path / "favorites.html")
+    return static_files.page(request, "favorites.html")
 
 
 @app.get("/card/{card_id}")
-async def card_page(card_id: int):
+def card_page(request: Request, card_id: int):
     """カード詳細ページを返す"""
-    return FileResponse(frontend_path / "card.html")
+    return static_files.page(request, "card.html")
 
 
 @app.get("/blog")
-async def blog_page():
+def blog_page(request: Request):
     """ブログ一覧ページを返す"""
-    return FileResponse(frontend_path / "blog.html")
+    return static_files.page(request, "blog.html")
 
 
 @app.get("/blog/{slug}")
-async def article_page(slug: str):
+def article_page(request: Request, slug: str):
     """記事詳細ページを返す"""
-    return FileResponse(frontend_path / "article.html")
+    return static_files.page(request, "article.html")
 
 
 @app.get("/robots.txt")
-async def robots_txt():
+def robots_txt(request: Request):
     """robots.txtを返す"""
-    return FileResponse(frontend_path / "robots.txt", media_type="text/plain")
+    return static_files.page(request, "robots.txt", media_type="text/plain")
 
 
 @app.get("/ads.txt")
-async def ads_txt():
+def ads_txt(request: Request):
     """ads.txtを返す"""
-    return FileResponse(frontend_path / "ads.txt", media_type="text/plain")
+    return static_files.page(request, "ads.txt", media_type="text/plain")
 
 
 @app.get("/sitemap.xml")
-async def sitemap_xml():
+def sitemap_xml(request: Request):
     """sitemap.xmlを返す"""
-    return FileResponse(frontend_path / "sitemap.xml", media_type="application/xml")
+    return static_files.page(request, "sitemap.xml", media_type="application/xml")
 
 
 @app.get("/api/image-proxy")
-async def image_proxy(url: str = Query(..., description="画像URL")):
+async def image_proxy(
+    url: str = Query(..., description="画像URL"),
+    if_none_match: Optional[str] = Header(None),
+):
     """
     外部サイトの画像をプロキシして返す
     ホットリンク対策されているサイト（ホビステなど）の画像を表示するため
+
+    取得した画像はディスクにキャッシュし（image_cache.py）、ファイルからそのまま返す。
+    ETagは画像内容のハッシュなので、If-None-Match が一致すれば304を返す
     """
     # 許可するドメインのみプロキシ
     allowed_domains = [
@@ -294,25 +401,23 @@ async def image_proxy(url: str = Query(..., description="画像URL")):
     if parsed.netloc not in allowed_domains:
         raise HTTPException(status_code=400, detail="Domain not allowed")
 
-    # リファラーを付けて画像を取得
+    # リファラーを付けて画像を取得（同じURLの同時取得は1回にまとめられる）
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                url,
-                headers={"Referer": f"https://{parsed.netloc}/"},
-                timeout=10.0
-            )
-            if response.status_code != 200:
-                raise HTTPException(status_code=404, detail="Image not found")
+        entry = await image_cache.fetch(url, headers={"Referer": f"https://{parsed.netloc}/"})
+    except ImageFetchError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
 
-            content_type = response.headers.get("content-type", "image/jpeg")
-            return Response(content=response.content, media_type=content_type)
-    except httpx.RequestError:
-        raise HTTPException(status_code=502, detail="Failed to fetch image")
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": f"public, max-age={IMAGE_CACHE_MAX_AGE}",
+    }
+    if _etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(entry.path, media_type=entry.content_type, headers=headers)
 
 
 @app.get("/api/search")
-async def search(
+def search(
     keyword: str = Query(..., min_length=1, description="検索キーワード"),
     page: int = Query(1, ge=1, description="ページ番号"),
     per_page: int = Query(20, ge=1, le=100, description="1ページあたりの件数"),
@@ -328,44 +433,32 @@ async def search(
     - sort: ソート順（price-asc, price-desc, site）
     - stock: 在庫フィルター（all, in-stock, out-of-stock）
     """
-    # DBから最新価格を取得（全件取得してからフィルタ・ソート）
-    prices = get_latest_prices_by_keyword(keyword, limit=500)
+    # 総件数（在庫フィルター適用後）
+    total_count = count_latest_prices_by_keyword(keyword, stock=stock)
+    total_pages = (total_count + per_page - 1) // per_page
 
     # 検索ログを記録（初回ページのみ）
     if page == 1:
-        record_search(keyword, len(prices))
+        # ヒット件数は在庫フィルター前の件数で記録
+        hit_count = total_count if stock == "all" else count_latest_prices_by_keyword(keyword)
+        # DBへの書き込みはまとめて後で行う（activity_log.py）
+        activity_log.record_search(keyword, hit_count)
 
         # 結果が少なければキーワードを自動追加（次回バッチで取得される）
-        if len(prices) < 5:
+        if hit_count < 5:
             add_keyword_if_new(keyword)
             # キューにも追加（batch_queue.pyで処理される）
             add_to_fetch_queue(keyword, source='search', priority=0)
 
-    # フラット化してリストに変換
-    all_items = [price.to_dict() for price in prices]
-
-    # 在庫フィルター
-    if stock == "in-stock":
-        all_items = [item for item in all_items if item.get("stock", 0) > 0]
-    elif stock == "out-of-stock":
-        all_items = [item for item in all_items if item.get("stock", 0) == 0]
-
-    # ソート
-    if sort == "price-asc":
-        all_items.sort(key=lambda x: x.get("price", 0))
-    elif sort == "price-desc":
-        all_items.sort(key=lambda x: x.get("price", 0), reverse=True)
-    elif sort == "site":
-        all_items.sort(key=lambda x: x.get("site", ""))
-
-    # 総件数
-    total_count = len(all_items)
-    total_pages = (total_count + per_page - 1) // per_page
-
-    # ページネーション
-    start = (page - 1) * per_page
-    end = start + per_page
-    paginated_items = all_items[start:end]
+    # 在庫フィルター・ソート・ページネーションはSQL側で実行
+    prices = get_latest_prices_by_keyword(
+        keyword,
+        limit=per_page,
+        offset=(page - 1) * per_page,
+        sort=sort,
+        stock=stock,
+    )
+    paginated_items = [price.to_dict() for price in prices]
 
     return {
         "keyword": keyword,
@@ -380,8 +473,12 @@ async def search(
 
 
 @app.get("/api/sites")
-async def get_sites():
-    """対応サイト一覧を返す（DB参照）"""
+def get_sites(if_none_match: Optional[str] = Header(None)):
+    """対応サイト一覧を返す（DB参照、キャッシュあり）"""
+    return _cached_json_response("sites", _build_sites_data, if_none_match, CACHE_CONTROL_SITES)
+
+
+def _build_sites_data() -> dict:
     shops = get_all_shops()
     return {
         "sites": [
@@ -392,9 +489,9 @@ async def get_sites():
 
 
 @app.get("/api/home")
-async def get_home_data():
+def get_home_data(if_none_match: Optional[str] = Header(None)):
     """
-    ホーム画面用データを取得
+    ホーム画面用データを取得（キャッシュあり）
 
     - recently_updated: 最近価格更新されたカード
     - price_up: 値上がりしたカード
@@ -404,6 +501,11 @@ async def get_home_data():
     - batch_logs: 最近のバッチ実行結果
     - featured_keywords: 管理者設定の人気キーワード
     """
+    return _cached_json_response("home", _build_home_data, if_none_match, CACHE_CONTROL_HOME)
+
+
+def _build_home_data() -> dict:
+    """ホーム画面用データを集計"""
     # 最近更新されたカード
     recently_updated = get_recently_updated(limit=10)
     recently_updated_list = [p.to_dict() for p in recently_updated]
@@ -443,10 +545,15 @@ async def get_home_data():
 
 
 @app.get("/api/ranking")
-async def get_ranking_data():
+def get_ranking_data(if_none_match: Optional[str] = Header(None)):
     """
-    ランキングページ用データを取得
+    ランキングページ用データを取得（キャッシュあり）
     """
+    return _cached_json_response("ranking", _build_ranking_data, if_none_match, CACHE_CONTROL_HOME)
+
+
+def _build_ranking_data() -> dict:
+    """ランキングページ用データを集計"""
     # 人気検索キーワード（過去30日）
     keyword_ranking = get_keyword_ranking(days=30, limit=30)
 
@@ -468,10 +575,15 @@ async def get_ranking_data():
 
 
 @app.get("/api/shops")
-async def get_shops_data():
+def get_shops_data(if_none_match: Optional[str] = Header(None)):
     """
-    ショップ一覧ページ用データを取得
+    ショップ一覧ページ用データを取得（キャッシュあり）
     """
+    return _cached_json_response("shops", _build_shops_data, if_none_match, CACHE_CONTROL_SHOPS)
+
+
+def _build_shops_data() -> dict:
+    """ショップ一覧ページ用データを集計"""
     shops = get_all_shops(active_only=True)
 
     # ショップ情報に追加データを付与
@@ -491,16 +603,24 @@ async def get_shops_data():
 
 
 @app.get("/api/card/{card_id}")
-async def get_card_detail(card_id: int):
+def get_card_detail(card_id: int, if_none_match: Optional[str] = Header(None)):
     """
-    カード詳細情報を取得（カード詳細ページ用）
+    カード詳細情報を取得（カード詳細ページ用、キャッシュあり）
     - 同じカード番号を持つカードの価格を統合
     - リバイバル/旧版などの関連カードを表示
     """
+    payload = card_detail_cache.get_or_compute(card_id, lambda: _build_card_detail(card_id))
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Card not found")
+    return _json_response(payload, if_none_match, CACHE_CONTROL_CARD)
+
+
+def _build_card_detail(card_id: int) -> Optional[tuple[dict, list[int]]]:
+    """カード詳細を集計 → (レスポンス, 内容に含まれるカードID)。カードがなければ None"""
     # 統合された価格情報を取得
     unified = get_unified_card_prices(card_id)
     if not unified:
-        raise HTTPException(status_code=404, detail="Card not found")
+        return None
 
     card = unified['card']
     prices = unified['prices']
@@ -511,7 +631,7 @@ async def get_card_detail(card_id: int):
     # 関連カード（リバイバル/旧版）を取得
     related_cards = get_related_cards(card_id, unified.get('base_name'))
 
-    return {
+    detail = {
         "card": card,
         "card_no": unified.get('card_no'),
         "base_name": unified.get('base_name'),
@@ -522,46 +642,54 @@ async def get_card_detail(card_id: int):
         "shop_count": len(set(p.shop_id for p in prices)),
         "related_cards": related_cards,
     }
+    card_ids = sorted(set(unified['related_card_ids']) | {c['id'] for c in related_cards})
+    return detail, card_ids
+
+
+def _shop_ids_by_name() -> dict[str, int]:
+    """ショップ名→ショップID（旧形式のリダイレクトURL用、api_cacheに保持）"""
+    return api_cache.get_or_compute("shop_ids", lambda: {shop.name: shop.id for shop in get_all_shops()})
+
+
+def _record_redirect_click(card_id: Optional[int], shop_id: Optional[int], site: Optional[str], card: Optional[str]):
+    """リダイレクトのクリックを記録（レスポンス送信後に実行）"""
+    # 旧形式のURL（IDなし）は名前からIDを引く
+    if shop_id is None and site:
+        shop_id = _shop_ids_by_name().get(site)
+    if card_id is None and card:
+        card_id = get_card_id_by_name(card)
+    # IDはクライアントから渡されるので、存在しないIDは記録しない
+    elif card_id is not None and not card_exists(card_id):
+        card_id = None
+    if shop_id is not None and shop_id not in _shop_ids_by_name().values():
+        shop_id = None
+
+    # DBへの書き込みはまとめて後で行う。直後の同じクリックは1件として扱う
+    if shop_id or card_id:
+        activity_log.record_click(card_id=card_id, shop_id=shop_id)
 
 
 @app.get("/api/redirect")
-async def redirect_to_shop(
+def redirect_to_shop(
+    background_tasks: BackgroundTasks,
     url: str = Query(..., description="リダイレクト先URL"),
-    site: str = Query(None, description="ショップ名"),
-    card: str = Query(None, description="カード名"),
+    card_id: Optional[int] = Query(None, description="カードID（計測用）"),
+    shop_id: Optional[int] = Query(None, description="ショップID（計測用）"),
+    site: str = Query(None, description="ショップ名（旧形式、shop_idがない場合に使用）"),
+    card: str = Query(None, description="カード名（旧形式、card_idがない場合に使用）"),
 ):
     """
     外部ショップへリダイレクト（クリック計測用）
 
     - url: リダイレクト先の商品ページURL（必須）
-    - site: ショップ名（オプション、計測用）
-    - card: カード名（オプション、計測用）
+    - card_id / shop_id: カードID・ショップID（オプション、計測用）
+    - site / card: ショップ名・カード名（オプション、IDを付けていない古いリンク用）
+
+    クリックの記録はリダイレクトのレスポンスを返した後に行う（DBを参照せずにリダイレクトする）
 
     将来的にアフィリエイトURLへの変換もここで行う
     """
-    # クリック記録
-    card_id = None
-    shop_id = None
-
-    if site:
-        shop = get_shop_by_name(site)
-        if shop:
-            shop_id = shop.id
-
-    if card:
-        cards = search_cards(card)
-        if cards:
-            # 完全一致を優先、なければ最初の結果
-            for c in cards:
-                if c.name == card:
-                    card_id = c.id
-                    break
-            if card_id is None and cards:
-                card_id = cards[0].id
-
-    # クリックをDBに記録
-    if shop_id or card_id:
-        record_click(card_id=card_id, shop_id=shop_id)
+    background_tasks.add_task(_record_redirect_click, card_id, shop_id, site, card)
 
     # URLをデコードしてリダイレクト
     decoded_url = unquote(url)
@@ -577,7 +705,7 @@ async def redirect_to_shop(
 # =============================================================================
 
 @app.post("/api/auth/register", response_model=Token)
-async def register(user_data: UserCreate):
+def register(user_data: UserCreate):
     """
     ユーザー登録
     """
@@ -627,7 +755,7 @@ async def register(user_data: UserCreate):
 
 
 @app.post("/api/auth/login", response_model=Token)
-async def login(login_data: UserLogin):
+def login(login_data: UserLogin):
     """
     ログイン（JWT発行）
     """
@@ -646,7 +774,7 @@ async def login(login_data: UserLogin):
 
 
 @app.get("/api/auth/me")
-async def get_me(current_user: User = Depends(get_current_user_required)):
+def get_me(current_user: User = Depends(get_current_user_required)):
     """
     現在のユーザー情報を取得
     """
@@ -654,7 +782,7 @@ async def get_me(current_user: User = Depends(get_current_user_required)):
 
 
 @app.post("/api/auth/admin-register", response_model=Token)
-async def admin_register(admin_data: AdminRegister):
+def admin_register(admin_data: AdminRegister):
     """
     管理者登録（招待コード必須）
     """
@@ -723,7 +851,7 @@ class FavoriteRequest(BaseModel):
 
 
 @app.get("/api/favorites")
-async def get_favorites(current_user: User = Depends(get_current_user_required)):
+def get_favorites(current_user: User = Depends(get_current_user_required)):
     """
     お気に入り一覧を取得
     """
@@ -732,7 +860,7 @@ async def get_favorites(current_user: User = Depends(get_current_user_required))
 
 
 @app.get("/api/favorites/ids")
-async def get_favorite_ids(current_user: User = Depends(get_current_user_required)):
+def get_favorite_ids(current_user: User = Depends(get_current_user_required)):
     """
     お気に入りカードIDリストを取得（軽量API）
     """
@@ -741,7 +869,7 @@ async def get_favorite_ids(current_user: User = Depends(get_current_user_require
 
 
 @app.post("/api/favorites")
-async def add_favorite_card(
+def add_favorite_card(
     request: FavoriteRequest,
     current_user: User = Depends(get_current_user_required)
 ):
@@ -767,7 +895,7 @@ async def add_favorite_card(
 
 
 @app.delete("/api/favorites/{card_id}")
-async def remove_favorite_card(
+def remove_favorite_card(
     card_id: int,
     current_user: User = Depends(get_current_user_required)
 ):
@@ -789,7 +917,7 @@ async def remove_favorite_card(
 # =============================================================================
 
 @app.get("/api/notifications")
-async def get_notifications(
+def get_notifications(
     unread_only: bool = False,
     limit: int = 50,
     current_user: User = Depends(get_current_user_required)
@@ -800,14 +928,14 @@ async def get_notifications(
 
 
 @app.get("/api/notifications/count")
-async def get_notification_count(current_user: User = Depends(get_current_user_required)):
+def get_notification_count(current_user: User = Depends(get_current_user_required)):
     """未読通知数を取得"""
     count = get_unread_notification_count(current_user.id)
     return {"unread_count": count}
 
 
 @app.post("/api/notifications/{notification_id}/read")
-async def mark_read(
+def mark_read(
     notification_id: int,
     current_user: User = Depends(get_current_user_required)
 ):
@@ -819,14 +947,14 @@ async def mark_read(
 
 
 @app.post("/api/notifications/read-all")
-async def mark_all_read(current_user: User = Depends(get_current_user_required)):
+def mark_all_read(current_user: User = Depends(get_current_user_required)):
     """全通知を既読にする"""
     count = mark_all_notifications_read(current_user.id)
     return {"message": f"{count}件を既読にしました", "count": count}
 
 
 @app.get("/api/notifications/settings")
-async def get_settings(current_user: User = Depends(get_current_user_required)):
+def get_settings(current_user: User = Depends(get_current_user_required)):
     """通知設定を取得"""
     settings = get_notification_settings(current_user.id)
     return {"settings": settings}
@@ -841,7 +969,7 @@ class NotificationSettingsUpdate(BaseModel):
 
 
 @app.put("/api/notifications/settings")
-async def update_settings(
+def update_settings(
     settings: NotificationSettingsUpdate,
     current_user: User = Depends(get_current_user_required)
 ):
@@ -860,7 +988,7 @@ class CardCreate(BaseModel):
 
 
 @app.get("/api/admin/stats")
-async def get_admin_statistics(admin_user: User = Depends(require_admin)):
+def get_admin_statistics(admin_user: User = Depends(require_admin)):
     """
     管理者用統計情報を取得
     """
@@ -869,7 +997,7 @@ async def get_admin_statistics(admin_user: User = Depends(require_admin)):
 
 
 @app.post("/api/admin/cards")
-async def create_card(
+def create_card(
     card_data: CardCreate,
     admin_user: User = Depends(require_admin)
 ):
@@ -890,7 +1018,7 @@ async def create_card(
 
 
 @app.post("/api/admin/cards/{card_id}/popular")
-async def toggle_popular(
+def toggle_popular(
     card_id: int,
     admin_user: User = Depends(require_admin)
 ):
@@ -922,7 +1050,7 @@ async def toggle_popular(
 
 
 @app.post("/api/admin/invites")
-async def create_invite(admin_user: User = Depends(require_admin)):
+def create_invite(admin_user: User = Depends(require_admin)):
     """
     招待コードを生成
     """
@@ -932,7 +1060,7 @@ async def create_invite(admin_user: User = Depends(require_admin)):
 
 
 @app.get("/api/admin/invites")
-async def list_invites(admin_user: User = Depends(require_admin)):
+def list_invites(admin_user: User = Depends(require_admin)):
     """
     招待コード一覧を取得
     """
@@ -940,8 +1068,38 @@ async def list_invites(admin_user: User = Depends(require_admin)):
     return {"invites": [inv.to_dict() for inv in invites]}
 
 
+@app.get("/api/admin/cache-stats")
+def get_cache_stats(admin_user: User = Depends(require_admin)):
+    """
+    集計系APIキャッシュ・画像キャッシュの統計（ヒット/ミス数など）
+    """
+    return {
+        "api_cache": api_cache.stats(),
+        "card_detail_cache": card_detail_cache.stats(),
+        "image_cache": image_cache.stats(),
+    }
+
+
+@app.get("/api/admin/activity-log-stats")
+def get_activity_log_stats(admin_user: User = Depends(require_admin)):
+    """
+    検索ログ・クリックのまとめ書きの統計（待ち件数・書き込み時間など）
+    """
+    return {"activity_log": activity_log.stats()}
+
+
+@app.post("/api/admin/cache/clear")
+def clear_cache(admin_user: User = Depends(require_admin)):
+    """
+    集計系API・カード詳細のキャッシュを手動で破棄
+    """
+    api_cache.invalidate()
+    card_detail_cache.invalidate()
+    return {"message": "キャッシュをクリアしました"}
+
+
 @app.post("/api/admin/update-popular")
-async def run_update_popular(admin_user: User = Depends(require_admin)):
+def run_update_popular(admin_user: User = Depends(require_admin)):
     """
     人気カードフラグを自動更新
     """
@@ -967,7 +1125,7 @@ class FeaturedKeywordReorder(BaseModel):
 
 
 @app.get("/api/admin/featured-keywords")
-async def list_featured_keywords(admin_user: User = Depends(require_admin)):
+def list_featured_keywords(admin_user: User = Depends(require_admin)):
     """
     人気キーワード一覧を取得（管理者用、非アクティブも含む）
     """
@@ -976,7 +1134,7 @@ async def list_featured_keywords(admin_user: User = Depends(require_admin)):
 
 
 @app.post("/api/admin/featured-keywords")
-async def create_featured_keyword(
+def create_featured_keyword(
     data: FeaturedKeywordCreate,
     admin_user: User = Depends(require_admin)
 ):
@@ -990,11 +1148,12 @@ async def create_featured_keyword(
         )
 
     keyword = add_featured_keyword(data.keyword.strip(), admin_user.id)
+    api_cache.invalidate("home")
     return {"message": "キーワードを追加しました", "keyword": keyword.to_dict()}
 
 
 @app.put("/api/admin/featured-keywords/{keyword_id}")
-async def update_featured_keyword_api(
+def update_featured_keyword_api(
     keyword_id: int,
     data: FeaturedKeywordUpdate,
     admin_user: User = Depends(require_admin)
@@ -1013,11 +1172,12 @@ async def update_featured_keyword_api(
             detail="キーワードが見つかりません"
         )
 
+    api_cache.invalidate("home")
     return {"message": "キーワードを更新しました", "keyword": keyword.to_dict()}
 
 
 @app.delete("/api/admin/featured-keywords/{keyword_id}")
-async def delete_featured_keyword_api(
+def delete_featured_keyword_api(
     keyword_id: int,
     admin_user: User = Depends(require_admin)
 ):
@@ -1031,11 +1191,12 @@ async def delete_featured_keyword_api(
             detail="キーワードが見つかりません"
         )
 
+    api_cache.invalidate("home")
     return {"message": "キーワードを削除しました"}
 
 
 @app.post("/api/admin/featured-keywords/reorder")
-async def reorder_featured_keywords_api(
+def reorder_featured_keywords_api(
     data: FeaturedKeywordReorder,
     admin_user: User = Depends(require_admin)
 ):
@@ -1043,19 +1204,46 @@ async def reorder_featured_keywords_api(
     人気キーワードの表示順を変更
     """
     reorder_featured_keywords(data.keyword_ids)
+    api_cache.invalidate("home")
     return {"message": "表示順を更新しました"}
 
 
-@app.post("/api/admin/featured-keywords/{keyword_id}/update-prices")
-async def update_keyword_prices_api(
+def _summarize_keyword_stats(stats: dict) -> dict:
+    """update_single_keywordの結果からAPI返却用の項目を抜き出す"""
+    return {
+        "total": stats["total"],
+        "new": stats["new"],
+        "shops": stats["shops"]
+    }
+
+
+def _update_single_keyword_job(keyword: str) -> dict:
+    """ジョブ: 指定キーワードの価格更新"""
+    from update_featured_prices import update_single_keyword
+    stats = update_single_keyword(keyword)
+    # 価格の保存でデータ世代番号は進んでいる。このプロセスのキャッシュはすぐに破棄
+    api_cache.invalidate()
+    return _summarize_keyword_stats(stats)
+
+
+def _update_all_keywords_job() -> dict:
+    """ジョブ: 全人気キーワードの価格更新"""
+    from update_featured_prices import update_all_featured_keywords
+    stats = update_all_featured_keywords()
+    # 価格の保存でデータ世代番号は進んでいる。このプロセスのキャッシュはすぐに破棄
+    api_cache.invalidate()
+    return stats
+
+
+@app.post("/api/admin/featured-keywords/{keyword_id}/update-prices", status_code=status.HTTP_202_ACCEPTED)
+def update_keyword_prices_api(
     keyword_id: int,
     admin_user: User = Depends(require_admin)
 ):
     """
-    指定キーワードの価格を即座に更新
+    指定キーワードの価格更新をバックグラウンドで開始
+    進捗は /api/admin/jobs/{job_id} で確認する
     """
-    from update_featured_prices import update_single_keyword
-
     # キーワードを取得
     keywords = get_featured_keywords(active_only=False)
     keyword = next((k for k in keywords if k.id == keyword_id), None)
@@ -1066,44 +1254,64 @@ async def update_keyword_prices_api(
             detail="キーワードが見つかりません"
         )
 
-    # 価格更新実行
-    try:
-        stats = update_single_keyword(keyword.keyword)
-        return {
-            "message": f"「{keyword.keyword}」の価格を更新しました",
-            "stats": {
-                "total": stats["total"],
-                "new": stats["new"],
-                "shops": stats["shops"]
-            }
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"価格更新に失敗しました: {str(e)}"
-        )
+    # 同じキーワードの更新が実行中ならそのジョブを返す
+    job_name = f"update-prices:{keyword.keyword}"
+    job = job_runner.submit_unique(job_name, _update_single_keyword_job, keyword.keyword)
 
+    return {
+        "message": f"「{keyword.keyword}」の価格更新を開始しました",
+        "job": job.to_dict()
+    }
 
-@app.post("/api/admin/featured-keywords/update-all-prices")
-async def update_all_keyword_prices_api(
+
+@app.post("/api/admin/featured-keywords/update-all-prices", status_code=status.HTTP_202_ACCEPTED)
+def update_all_keyword_prices_api(
     admin_user: User = Depends(require_admin)
 ):
     """
-    全ての人気キーワードの価格を更新
+    全ての人気キーワードの価格更新をバックグラウンドで開始
+    進捗は /api/admin/jobs/{job_id} で確認する
     """
-    from update_featured_prices import update_all_featured_keywords
+    # 実行中ならそのジョブを返す
+    job = job_runner.submit_unique("update-all-prices", _update_all_keywords_job)
 
-    try:
-        stats = update_all_featured_keywords()
-        return {
-            "message": "全キーワードの価格を更新しました",
-            "stats": stats
-        }
-    except Exception as e:
+    return {
+        "message": "全キーワードの価格更新を開始しました",
+        "job": job.to_dict()
+    }
+
+
+# =============================================================================
+# バックグラウンドジョブAPI
+# =============================================================================
+
+@app.get("/api/admin/jobs")
+def list_jobs(admin_user: User = Depends(require_admin)):
+    """
+    バックグラウンドジョブ一覧を取得（新しい順）
+    """
+    return {"jobs": [job.to_dict() for job in job_runner.list()]}
+
+
+@app.get("/api/admin/jobs/{job_id}")
+def get_job(
+    job_id: str,
+    admin_user: User = Depends(require_admin)
+):
+    """
+    バックグラウンドジョブの状態を取得
+
+    - status: queued, running, success, failed
+    - result: 完了時の結果（価格更新の統計など）
+    - error: 失敗時のエラーメッセージ
+    """
+    job = job_runner.get(job_id)
+    if not job:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"価格更新に失敗しました: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="ジョブが見つかりません"
         )
+    return {"job": job.to_dict()}
 
 
 # =============================================================================
@@ -1148,21 +1356,24 @@ def extract_asin_from_url(url: str) -> Optional[str]:
 
 
 @app.get("/api/amazon-products")
-async def list_amazon_products():
-    """Amazon商品一覧を取得（公開API）"""
-    products = get_amazon_products(active_only=True)
-    return {"products": [p.to_dict() for p in products]}
+def list_amazon_products(if_none_match: Optional[str] = Header(None)):
+    """Amazon商品一覧を取得（公開API、キャッシュあり）"""
+    return _cached_json_response(
+        "amazon_products",
+        lambda: {"products": [p.to_dict() for p in get_amazon_products(active_only=True)]},
+        if_none_match, CACHE_CONTROL_PRODUCTS,
+    )
 
 
 @app.get("/api/admin/amazon-products")
-async def list_amazon_products_admin(admin_user: User = Depends(require_admin)):
+def list_amazon_products_admin(admin_user: User = Depends(require_admin)):
     """Amazon商品一覧を取得（管理者用、非アクティブも含む）"""
     products = get_amazon_products(active_only=False)
     return {"products": [p.to_dict() for p in products]}
 
 
 @app.post("/api/admin/amazon-products")
-async def create_amazon_product(
+def create_amazon_product(
     data: AmazonProductCreate,
     admin_user: User = Depends(require_admin)
 ):
@@ -1183,6 +1394,7 @@ async def create_amazon_product(
             image_url=data.image_url,
             affiliate_tag=AMAZON_AFFILIATE_TAG
         )
+        api_cache.invalidate("amazon_products")
         return {"message": "商品を追加しました", "product": product.to_dict()}
     except Exception as e:
         if "UNIQUE constraint failed" in str(e):
@@ -1197,7 +1409,7 @@ async def create_amazon_product(
 
 
 @app.put("/api/admin/amazon-products/{product_id}")
-async def update_amazon_product_api(
+def update_amazon_product_api(
     product_id: int,
     data: AmazonProductUpdate,
     admin_user: User = Depends(require_admin)
@@ -1215,11 +1427,12 @@ async def update_amazon_product_api(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="商品が見つかりません"
         )
+    api_cache.invalidate("amazon_products")
     return {"message": "商品を更新しました", "product": product.to_dict()}
 
 
 @app.delete("/api/admin/amazon-products/{product_id}")
-async def delete_amazon_product_api(
+def delete_amazon_product_api(
     product_id: int,
     admin_user: User = Depends(require_admin)
 ):
@@ -1230,16 +1443,18 @@ async def delete_amazon_product_api(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="商品が見つかりません"
         )
+    api_cache.invalidate("amazon_products")
     return {"message": "商品を削除しました"}
 
 
 @app.post("/api/admin/amazon-products/reorder")
-async def reorder_amazon_products_api(
+def reorder_amazon_products_api(
     data: AmazonProductReorder,
     admin_user: User = Depends(require_admin)
 ):
     """Amazon商品の表示順を変更"""
     reorder_amazon_products(data.product_ids)
+    api_cache.invalidate("amazon_products")
     return {"message": "表示順を更新しました"}
 
 
@@ -1272,21 +1487,24 @@ class RakutenProductReorder(BaseModel):
 
 
 @app.get("/api/rakuten-products")
-async def list_rakuten_products():
-    """楽天商品一覧を取得（公開API）"""
-    products = get_rakuten_products(active_only=True)
-    return {"products": [p.to_dict() for p in products]}
+def list_rakuten_products(if_none_match: Optional[str] = Header(None)):
+    """楽天商品一覧を取得（公開API、キャッシュあり）"""
+    return _cached_json_response(
+        "rakuten_products",
+        lambda: {"products": [p.to_dict() for p in get_rakuten_products(active_only=True)]},
+        if_none_match, CACHE_CONTROL_PRODUCTS,
+    )
 
 
 @app.get("/api/admin/rakuten-products")
-async def list_rakuten_products_admin(admin_user: User = Depends(require_admin)):
+def list_rakuten_products_admin(admin_user: User = Depends(require_admin)):
     """楽天商品一覧を取得（管理者用、非アクティブも含む）"""
     products = get_rakuten_products(active_only=False)
     return {"products": [p.to_dict() for p in products]}
 
 
 @app.post("/api/admin/rakuten-products")
-async def create_rakuten_product(
+def create_rakuten_product(
     data: RakutenProductCreate,
     admin_user: User = Depends(require_admin)
 ):
@@ -1306,11 +1524,12 @@ async def create_rakuten_product(
         image_url=data.image_url,
         affiliate_url=data.affiliate_url
     )
+    api_cache.invalidate("rakuten_products")
     return {"product": product.to_dict()}
 
 
 @app.put("/api/admin/rakuten-products/{product_id}")
-async def update_rakuten_product_api(
+def update_rakuten_product_api(
     product_id: int,
     data: RakutenProductUpdate,
     admin_user: User = Depends(require_admin)
@@ -1325,27 +1544,30 @@ async def update_rakuten_product_api(
     )
     if not product:
         raise HTTPException(status_code=404, detail="商品が見つかりません")
+    api_cache.invalidate("rakuten_products")
     return {"product": product.to_dict()}
 
 
 @app.delete("/api/admin/rakuten-products/{product_id}")
-async def delete_rakuten_product_api(
+def delete_rakuten_product_api(
     product_id: int,
     admin_user: User = Depends(require_admin)
 ):
     """楽天商品を削除"""
     if delete_rakuten_product(product_id):
+        api_cache.invalidate("rakuten_products")
         return {"message": "削除しました"}
     raise HTTPException(status_code=404, detail="商品が見つかりません")
 
 
 @app.post("/api/admin/rakuten-products/reorder")
-async def reorder_rakuten_products_api(
+def reorder_rakuten_products_api(
     data: RakutenProductReorder,
     admin_user: User = Depends(require_admin)
 ):
     """楽天商品の表示順を変更"""
     reorder_rakuten_products(data.product_ids)
+    api_cache.invalidate("rakuten_products")
     return {"message": "表示順を更新しました"}
 
 
@@ -1354,7 +1576,7 @@ async def reorder_rakuten_products_api(
 # =============================================================================
 
 @app.get("/api/admin/analytics/searches")
-async def get_analytics_searches(
+def get_analytics_searches(
     period: str = Query("daily", description="集計期間: daily, weekly, monthly"),
     days: int = Query(30, ge=1, le=365, description="取得日数"),
     admin_user: User = Depends(require_admin)
@@ -1365,7 +1587,7 @@ async def get_analytics_searches(
 
 
 @app.get("/api/admin/analytics/clicks")
-async def get_analytics_clicks(
+def get_analytics_clicks(
     period: str = Query("daily", description="集計期間: daily, weekly, monthly"),
     days: int = Query(30, ge=1, le=365, description="取得日数"),
     admin_user: User = Depends(require_admin)
@@ -1376,7 +1598,7 @@ async def get_analytics_clicks(
 
 
 @app.get("/api/admin/analytics/keywords")
-async def get_analytics_keywords(
+def get_analytics_keywords(
     days: int = Query(30, ge=1, le=365, description="取得日数"),
     limit: int = Query(20, ge=1, le=100, description="取得件数"),
     admin_user: User = Depends(require_admin)
@@ -1387,7 +1609,7 @@ async def get_analytics_keywords(
 
 
 @app.get("/api/admin/analytics/shops")
-async def get_analytics_shops(
+def get_analytics_shops(
     days: int = Query(30, ge=1, le=365, description="取得日数"),
     admin_user: User = Depends(require_admin)
 ):
@@ -1397,7 +1619,7 @@ async def get_analytics_shops(
 
 
 @app.get("/api/admin/analytics/cards")
-async def get_analytics_cards(
+def get_analytics_cards(
     days: int = Query(30, ge=1, le=365, description="取得日数"),
     limit: int = Query(20, ge=1, le=100, description="取得件数"),
     admin_user: User = Depends(require_admin)
@@ -1412,7 +1634,7 @@ async def get_analytics_cards(
 # =============================================================================
 
 @app.get("/api/admin/users")
-async def get_admin_users(
+def get_admin_users(
     limit: int = Query(20, ge=1, le=100, description="取得件数"),
     offset: int = Query(0, ge=0, description="オフセット"),
     search: str = Query(None, description="検索キーワード"),
@@ -1433,7 +1655,7 @@ class UserStatusUpdate(BaseModel):
 
 
 @app.put("/api/admin/users/{user_id}/status")
-async def update_user_status(
+def update_user_status(
     user_id: int,
     data: UserStatusUpdate,
     admin_user: User = Depends(require_admin)
@@ -1461,7 +1683,7 @@ class UserRoleUpdate(BaseModel):
 
 
 @app.put("/api/admin/users/{user_id}/role")
-async def update_user_role_api(
+def update_user_role_api(
     user_id: int,
     data: UserRoleUpdate,
     admin_user: User = Depends(require_admin)
@@ -1489,7 +1711,7 @@ async def update_user_role_api(
 # =============================================================================
 
 @app.get("/api/admin/card-groups")
-async def list_card_groups(admin_user: User = Depends(require_admin)):
+def list_card_groups(admin_user: User = Depends(require_admin)):
     """カードグループ一覧を取得"""
     groups = get_card_groups()
     return {"groups": groups}
@@ -1501,7 +1723,7 @@ class CardGroupCreate(BaseModel):
 
 
 @app.post("/api/admin/card-groups")
-async def create_card_group(
+def create_card_group(
     data: CardGroupCreate,
     admin_user: User = Depends(require_admin)
 ):
@@ -1522,7 +1744,7 @@ async def create_card_group(
 
 
 @app.get("/api/admin/card-groups/{group_id}/members")
-async def get_card_group_members(
+def get_card_group_members(
     group_id: int,
     admin_user: User = Depends(require_admin)
 ):
@@ -1536,7 +1758,7 @@ class CardGroupMemberAdd(BaseModel):
 
 
 @app.post("/api/admin/card-groups/{group_id}/members")
-async def add_card_to_group_api(
+def add_card_to_group_api(
     group_id: int,
     data: CardGroupMemberAdd,
     admin_user: User = Depends(require_admin)
@@ -1547,7 +1769,7 @@ async def add_card_to_group_api(
 
 
 @app.delete("/api/admin/card-groups/{group_id}/members/{card_id}")
-async def remove_card_from_group_api(
+def remove_card_from_group_api(
     group_id: int,
     card_id: int,
     admin_user: User = Depends(require_admin)
@@ -1558,7 +1780,7 @@ async def remove_card_from_group_api(
 
 
 @app.delete("/api/admin/card-groups/{group_id}")
-async def delete_card_group_api(
+def delete_card_group_api(
     group_id: int,
     admin_user: User = Depends(require_admin)
 ):
@@ -1568,7 +1790,7 @@ async def delete_card_group_api(
 
 
 @app.get("/api/admin/cards/search")
-async def search_cards_for_grouping(
+def search_cards_for_grouping(
     q: str = Query(..., min_length=1, description="検索キーワード"),
     admin_user: User = Depends(require_admin)
 ):
@@ -1603,7 +1825,7 @@ async def search_cards_for_grouping(
 # =============================================================================
 
 @app.get("/api/admin/x-posts")
-async def get_x_posts(
+def get_x_posts(
     pending_only: bool = False,
     limit: int = 50,
     admin_user: User = Depends(require_admin)
@@ -1614,7 +1836,7 @@ async def get_x_posts(
 
 
 @app.post("/api/admin/x-posts")
-async def create_custom_x_post(
+def create_custom_x_post(
     request: dict,
     admin_user: User = Depends(require_admin)
 ):
@@ -1629,7 +1851,7 @@ async def create_custom_x_post(
 
 
 @app.post("/api/admin/x-posts/{post_id}/posted")
-async def mark_posted(
+def mark_posted(
     post_id: int,
     admin_user: User = Depends(require_admin)
 ):
@@ -1641,7 +1863,7 @@ async def mark_posted(
 
 
 @app.delete("/api/admin/x-posts/{post_id}")
-async def remove_x_post(
+def remove_x_post(
     post_id: int,
     admin_user: User = Depends(require_admin)
 ):
@@ -1657,7 +1879,7 @@ async def remove_x_post(
 # =============================================================================
 
 @app.get("/api/articles")
-async def get_public_articles(
+def get_public_articles(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=50),
 ):
@@ -1674,7 +1896,7 @@ async def get_public_articles(
 
 
 @app.get("/api/articles/{slug}")
-async def get_public_article(slug: str):
+def get_public_article(slug: str):
     """公開記事を取得"""
     article = get_article_by_slug(slug)
     if not article or not article.is_published:
@@ -1687,7 +1909,7 @@ async def get_public_article(slug: str):
 # =============================================================================
 
 @app.get("/api/admin/articles")
-async def get_admin_articles(
+def get_admin_articles(
     admin_user: User = Depends(require_admin),
 ):
     """全記事一覧を取得（下書き含む）"""
@@ -1696,7 +1918,7 @@ async def get_admin_articles(
 
 
 @app.get("/api/admin/articles/{article_id}")
-async def get_admin_article(
+def get_admin_article(
     article_id: int,
     admin_user: User = Depends(require_admin),
 ):
@@ -1708,7 +1930,7 @@ async def get_admin_article(
 
 
 @app.post("/api/admin/articles")
-async def create_admin_article(
+def create_admin_article(
     request: dict,
     admin_user: User = Depends(require_admin),
 ):
@@ -1736,7 +1958,7 @@ async def create_admin_article(
 
 
 @app.put("/api/admin/articles/{article_id}")
-async def update_admin_article(
+def update_admin_article(
     article_id: int,
     request: dict,
     admin_user: User = Depends(require_admin),
@@ -1764,7 +1986,7 @@ async def update_admin_article(
 
 
 @app.delete("/api/admin/articles/{article_id}")
-async def delete_admin_article(
+def delete_admin_article(
     article_id: int,
     admin_user: User = Depends(require_admin),
 ):
@@ -1807,7 +2029,7 @@ async def upload_image(
     upload_dir = frontend_path / "uploads" / "blog"
     upload_dir.mkdir(parents=True, exist_ok=True)
     save_path = upload_dir / filename
-    save_path.write_bytes(contents)
+    await run_in_threadpool(save_path.write_bytes, contents)
 
     return {"url": f"/static/uploads/blog/{filename}"}
 
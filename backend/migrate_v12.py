@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+"""v12マイグレーション実行スクリプト（latest_pricesテーブル作成＋バックフィル）"""
+from database import migrate_v12_latest_prices
+
+print("Running migration v12...")
+migrate_v12_latest_prices()
+
+print("Done!")
@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+"""v13マイグレーション実行スクリプト（カード名検索用FTS5インデックス作成）"""
+from database import migrate_v13_cards_fts
+
+print("Running migration v13...")
+migrate_v13_cards_fts()
+
+print("Done!")
@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+"""v14マイグレーション実行スクリプト（price_movementsテーブル作成＋バックフィル）"""
+from database import migrate_v14_price_movements
+
+print("Running migration v14...")
+migrate_v14_price_movements()
+
+print("Done!")
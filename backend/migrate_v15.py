@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+"""v15マイグレーション実行スクリプト（crawl_page_fingerprintsテーブル作成）"""
+from database import migrate_v15_crawl_page_fingerprints
+
+print("Running migration v15...")
+migrate_v15_crawl_page_fingerprints()
+
+print("Done!")
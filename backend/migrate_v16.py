@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+"""v16マイグレーション実行スクリプト（cards.identity_version・backfill_checkpointsテーブル追加）"""
+from database import migrate_v16_card_identity_version
+
+print("Running migration v16...")
+migrate_v16_card_identity_version()
+
+print("Done!")
@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+"""v17マイグレーション実行スクリプト（data_generation・card_versionsテーブル追加）"""
+from database import migrate_v17_data_versions
+
+print("Running migration v17...")
+migrate_v17_data_versions()
+
+print("Done!")
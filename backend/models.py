@@ -35,6 +35,8 @@ class Card:
     # v7追加カラム（カード統合機能用）
     extracted_card_no: Optional[str] = None
     base_name: Optional[str] = None
+    # v16追加カラム（抽出ルールのバージョン）
+    identity_version: Optional[int] = None
 
     def to_dict(self) -> dict:
         return asdict(self)
@@ -61,6 +63,7 @@ class Price:
         """既存APIレスポンス形式に変換"""
         return {
             "card_id": self.card_id,
+            "shop_id": self.shop_id,
             "site": self.shop_name or "",
             "name": self.card_name or "",
             "price": self.price,
@@ -0,0 +1,103 @@
+"""
+ショップ（ドメイン）ごとのリクエスト間隔制御
+
+トークンバケットでドメインごとにリクエスト間隔を守る。別ドメインへのリクエストは
+互いに待たないので、複数ショップを並行して取得しても各ショップへの負荷は変わらない
+
+間隔の設定はこのファイルの DOMAIN_INTERVALS だけで行う
+
+使い方:
+    await rate_limiter.acquire(url)    # 非同期
+    rate_limiter.acquire_sync(url)     # 同期（スレッドから）
+"""
+import asyncio
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+# ドメインごとのリクエスト間隔（秒）
+DOMAIN_INTERVALS = {
+    "www.cardrush-bs.jp": 3.0,
+    "batosuki.shop": 3.0,
+    "www.hobbystation-single.jp": 3.0,
+    "tier-one.jp": 2.0,
+    "fullahead-tcg.com": 2.0,
+    "yuyu-tei.jp": 2.0,
+    "dorasuta.jp": 3.0,
+}
+
+# 上記にないドメインの間隔（秒）
+DEFAULT_INTERVAL = float(os.environ.get("RATE_LIMIT_DEFAULT_INTERVAL", "2.0"))
+
+# 間隔を空けずに送れるリクエスト数（バースト）
+DEFAULT_BURST = 1
+
+
+class TokenBucket:
+    """
+    トークンバケット（スレッドセーフ・イベントループ非依存）
+
+    トークンを先に予約し、足りない分だけ待つ方式。待ち時間の計算だけをロック内で行うので
+    asyncio/スレッドのどちらからでも使える
+    """
+
+    def __init__(self, interval: float, burst: int = DEFAULT_BURST):
+        self.interval = interval
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """トークンを1つ予約し、使えるようになるまでの待ち秒数を返す"""
+        with self._lock:
+            now = time.monotonic()
+            if self.interval > 0:
+                refill = (now - self._updated_at) / self.interval
+                self._tokens = min(float(self.burst), self._tokens + refill)
+            else:
+                self._tokens = float(self.burst)
+            self._updated_at = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens * self.interval
+
+
+class DomainRateLimiter:
+    """ドメインごとのトークンバケットを管理"""
+
+    def __init__(self, intervals: dict[str, float] = None, default_interval: float = DEFAULT_INTERVAL):
+        self.intervals = dict(intervals or {})
+        self.default_interval = default_interval
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        """URL（またはホスト名）のドメインに対応するバケットを取得"""
+        host = (urlparse(url).netloc or url).lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.intervals.get(host, self.default_interval))
+                self._buckets[host] = bucket
+            return bucket
+
+    async def acquire(self, url: str) -> float:
+        """リクエスト可能になるまで待つ（待った秒数を返す）"""
+        wait = self.bucket(url).reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def acquire_sync(self, url: str) -> float:
+        """acquireの同期版（待った秒数を返す）"""
+        wait = self.bucket(url).reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+# プロセス共通のレートリミッター
+rate_limiter = DomainRateLimiter(DOMAIN_INTERVALS)
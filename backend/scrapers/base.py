@@ -5,6 +5,12 @@ from bs4 import BeautifulSoup
 import platform
 import os
 
+from http_clients import get_async_client
+from rate_limit import rate_limiter
+from .driver_pool import driver_pool
+from .page_wait import WaitStrategy, PageMark, mark_page, wait_until_ready
+from .parsing import ListTag, parse_listing
+
 # ChromeDriverのパスを自動検出
 def get_chromedriver_path():
     """環境に応じてChromeDriverのパスを返す"""
@@ -51,18 +57,17 @@ class BaseScraper(ABC):
 
     site_name: str = ""
     base_url: str = ""
+    # 解析する一覧部分の要素（空ならページ全体を解析、parsing.py参照）
+    list_tags: tuple[ListTag, ...] = ()
 
-    def __init__(self):
-        self.client = httpx.AsyncClient(
-            timeout=30.0,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            },
-            follow_redirects=True
-        )
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """ショップ共通のHTTPクライアント（http_clientsで管理、接続を再利用）"""
+        return get_async_client(self.base_url)
 
     async def close(self):
-        await self.client.aclose()
+        # クライアントはプロセス共通なのでここでは閉じない（aclose_http_clientsで閉じる）
+        pass
 
     @abstractmethod
     def build_search_url(self, keyword: str) -> str:
@@ -73,10 +78,12 @@ class BaseScraper(ABC):
         """キーワードで商品を検索"""
         try:
             url = self.build_search_url(keyword)
+            # ショップごとのリクエスト間隔を守る
+            await rate_limiter.acquire(url)
             response = await self.client.get(url)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.text, "lxml")
+            soup = parse_listing(response.text, self.list_tags)
             products = self.parse_products(soup)
 
             # キーワードでフィルタリング
@@ -110,52 +117,55 @@ class SeleniumScraper(ABC):
     site_name: str = ""
     base_url: str = ""
     _driver = None
+    # 解析する一覧部分の要素（空ならページ全体を解析、parsing.py参照）
+    list_tags: tuple[ListTag, ...] = ()
+    # 検索結果が描画されたとみなす条件（サブクラスで上書き）
+    wait_strategy = WaitStrategy(("a[href*='/product/']", "li.list_item_cell", ".item_data"))
+    # 実際に待った秒数の記録（ページごと）
+    wait_times = None
+
+    def _mark_page(self, driver, strategy: WaitStrategy = None) -> PageMark:
+        """フォーム送信・JS遷移の直前に遷移前のページを記録"""
+        return mark_page(driver, strategy or self.wait_strategy)
+
+    def _wait_ready(self, driver, strategy: WaitStrategy = None, previous_page: PageMark = None) -> float:
+        """ページの準備完了まで待ち、待った秒数を記録して返す"""
+        waited = wait_until_ready(driver, strategy or self.wait_strategy, previous_page)
+        if self.wait_times is None:
+            self.wait_times = []
+        self.wait_times.append(waited)
+        return waited
 
     def _get_driver(self):
-        """WebDriverを取得（遅延初期化）"""
-        if self._driver is None:
-            from selenium import webdriver
-            from selenium.webdriver.chrome.options import Options
-            from selenium.webdriver.chrome.service import Service
-
-            options = Options()
-            # EC2/Linux環境用の設定
-            options.add_argument("--headless")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--disable-gpu")
-            options.add_argument("--disable-extensions")
-            options.add_argument("--disable-software-rasterizer")
-            options.add_argument("--window-size=1920,1080")
-            options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36")
-            # ページ読み込み戦略を"eager"に設定（DOMContentLoadedで読み込み完了とみなす）
-            # これにより追跡スクリプト等の完全読み込みを待たずに処理を続行できる
-            options.page_load_strategy = "eager"
+        """
+        WebDriverを取得（driver_poolから借りる）
 
+        呼び出し1回をページ1回分として記録する。借りているドライバが
+        応答しなくなっていたら作り直す（close()でプールに返す）
+        """
+        if self._driver is None:
             try:
-                # ChromeDriverのパスが指定されている場合はServiceを使用
-                if CHROMEDRIVER_PATH:
-                    service = Service(executable_path=CHROMEDRIVER_PATH)
-                    self._driver = webdriver.Chrome(service=service, options=options)
-                else:
-                    # パスが指定されていない場合は自動検出
-                    self._driver = webdriver.Chrome(options=options)
-
-                # ページ読み込みタイムアウトを設定（60秒に延長）
-                self._driver.set_page_load_timeout(60)
-                self._driver.implicitly_wait(15)
+                self._driver = driver_pool.acquire()
             except Exception as e:
                 print(f"[{self.site_name}] Chrome起動エラー: {e}")
                 raise
+        elif not driver_pool.is_alive(self._driver):
+            print(f"[{self.site_name}] Chromeが応答しないため再起動します")
+            self._driver = driver_pool.replace(self._driver)
 
+        driver_pool.record_page(self._driver)
         return self._driver
 
-    async def close(self):
-        """リソースをクリーンアップ"""
+    def release_driver(self):
+        """ドライバをプールに返す（Chromeは終了せず次の利用者が再利用する）"""
         if self._driver:
-            self._driver.quit()
+            driver_pool.release(self._driver)
             self._driver = None
 
+    async def close(self):
+        """ドライバをプールに返す（同期処理から返す場合は release_driver）"""
+        self.release_driver()
+
     @abstractmethod
     def build_search_url(self, keyword: str) -> str:
         """検索URLを構築（サブクラスで実装）"""
@@ -165,6 +175,8 @@ class SeleniumScraper(ABC):
         """キーワードで商品を検索"""
         import asyncio
         try:
+            # ショップごとのリクエスト間隔を守る
+            await rate_limiter.acquire(self.base_url)
             loop = asyncio.get_event_loop()
             return await loop.run_in_executor(None, self._search_sync, keyword)
         except Exception as e:
@@ -173,28 +185,14 @@ class SeleniumScraper(ABC):
 
     def _search_sync(self, keyword: str) -> list[Product]:
         """同期的な検索処理"""
-        import time
-        from selenium.webdriver.common.by import By
-        from selenium.webdriver.support.ui import WebDriverWait
-        from selenium.webdriver.support import expected_conditions as EC
-
         driver = self._get_driver()
         url = self.build_search_url(keyword)
 
         driver.get(url)
-        time.sleep(5)
-
-        try:
-            WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "a[href*='/product/'], li.list_item_cell, .item_data"))
-            )
-        except:
-            pass
-
-        time.sleep(3)
+        self._wait_ready(driver)
 
         html = driver.page_source
-        soup = BeautifulSoup(html, "lxml")
+        soup = parse_listing(html, self.list_tags)
         products = self.parse_products(soup)
 
         # キーワードでフィルタリング
@@ -1,8 +1,12 @@
 import re
-import time
 from urllib.parse import urljoin, quote
 from bs4 import BeautifulSoup
 from .base import SeleniumScraper, Product
+from .page_wait import WaitStrategy
+from .parsing import ListTag, YEN_RE, parse_listing
+
+# 「480円(内税)」「180円(税抜)」形式の価格
+TAXED_PRICE_RE = re.compile(r"([\d,]+)円\s*[(（](内税|税抜|税込)[)）]?")
 
 
 class BatosukiScraper(SeleniumScraper):
@@ -10,6 +14,11 @@ class BatosukiScraper(SeleniumScraper):
 
     site_name = "バトスキ"
     base_url = "https://batosuki.shop"
+    # 検索結果の商品リスト
+    wait_strategy = WaitStrategy(("li.kr-productlist_list",))
+    # トップページの検索フォーム
+    form_wait_strategy = WaitStrategy(("form input[name='keyword']",), timeout=10.0)
+    list_tags = (ListTag("li", "kr-productlist_list"),)
 
     def build_search_url(self, keyword: str) -> str:
         # トップページを返す（検索はJSで実行）
@@ -19,9 +28,10 @@ class BatosukiScraper(SeleniumScraper):
         """フォーム送信による検索"""
         driver = self._get_driver()
 
-        # トップページにアクセス
+        # トップページにアクセス（検索フォームが出るまで待つ）
         driver.get(self.base_url)
-        time.sleep(5)
+        self._wait_ready(driver, self.form_wait_strategy)
+        previous_page = self._mark_page(driver)
 
         # JavaScriptで検索フォームに値を設定して送信
         script = f"""
@@ -37,10 +47,11 @@ class BatosukiScraper(SeleniumScraper):
         }}
         """
         driver.execute_script(script)
-        time.sleep(10)
+        # 検索結果ページに切り替わって商品リストが出るまで待つ
+        self._wait_ready(driver, previous_page=previous_page)
 
         html = driver.page_source
-        soup = BeautifulSoup(html, "lxml")
+        soup = parse_listing(html, self.list_tags)
         products = self.parse_products(soup)
 
         # キーワードでフィルタリング
@@ -108,13 +119,13 @@ class BatosukiScraper(SeleniumScraper):
         # li要素のテキスト全体から価格を探す
         item_text = item.get_text()
         # 内税、税抜、税込みに対応
-        price_match = re.search(r"([\d,]+)円\s*[(（](内税|税抜|税込)[)）]?", item_text)
+        price_match = TAXED_PRICE_RE.search(item_text)
         if price_match:
             price_text = price_match.group(0)
             price = int(price_match.group(1).replace(",", ""))
         else:
             # フォールバック: 単純な「円」パターン
-            price_match = re.search(r"([\d,]+)円", item_text)
+            price_match = YEN_RE.search(item_text)
             if price_match:
                 price_text = price_match.group(0)
                 price = int(price_match.group(1).replace(",", ""))
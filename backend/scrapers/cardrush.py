@@ -1,7 +1,8 @@
-import re
 from urllib.parse import urljoin, quote
 from bs4 import BeautifulSoup
 from .base import SeleniumScraper, Product
+from .page_wait import WaitStrategy
+from .parsing import ListTag, YEN_RE, DIGITS_RE
 
 
 class CardrushScraper(SeleniumScraper):
@@ -9,6 +10,8 @@ class CardrushScraper(SeleniumScraper):
 
     site_name = "カードラッシュ"
     base_url = "https://www.cardrush-bs.jp"
+    wait_strategy = WaitStrategy(("li.list_item_cell div.item_data",))
+    list_tags = (ListTag("li", "list_item_cell"),)
 
     def build_search_url(self, keyword: str) -> str:
         encoded = quote(keyword, safe="")
@@ -66,7 +69,7 @@ class CardrushScraper(SeleniumScraper):
         price_elem = item.select_one("span.figure")
         if price_elem:
             price_text = price_elem.get_text(strip=True)
-            price_match = re.search(r"([\d,]+)円", price_text)
+            price_match = YEN_RE.search(price_text)
             if price_match:
                 price = int(price_match.group(1).replace(",", ""))
 
@@ -76,7 +79,7 @@ class CardrushScraper(SeleniumScraper):
         stock_elem = item.select_one("p.stock")
         if stock_elem:
             stock_text = stock_elem.get_text(strip=True)
-            stock_match = re.search(r"(\d+)", stock_text)
+            stock_match = DIGITS_RE.search(stock_text)
             if stock_match:
                 stock = int(stock_match.group(1))
                 stock_display = "在庫あり" if stock > 0 else "売切れ"
@@ -0,0 +1,236 @@
+"""
+Selenium WebDriverプール
+
+ヘッドレスChromeの起動は数秒・数百MBかかるため、プロセス内で使い回す
+
+- 同時に貸し出すドライバ数は SELENIUM_POOL_SIZE まで（超えた分は返却を待つ）
+- 貸し出し時に生存確認し、落ちていれば作り直す（クラッシュ復旧）
+- 返却時、SELENIUM_MAX_PAGES ページ使ったもの・メモリが SELENIUM_MAX_MEMORY_MB を
+  超えたものは破棄して次回作り直す（psutilがない環境ではメモリ判定なし）
+- プロセス終了時に残っているドライバはすべて終了する
+
+使い方:
+    driver = driver_pool.acquire()
+    try:
+        driver_pool.record_page(driver)
+        driver.get(url)
+    finally:
+        driver_pool.release(driver)
+"""
+import atexit
+import os
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 同時に使えるドライバ数
+SELENIUM_POOL_SIZE = int(os.environ.get("SELENIUM_POOL_SIZE", "1"))
+# このページ数を超えたドライバは返却時に作り直す
+SELENIUM_MAX_PAGES = int(os.environ.get("SELENIUM_MAX_PAGES", "200"))
+# Chrome（子プロセス含む）のメモリ使用量がこれを超えたら返却時に作り直す
+SELENIUM_MAX_MEMORY_MB = int(os.environ.get("SELENIUM_MAX_MEMORY_MB", "1500"))
+
+# 貸し出し時にリセットする暗黙の待機秒数
+DEFAULT_IMPLICIT_WAIT = 15
+PAGE_LOAD_TIMEOUT = 60
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36"
+
+
+def _create_driver():
+    """ヘッドレスChromeを起動"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    from .base import CHROMEDRIVER_PATH
+
+    options = Options()
+    # EC2/Linux環境用の設定
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-software-rasterizer")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument(f"user-agent={USER_AGENT}")
+    # ページ読み込み戦略を"eager"に設定（DOMContentLoadedで読み込み完了とみなす）
+    options.page_load_strategy = "eager"
+
+    # ChromeDriverのパスが指定されている場合はServiceを使用
+    if CHROMEDRIVER_PATH:
+        service = Service(executable_path=CHROMEDRIVER_PATH)
+        driver = webdriver.Chrome(service=service, options=options)
+    else:
+        # パスが指定されていない場合は自動検出
+        driver = webdriver.Chrome(options=options)
+
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    return driver
+
+
+class DriverPool:
+    """WebDriverプール（スレッドセーフ）"""
+
+    def __init__(self, size: int = SELENIUM_POOL_SIZE, max_pages: int = SELENIUM_MAX_PAGES,
+                 max_memory_mb: int = SELENIUM_MAX_MEMORY_MB):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = []  # 返却済みで再利用可能なドライバ
+        self._pages = {}  # id(driver) -> 使用ページ数
+        self._leased = set()  # 貸し出し中のid(driver)
+        self._created = 0
+        self._recycled = 0
+        self._crashed = 0
+
+    def acquire(self, timeout: float = None):
+        """ドライバを借りる（空きがなければ返却を待つ）"""
+        if not self._slots.acquire(timeout=-1 if timeout is None else timeout):
+            raise TimeoutError("Seleniumドライバの空き待ちがタイムアウトしました")
+
+        try:
+            driver = self._take_idle()
+            if driver is None:
+                driver = self._new_driver()
+            # 前の利用者の設定を戻す
+            driver.implicitly_wait(DEFAULT_IMPLICIT_WAIT)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._leased.add(id(driver))
+        return driver
+
+    def release(self, driver):
+        """ドライバを返す（使いすぎ・メモリ肥大・異常なら破棄）"""
+        with self._lock:
+            if id(driver) not in self._leased:
+                return
+            self._leased.discard(id(driver))
+
+        try:
+            if self._needs_recycle(driver):
+                self._quit(driver)
+                with self._lock:
+                    self._recycled += 1
+            elif not self.is_alive(driver):
+                self._quit(driver)
+                with self._lock:
+                    self._crashed += 1
+            else:
+                with self._lock:
+                    self._idle.append(driver)
+        finally:
+            self._slots.release()
+
+    def replace(self, driver):
+        """応答しなくなった貸し出し中のドライバを作り直して返す（クラッシュ復旧）"""
+        with self._lock:
+            self._leased.discard(id(driver))
+            self._crashed += 1
+        self._quit(driver)
+
+        new_driver = self._new_driver()
+        new_driver.implicitly_wait(DEFAULT_IMPLICIT_WAIT)
+        with self._lock:
+            self._leased.add(id(new_driver))
+        return new_driver
+
+    def record_page(self, driver):
+        """ページ読み込み1回分を記録（リサイクル判定用）"""
+        with self._lock:
+            self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+
+    @staticmethod
+    def is_alive(driver) -> bool:
+        """ドライバが応答するか"""
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def close_all(self):
+        """待機中のドライバをすべて終了（貸し出し中のものは返却時に残る）"""
+        with self._lock:
+            drivers = self._idle
+            self._idle = []
+        for driver in drivers:
+            self._quit(driver)
+
+    def stats(self) -> dict:
+        """プールの状態"""
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "leased": len(self._leased),
+                "created": self._created,
+                "recycled": self._recycled,
+                "crashed": self._crashed,
+            }
+
+    def _take_idle(self):
+        # 待機中のドライバから生きているものを取り出す
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                driver = self._idle.pop()
+            if self.is_alive(driver):
+                return driver
+            self._quit(driver)
+            with self._lock:
+                self._crashed += 1
+
+    def _new_driver(self):
+        started = time.time()
+        driver = _create_driver()
+        with self._lock:
+            self._created += 1
+            self._pages[id(driver)] = 0
+        print(f"[DriverPool] Chrome起動 ({time.time() - started:.1f}s)")
+        return driver
+
+    def _needs_recycle(self, driver) -> bool:
+        with self._lock:
+            pages = self._pages.get(id(driver), 0)
+        if pages >= self.max_pages:
+            return True
+        memory_mb = self._memory_mb(driver)
+        return memory_mb is not None and memory_mb > self.max_memory_mb
+
+    @staticmethod
+    def _memory_mb(driver):
+        """chromedriver配下（Chrome本体・レンダラ）の合計RSS（MB）"""
+        if psutil is None:
+            return None
+        try:
+            process = psutil.Process(driver.service.process.pid)
+            rss = process.memory_info().rss
+            for child in process.children(recursive=True):
+                rss += child.memory_info().rss
+            return rss / (1024 * 1024)
+        except Exception:
+            return None
+
+    def _quit(self, driver):
+        with self._lock:
+            self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+# プロセス共通のドライバプール
+driver_pool = DriverPool()
+atexit.register(driver_pool.close_all)
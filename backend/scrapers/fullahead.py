@@ -1,7 +1,7 @@
-import re
 from urllib.parse import urljoin, quote
 from bs4 import BeautifulSoup
 from .base import BaseScraper, Product
+from .parsing import ListTag, YEN_RE
 
 
 class FullaheadScraper(BaseScraper):
@@ -9,6 +9,7 @@ class FullaheadScraper(BaseScraper):
 
     site_name = "フルアヘッド"
     base_url = "https://fullahead-tcg.com"
+    list_tags = (ListTag("div", "indexItemBox"),)
 
     def build_search_url(self, keyword: str) -> str:
         encoded = quote(keyword, safe="")
@@ -70,7 +71,7 @@ class FullaheadScraper(BaseScraper):
         price_elem = item.select_one("span.itemPrice")
         if price_elem:
             price_text = price_elem.get_text(strip=True)
-            price_match = re.search(r"([\d,]+)円", price_text)
+            price_match = YEN_RE.search(price_text)
             if price_match:
                 price = int(price_match.group(1).replace(",", ""))
 
@@ -1,8 +1,8 @@
-import re
-import time
 from urllib.parse import urljoin, quote
 from bs4 import BeautifulSoup
 from .base import SeleniumScraper, Product
+from .page_wait import WaitStrategy
+from .parsing import ListTag, YEN_RE, parse_listing
 
 
 class HobbystationScraper(SeleniumScraper):
@@ -10,6 +10,11 @@ class HobbystationScraper(SeleniumScraper):
 
     site_name = "ホビーステーション"
     base_url = "https://www.hobbystation-single.jp"
+    # 検索結果の商品リスト
+    wait_strategy = WaitStrategy(("ul.searchRsultList li",))
+    # 商品一覧ページの検索入力欄
+    input_wait_strategy = WaitStrategy(('input[name="search_word"][type="search"]',), timeout=10.0)
+    list_tags = (ListTag("ul", "searchRsultList"),)
 
     def build_search_url(self, keyword: str) -> str:
         # トップページを返す（検索はJSで実行）
@@ -22,9 +27,10 @@ class HobbystationScraper(SeleniumScraper):
 
         driver = self._get_driver()
 
-        # 商品一覧ページにアクセス
+        # 商品一覧ページにアクセス（検索入力欄が出るまで待つ）
         driver.get(self.build_search_url(keyword))
-        time.sleep(3)
+        self._wait_ready(driver, self.input_wait_strategy)
+        previous_page = self._mark_page(driver)
 
         # 検索入力欄に直接入力してEnterキーで検索
         search_input = driver.find_element(By.CSS_SELECTOR, 'input[name="search_word"][type="search"]')
@@ -32,11 +38,11 @@ class HobbystationScraper(SeleniumScraper):
         search_input.send_keys(keyword)
         search_input.send_keys(Keys.RETURN)
 
-        # 検索結果の読み込みを待つ
-        time.sleep(8)
+        # 検索結果ページに切り替わって商品リストが出るまで待つ
+        self._wait_ready(driver, previous_page=previous_page)
 
         html = driver.page_source
-        soup = BeautifulSoup(html, "lxml")
+        soup = parse_listing(html, self.list_tags)
         products = self.parse_products(soup)
 
         # ホビーステーションはサイト側で検索済みなのでフィルタリング不要
@@ -101,7 +107,7 @@ class HobbystationScraper(SeleniumScraper):
         price_elem = item.select_one("div.packageDetail")
         if price_elem:
             price_text = price_elem.get_text(strip=True)
-            price_match = re.search(r"([\d,]+)円", price_text)
+            price_match = YEN_RE.search(price_text)
             if price_match:
                 price = int(price_match.group(1).replace(",", ""))
 
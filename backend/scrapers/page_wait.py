@@ -0,0 +1,139 @@
+"""
+Seleniumのページ準備完了待ち
+
+固定秒数のtime.sleepの代わりに、ページの状態を短い間隔で確認して
+「結果が描画された」時点で待機を終える
+
+準備完了の条件（WaitStrategy）:
+- document.readyState が loading ではない
+- ready_selectors のいずれかが存在する（結果が描画された）
+- jQuery通信中でない（jQueryがあるページのみ）
+- DOM要素数・読み込み済みリソース数が stable_seconds の間変化しない
+
+ready_selectors が見つからないままでも、読み込み完了後 empty_after 秒DOMが
+安定していれば「結果なし」とみなして終了する（最大 timeout 秒）
+
+フォーム送信・JSでのページ遷移では、遷移前に mark_page() で印を付けておき、
+ページが入れ替わる（または結果部分が書き換わる）まで先に待つ
+"""
+import time
+from dataclasses import dataclass
+
+# ページ状態を1回で取得するスクリプト（arguments[0]: 結果要素のセレクタ）
+_STATE_SCRIPT = """
+var sel = arguments[0];
+return [
+    document.readyState,
+    sel ? document.querySelectorAll(sel).length : 0,
+    document.getElementsByTagName('*').length,
+    (window.performance && performance.getEntriesByType) ? performance.getEntriesByType('resource').length : 0,
+    (window.jQuery && window.jQuery.active) ? window.jQuery.active : 0
+];
+"""
+
+
+# 最初の結果要素の内容（遷移前後の比較用）
+_FIRST_RESULT_SCRIPT = """
+var e = document.querySelector(arguments[0]);
+return e ? e.outerHTML.slice(0, 500) : null;
+"""
+
+
+@dataclass(frozen=True)
+class WaitStrategy:
+    """スクレイパーごとの待機方針"""
+    ready_selectors: tuple[str, ...]  # 結果が描画されたことを示すセレクタ
+    timeout: float = 15.0  # 最大待機秒数
+    stable_seconds: float = 0.3  # DOMが変化しない時間
+    empty_after: float = 3.0  # セレクタが見つからなくても結果なしとみなすまでの安定時間
+    poll_interval: float = 0.1
+
+    @property
+    def selector(self) -> str:
+        return ", ".join(self.ready_selectors)
+
+
+@dataclass
+class PageMark:
+    """遷移前のページの印"""
+    root: object  # 遷移前の<html>要素
+    first_result: str = None  # 遷移前の最初の結果要素
+
+
+def mark_page(driver, strategy: WaitStrategy) -> PageMark:
+    """フォーム送信・JS遷移の直前に呼び、遷移前のページを記録する"""
+    from selenium.webdriver.common.by import By
+
+    root = driver.find_element(By.TAG_NAME, "html")
+    try:
+        first_result = driver.execute_script(_FIRST_RESULT_SCRIPT, strategy.selector)
+    except Exception:
+        first_result = None
+    return PageMark(root, first_result)
+
+
+def wait_until_ready(driver, strategy: WaitStrategy, previous_page: PageMark = None) -> float:
+    """
+    ページの準備完了まで待つ
+
+    Args:
+        driver: WebDriver
+        strategy: 待機方針
+        previous_page: mark_page()で記録した遷移前のページ。
+                       ページが入れ替わる（または結果部分が書き換わる）まで先に待つ
+
+    Returns:
+        実際に待った秒数
+    """
+    started = time.monotonic()
+    deadline = started + strategy.timeout
+
+    if previous_page is not None:
+        _wait_for_navigation(driver, strategy, previous_page, deadline)
+
+    last_signature = None
+    stable_since = time.monotonic()
+    while True:
+        now = time.monotonic()
+        try:
+            ready_state, matched, node_count, resource_count, ajax_active = driver.execute_script(
+                _STATE_SCRIPT, strategy.selector
+            )
+        except Exception:
+            # 遷移中はスクリプトが失敗することがある
+            ready_state, matched, node_count, resource_count, ajax_active = "loading", 0, 0, 0, 0
+
+        signature = (ready_state, matched, node_count, resource_count, ajax_active)
+        if signature != last_signature:
+            last_signature = signature
+            stable_since = now
+        stable_for = now - stable_since
+
+        if ready_state != "loading" and not ajax_active:
+            if matched and stable_for >= strategy.stable_seconds:
+                break
+            if not matched and ready_state == "complete" and stable_for >= strategy.empty_after:
+                break
+
+        if now >= deadline:
+            break
+        time.sleep(strategy.poll_interval)
+
+    return time.monotonic() - started
+
+
+def _wait_for_navigation(driver, strategy: WaitStrategy, previous_page: PageMark, deadline: float):
+    """遷移前のページが入れ替わる（Ajaxの場合は結果部分が書き換わる）まで待つ"""
+    while time.monotonic() < deadline:
+        try:
+            # 要素がまだ同じページにあれば例外にならない
+            previous_page.root.tag_name
+        except Exception:
+            return
+        if previous_page.first_result is not None:
+            try:
+                if driver.execute_script(_FIRST_RESULT_SCRIPT, strategy.selector) != previous_page.first_result:
+                    return
+            except Exception:
+                return
+        time.sleep(strategy.poll_interval)
@@ -0,0 +1,90 @@
+"""
+商品一覧部分だけを解析するHTMLパーサー
+
+ページ全体のBeautifulSoupツリーを作らず、商品リスト（とページ送り）の要素だけを
+ツリーにする（SoupStrainer）。それ以外の要素はlxmlが読み飛ばすだけなので、
+ヘッダー・サイドバー・スクリプトの多いページほど速くなる
+
+スクレイパー・クローラーは list_tags に一覧部分の要素を宣言する:
+    list_tags = (ListTag("ul", "item-list"), ListTag("a", attr="href", contains="page="))
+
+解析結果には宣言した要素（とその子孫）だけが元の順序で入る。一覧部分の要素を
+選ぶセレクタ（"ul.item-list" など）はそのまま使える。宣言した要素の外を参照する処理
+（親要素・ページ全体のテキスト）がある場合は list_tags を空にして従来どおり全体を解析する
+
+よく使う正規表現もここでコンパイルしておく
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# カード番号（BS65-001, SD12-X01 など）
+CARD_NO_RE = re.compile(r'([A-Z]{2,3}\d{1,2}-[A-Z]?\d{1,3})')
+# 「1,280円」
+YEN_RE = re.compile(r'([\d,]+)円')
+# カンマ区切りの数値
+NUMBER_RE = re.compile(r'([\d,]+)')
+# 整数
+DIGITS_RE = re.compile(r'(\d+)')
+
+
+@dataclass(frozen=True)
+class ListTag:
+    """ツリーに残す要素の条件"""
+    name: Optional[str] = None  # タグ名（Noneなら任意）
+    css_class: Optional[str] = None  # このクラスを持つ（CSSの .class と同じ）
+    attr: Optional[str] = None  # この属性の値に contains を含む（CSSの [attr*=value] と同じ）
+    contains: str = ""
+
+    def matches(self, name: str, attrs: dict) -> bool:
+        if self.name is not None and name != self.name:
+            return False
+        if self.css_class is not None:
+            classes = attrs.get("class") or ""
+            if isinstance(classes, str):
+                classes = classes.split()
+            if self.css_class not in classes:
+                return False
+        if self.attr is not None:
+            value = attrs.get(self.attr)
+            if value is None:
+                return False
+            if not isinstance(value, str):
+                value = " ".join(value)
+            if self.contains not in value:
+                return False
+        return True
+
+
+@lru_cache(maxsize=None)
+def listing_strainer(list_tags: tuple[ListTag, ...]) -> SoupStrainer:
+    """list_tags のいずれかに一致する要素だけを残すSoupStrainer"""
+
+    def match(name, attrs=None):
+        if attrs is None:
+            # Tagオブジェクトで呼ばれた場合
+            name, attrs = name.name, name.attrs
+        return any(tag.matches(name, attrs) for tag in list_tags)
+
+    return SoupStrainer(match)
+
+
+def parse_listing(html: str, list_tags: tuple[ListTag, ...] = ()) -> BeautifulSoup:
+    """
+    一覧部分だけを解析する（list_tags が空ならページ全体）
+
+    Args:
+        html: ページのHTML
+        list_tags: ツリーに残す要素の条件
+    """
+    if not list_tags:
+        return BeautifulSoup(html, "lxml")
+    return BeautifulSoup(html, "lxml", parse_only=listing_strainer(tuple(list_tags)))
+
+
+def page_text(html: str) -> str:
+    """ページ全体のテキスト（一覧部分の外にある総件数表示などを読むとき用）"""
+    return BeautifulSoup(html, "lxml").get_text()
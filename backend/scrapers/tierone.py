@@ -2,6 +2,12 @@ import re
 from urllib.parse import urljoin, quote
 from bs4 import BeautifulSoup
 from .base import BaseScraper, Product
+from .parsing import ListTag
+
+# 「￥1,280」形式の価格
+PRICE_RE = re.compile(r"[￥¥]([\d,]+)")
+# 「在庫数:3」
+STOCK_RE = re.compile(r"在庫数[：:]?\s*(\d+)")
 
 
 class TieroneScraper(BaseScraper):
@@ -9,6 +15,7 @@ class TieroneScraper(BaseScraper):
 
     site_name = "Tier One"
     base_url = "https://tier-one.jp"
+    list_tags = (ListTag("ul", "item-list"),)
 
     def build_search_url(self, keyword: str) -> str:
         encoded = quote(keyword, safe="")
@@ -67,7 +74,7 @@ class TieroneScraper(BaseScraper):
         if price_elem:
             price_text = price_elem.get_text(strip=True)
             # ￥1,280 の形式から数値を抽出
-            price_match = re.search(r"[￥¥]([\d,]+)", price_text)
+            price_match = PRICE_RE.search(price_text)
             if price_match:
                 price = int(price_match.group(1).replace(",", ""))
 
@@ -77,13 +84,13 @@ class TieroneScraper(BaseScraper):
 
         # 売り切れチェック: class="item-soldout" や SOLD OUT
         soldout_elem = item.select_one(".item-soldout, .item-list-sold")
-        if soldout_elem or "SOLD OUT" in item.get_text():
+        item_text = item.get_text()
+        if soldout_elem or "SOLD OUT" in item_text:
             stock = 0
             stock_display = "売切れ"
         else:
             # 在庫数を取得: <p class="tac">在庫数:3</p>
-            stock_text = item.get_text()
-            stock_match = re.search(r"在庫数[：:]?\s*(\d+)", stock_text)
+            stock_match = STOCK_RE.search(item_text)
             if stock_match:
                 stock = int(stock_match.group(1))
                 stock_display = "在庫あり" if stock > 0 else "売切れ"
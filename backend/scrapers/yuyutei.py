@@ -2,6 +2,10 @@ import re
 from urllib.parse import urljoin, quote
 from bs4 import BeautifulSoup
 from .base import BaseScraper, Product
+from .parsing import ListTag, DIGITS_RE
+
+# 「4,980 円」形式の価格
+PRICE_RE = re.compile(r"([\d,]+)\s*円")
 
 
 class YuyuteiScraper(BaseScraper):
@@ -9,6 +13,7 @@ class YuyuteiScraper(BaseScraper):
 
     site_name = "遊々亭"
     base_url = "https://yuyu-tei.jp"
+    list_tags = (ListTag("div", "card-product"),)
 
     def build_search_url(self, keyword: str) -> str:
         encoded = quote(keyword, safe="")
@@ -77,7 +82,7 @@ class YuyuteiScraper(BaseScraper):
         price_elem = card.select_one("strong.text-end")
         if price_elem:
             price_text = price_elem.get_text(strip=True)
-            price_match = re.search(r"([\d,]+)\s*円", price_text)
+            price_match = PRICE_RE.search(price_text)
             if price_match:
                 price = int(price_match.group(1).replace(",", ""))
 
@@ -101,7 +106,7 @@ class YuyuteiScraper(BaseScraper):
                     stock_display = "在庫あり"
                 else:
                     # 数字を探す
-                    stock_match = re.search(r"(\d+)", stock_text)
+                    stock_match = DIGITS_RE.search(stock_text)
                     if stock_match:
                         stock = int(stock_match.group(1))
                         stock_display = f"在庫{stock}点"
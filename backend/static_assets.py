@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+フロントエンドの静的ファイルの事前圧縮・フィンガープリント（ビルド）と配信
+
+ビルド（python static_assets.py）で frontend/dist/ に以下を書き出す:
+    style.<hash>.css など   CSS/JSの内容ハッシュ付きコピー（URLが内容ごとに変わるので永続キャッシュできる）
+    index.html など         /static/style.css などの参照をハッシュ付きの名前に書き換えたHTML
+    *.gz / *.br             圧縮済みの版（brotli パッケージがなければ .br は作らない）
+    manifest.json           元の名前 -> ハッシュ付きの名前
+
+配信時は Accept-Encoding を見て圧縮済みのファイルをそのまま返す（リクエストごとの圧縮はしない）。
+dist/ のファイルが元のファイルより古い（ビルド後に編集された）場合や未ビルドの場合は元のファイルを返す
+dist/ にしかないファイルはハッシュ付きの名前（と圧縮済みの版）だけ配信する（manifest.json などは404）
+
+- ハッシュ付きのファイル: Cache-Control: immutable（1年）
+- HTML: no-cache（毎回ETagで再検証し、新しいハッシュの参照にすぐ切り替わる）
+- その他: STATIC_MAX_AGE 秒
+
+使用方法:
+    python static_assets.py            # frontend/dist/ にビルド
+    python static_assets.py --clean    # dist/ を削除してからビルド
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FRONTEND_DIR = Path(__file__).parent.parent / "frontend"
+BUILD_DIR = FRONTEND_DIR / "dist"
+MANIFEST_NAME = "manifest.json"
+
+# 内容ハッシュ付きの名前を作る拡張子（HTMLから参照されるもの）
+FINGERPRINT_EXTENSIONS = {".css", ".js"}
+# 圧縮する拡張子
+COMPRESS_EXTENSIONS = {".html", ".css", ".js", ".xml", ".txt", ".json", ".webmanifest", ".svg", ".ico"}
+# これより小さいファイルは圧縮しない
+MIN_COMPRESS_SIZE = 1024
+# ハッシュの長さ
+HASH_LENGTH = 10
+
+CACHE_CONTROL_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_CONTROL_HTML = "no-cache"
+# ハッシュなしの静的ファイル（画像など）をブラウザにキャッシュさせる秒数
+STATIC_MAX_AGE = int(os.environ.get("STATIC_MAX_AGE", "3600"))
+
+# 優先する順（brはgzipより小さい）
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# ハッシュ付きの名前（圧縮済みの版も含む）。dist/ にしかないファイルはこの形の名前だけ配信する
+_HASHED_NAME_RE = re.compile(
+    rf"^.+\.[0-9a-f]{{{HASH_LENGTH}}}(?:{'|'.join(re.escape(ext) for ext in sorted(FINGERPRINT_EXTENSIONS))})"
+    rf"(?:{'|'.join(re.escape(suffix) for _, suffix in _ENCODINGS)})?$"
+)
+
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+
+
+# =============================================================================
+# ビルド
+# =============================================================================
+
+def _fingerprinted_name(name: str, content: bytes) -> str:
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def _write_with_variants(path: Path, content: bytes) -> list[str]:
+    """ファイルと圧縮済みの版を書き出す → 作成した圧縮形式"""
+    path.write_bytes(content)
+    encodings = []
+    if path.suffix not in COMPRESS_EXTENSIONS or len(content) < MIN_COMPRESS_SIZE:
+        return encodings
+
+    variants = [("gzip", ".gz", gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.insert(0, ("br", ".br", brotli.compress(content, quality=11)))
+    for encoding, suffix, compressed in variants:
+        variant = path.with_name(path.name + suffix)
+        # 小さくならなければ作らない（古い版が残っていれば消す）
+        if len(compressed) < len(content):
+            variant.write_bytes(compressed)
+            encodings.append(encoding)
+        else:
+            variant.unlink(missing_ok=True)
+    return encodings
+
+
+def _rewrite_references(html: str, assets: dict[str, str]) -> str:
+    """/static/<name>（?v=... 付きも）をハッシュ付きの名前に書き換える"""
+    def replace(match):
+        hashed = assets.get(match.group(1))
+        return f"/static/{hashed}" if hashed else match.group(0)
+    return re.sub(r'/static/([\w.\-]+)(\?[^"\'\s>]*)?', replace, html)
+
+
+def build_static_assets(source: Path = FRONTEND_DIR, output: Path = BUILD_DIR, clean: bool = False) -> dict:
+    """
+    静的ファイルをビルドして manifest を返す
+
+    以前のハッシュ付きファイルは消さない（古いHTMLをキャッシュしているブラウザが参照するため）。
+    不要になったら --clean で作り直す
+    """
+    if clean and output.exists():
+        shutil.rmtree(output)
+    output.mkdir(parents=True, exist_ok=True)
+    if brotli is None:
+        print("brotli パッケージがないため .br は作成しません（pip install brotli）")
+
+    files = sorted(p for p in source.iterdir() if p.is_file() and not p.name.startswith("."))
+    manifest = {"assets": {}, "files": {}}
+
+    # CSS/JS: ハッシュ付きの名前で書き出す
+    for path in files:
+        if path.suffix not in FINGERPRINT_EXTENSIONS:
+            continue
+        content = path.read_bytes()
+        hashed = _fingerprinted_name(path.name, content)
+        manifest["assets"][path.name] = hashed
+        manifest["files"][hashed] = _write_with_variants(output / hashed, content)
+
+    # HTML（参照を書き換え）とその他の圧縮対象
+    for path in files:
+        if path.suffix not in COMPRESS_EXTENSIONS or path.suffix in FINGERPRINT_EXTENSIONS:
+            continue
+        content = path.read_bytes()
+        if path.suffix == ".html":
+            content = _rewrite_references(content.decode("utf-8"), manifest["assets"]).encode("utf-8")
+        manifest["files"][path.name] = _write_with_variants(output / path.name, content)
+
+    manifest_path = output / MANIFEST_NAME
+    tmp = manifest_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, manifest_path)
+    return manifest
+
+
+# =============================================================================
+# 配信
+# =============================================================================
+
+@dataclass
+class ResolvedAsset:
+    """配信するファイル"""
+    path: Path
+    media_type: str
+    encoding: Optional[str]  # Content-Encoding（圧縮していなければ None）
+    cache_control: str
+    compressible: bool  # 圧縮済みの版がある（Vary: Accept-Encoding を付ける）
+
+
+class StaticAssets:
+    """manifest を読み込み、リクエストされた名前から配信するファイルを決める"""
+
+    def __init__(self, source: Path = FRONTEND_DIR, build: Path = BUILD_DIR):
+        self.source = source
+        self.build = build
+        self._manifest = {"assets": {}, "files": {}}
+        self._hashed: set[str] = set()
+        self._manifest_mtime = None
+        self._lock = threading.Lock()
+
+    def _load_manifest(self):
+        """manifest が更新されていたら読み込み直す（ビルドは別プロセスで行う）"""
+        path = self.build / MANIFEST_NAME
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._manifest_mtime:
+            return
+        with self._lock:
+            manifest = {"assets": {}, "files": {}}
+            if mtime is not None:
+                try:
+                    manifest = json.loads(path.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    return
+            self._manifest = manifest
+            self._hashed = set(manifest["assets"].values())
+            self._manifest_mtime = mtime
+
+    def resolve(self, name: str, accept_encoding: str = "") -> Optional[ResolvedAsset]:
+        """
+        frontend直下のファイル名から配信するファイルを決める（なければ None）
+
+        サブディレクトリ（uploads など）は対象外（None を返すので通常の配信に任せる）
+        """
+        if not name or "/" in name or "\\" in name or name.startswith("."):
+            return None
+        self._load_manifest()
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+        encodings = self._manifest["files"].get(name)
+        source = self.source / name
+        base = self.build / name
+        if name in self._hashed or (not source.exists() and _HASHED_NAME_RE.match(name) and base.is_file()):
+            # ハッシュ付きのファイル（以前のビルドのものは manifest にないので圧縮済みの版を探す）
+            # manifest.json などハッシュなしの dist/ のファイルは配信しない
+            cache_control = CACHE_CONTROL_IMMUTABLE
+            if encodings is None:
+                encodings = [encoding for encoding, suffix in _ENCODINGS
+                             if base.with_name(base.name + suffix).is_file()]
+        else:
+            if not source.is_file():
+                return None
+            cache_control = CACHE_CONTROL_HTML if name.endswith(".html") else f"public, max-age={STATIC_MAX_AGE}"
+            # 未ビルド・ビルド後に元のファイルが編集された場合は元のファイルを返す
+            if encodings is None or not _is_fresh(base, source) or (name.endswith(".html") and not self._assets_fresh()):
+                return ResolvedAsset(source, media_type, None, cache_control, False)
+
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding, suffix in _ENCODINGS:
+            if encoding in (encodings or ()) and encoding in accepted:
+                return ResolvedAsset(base.with_name(base.name + suffix), media_type, encoding, cache_control, True)
+        return ResolvedAsset(base, media_type, None, cache_control, bool(encodings))
+
+
+    def _assets_fresh(self) -> bool:
+        """ビルド後にCSS/JSが編集されていない（HTMLが古いハッシュを参照していない）"""
+        return all(_is_fresh(self.build / hashed, self.source / name)
+                   for name, hashed in self._manifest["assets"].items())
+
+
+def _is_fresh(built: Path, source: Path) -> bool:
+    try:
+        return built.stat().st_mtime >= source.stat().st_mtime
+    except FileNotFoundError:
+        return False
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    """Accept-Encoding で受け付ける形式（q=0 は除く）"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        encoding, _, params = part.partition(";")
+        encoding = encoding.strip()
+        match = re.search(r"q=([0-9.]+)", params)
+        try:
+            q = float(match.group(1)) if match else 1.0
+        except ValueError:
+            q = 1.0
+        if encoding and q > 0:
+            accepted.add(encoding)
+    if "*" in accepted:
+        accepted.update(encoding for encoding, _ in _ENCODINGS)
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """/static の配信（frontend直下のファイルは StaticAssets で圧縮済み・ハッシュ付きの版を返す）"""
+
+    def __init__(self, *args, assets: "StaticAssets" = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.assets = assets or static_assets
+
+    def asset_response(self, name: str, request_headers: Headers, media_type: str = None) -> Optional[Response]:
+        """frontend直下のファイルのレスポンス（If-None-Match などが一致すれば304、対象外なら None）"""
+        asset = self.assets.resolve(name, request_headers.get("accept-encoding", ""))
+        if asset is None:
+            return None
+        if media_type:
+            asset.media_type = media_type
+        headers = {"Cache-Control": asset.cache_control}
+        if asset.compressible:
+            headers["Vary"] = "Accept-Encoding"
+        if asset.encoding:
+            headers["Content-Encoding"] = asset.encoding
+        response = FileResponse(asset.path, media_type=asset.media_type, headers=headers,
+                                stat_result=os.stat(asset.path))
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def page(self, request: Request, name: str, media_type: str = None) -> Response:
+        """ページ（HTML・robots.txtなど）のレスポンス"""
+        response = self.asset_response(name, request.headers, media_type)
+        if response is None:
+            raise HTTPException(status_code=404)
+        return response
+
+    async def get_response(self, path: str, scope) -> Response:
+        if scope["method"] in ("GET", "HEAD"):
+            response = self.asset_response(path, Headers(scope=scope))
+            if response is not None:
+                return response
+        return await super().get_response(path, scope)
+
+
+# プロセス共通
+static_assets = StaticAssets()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="静的ファイルの事前圧縮・フィンガープリント")
+    parser.add_argument("--clean", action="store_true", help="dist/ を削除してからビルド")
+    args = parser.parse_args()
+
+    manifest = build_static_assets(clean=args.clean)
+    for name, hashed in manifest["assets"].items():
+        print(f"  {name} -> {hashed}")
+    total = raw = 0
+    for name, encodings in manifest["files"].items():
+        size = (BUILD_DIR / name).stat().st_size
+        raw += size
+        smallest = min([(BUILD_DIR / f"{name}{suffix}").stat().st_size
+                        for encoding, suffix in _ENCODINGS if encoding in encodings] or [size])
+        total += smallest
+    print(f"{len(manifest['files'])}ファイルをビルドしました: {BUILD_DIR}（{raw:,} → {total:,} バイト）")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,24 @@
 #!/usr/bin/env python3
-"""カード番号再抽出と類似度マッチング"""
-from database import get_connection, extract_card_number, extract_base_card_name, match_cards_by_name
+"""
+カード番号再抽出と類似度マッチング
 
-def update_all_card_numbers():
-    """全カードのカード番号・基本名を再抽出"""
-    with get_connection() as conn:
-        cursor = conn.cursor()
+カード番号・基本名はカード作成時に抽出して保存するので、通常は未抽出のカードと
+抽出ルール（database.py の CARD_IDENTITY_RULES_VERSION）が変わったカードだけを処理する。
+処理は card_backfill.py（チャンク単位・並列・再開可能）で行う
 
-        # 全カードを取得
-        cursor.execute("SELECT id, name FROM cards")
-        cards = cursor.fetchall()
+使用方法:
+    python update_card_matching.py          # 未抽出のカードのみ
+    python update_card_matching.py --all    # 全カードを再抽出
+"""
+import argparse
 
-        updated = 0
-        for card in cards:
-            card_no = extract_card_number(card['name'])
-            base_name = extract_base_card_name(card['name'])
+from card_backfill import backfill_card_identity, backfill_name_matches
+from database import get_connection
 
-            cursor.execute("""
-                UPDATE cards
-                SET extracted_card_no = ?, base_name = ?
-                WHERE id = ?
-            """, (card_no, base_name, card['id']))
-            updated += 1
 
-        conn.commit()
-        print(f"Updated {updated} cards")
+def update_all_card_numbers(recompute: bool = False):
+    """カード番号・基本名を抽出（recompute=Trueなら全カードを再抽出）"""
+    backfill_card_identity(recompute=recompute)
 
 def show_stats():
     """ショップ別統計を表示"""
@@ -34,10 +28,9 @@ def show_stats():
             SELECT s.name as shop,
                    COUNT(DISTINCT p.card_id) as cards,
                    COUNT(DISTINCT CASE WHEN c.extracted_card_no IS NOT NULL THEN c.id END) as with_no
-            FROM prices p
+            FROM latest_prices p
             JOIN cards c ON p.card_id = c.id
             JOIN shops s ON p.shop_id = s.id
-            WHERE p.id IN (SELECT MAX(id) FROM prices GROUP BY card_id, shop_id)
             GROUP BY s.id
             ORDER BY cards DESC
         """)
@@ -48,10 +41,14 @@ def show_stats():
             print(f"{row['shop']}: {row['cards']}枚中 {row['with_no']}枚 ({pct:.1f}%)")
 
 if __name__ == "__main__":
-    print("=== Step 1: カード番号再抽出 ===")
-    update_all_card_numbers()
+    parser = argparse.ArgumentParser(description="カード番号再抽出と類似度マッチング")
+    parser.add_argument("--all", action="store_true", help="全カードのカード番号・基本名を再抽出")
+    args = parser.parse_args()
+
+    print("=== Step 1: カード番号抽出 ===")
+    update_all_card_numbers(recompute=args.all)
 
     print("\n=== Step 2: 名前マッチング ===")
-    match_cards_by_name()
+    backfill_name_matches()
 
     show_stats()
@@ -13,6 +13,10 @@ from typing import Optional
 import httpx
 from bs4 import BeautifulSoup
 
+from scrapers.driver_pool import driver_pool
+from scrapers.page_wait import WaitStrategy, wait_until_ready
+from scrapers.parsing import ListTag, parse_listing, YEN_RE, NUMBER_RE, DIGITS_RE
+
 from database import (
     get_featured_keywords,
     get_or_create_card,
@@ -24,7 +28,6 @@ from database import (
 
 # 設定
 REQUEST_TIMEOUT = 30.0
-SELENIUM_TIMEOUT = 60
 INTERVAL_BETWEEN_SHOPS = 2  # ショップ間の待機秒数
 INTERVAL_BETWEEN_KEYWORDS = 1  # キーワード間の待機秒数
 
@@ -32,7 +35,20 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 }
 
-# Seleniumドライバー（遅延初期化）
+# Seleniumの読み込み完了条件（検索結果の商品リスト）
+CARDRUSH_WAIT = WaitStrategy(("li.list_item_cell",))
+HOBBYSTATION_WAIT = WaitStrategy(("ul.searchRsultList li",))
+
+# 解析する一覧部分の要素（scrapers/parsing.py参照）
+# フルアヘッドは商品リンクの親要素を参照するのでページ全体を解析する
+CARDRUSH_LIST_TAGS = (ListTag("li", "list_item_cell"),)
+HOBBYSTATION_LIST_TAGS = (ListTag("ul", "searchRsultList"),)
+BATOSUKI_LIST_TAGS = (ListTag("li", attr="class", contains="item_list"), ListTag("li", attr="class", contains="footer_list"))
+TIERONE_LIST_TAGS = (ListTag("ul", "item-list"),)
+# 「在庫数:3」
+TIERONE_STOCK_RE = re.compile(r"在庫数:(\d+)")
+
+# driver_poolから借りているSeleniumドライバー
 _selenium_driver = None
 
 
@@ -43,36 +59,26 @@ def log(message: str):
 
 
 def get_selenium_driver():
-    """Seleniumドライバーを取得（シングルトン）"""
+    """Seleniumドライバーを取得（driver_poolから借り、close_selenium_driverまで保持）"""
     global _selenium_driver
     if _selenium_driver is None:
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
-        from selenium.webdriver.chrome.service import Service
-
-        options = Options()
-        options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument(f"user-agent={HEADERS['User-Agent']}")
-        options.page_load_strategy = "eager"
-
-        _selenium_driver = webdriver.Chrome(options=options)
-        _selenium_driver.set_page_load_timeout(SELENIUM_TIMEOUT)
-
+        _selenium_driver = driver_pool.acquire()
+        # このスクリプトの検索処理は暗黙の待機なし前提
+        _selenium_driver.implicitly_wait(0)
+    elif not driver_pool.is_alive(_selenium_driver):
+        log("Chromeが応答しないため再起動します")
+        _selenium_driver = driver_pool.replace(_selenium_driver)
+        _selenium_driver.implicitly_wait(0)
+
+    driver_pool.record_page(_selenium_driver)
     return _selenium_driver
 
 
 def close_selenium_driver():
-    """Seleniumドライバーを閉じる"""
+    """Seleniumドライバーをプールに返す"""
     global _selenium_driver
     if _selenium_driver:
-        try:
-            _selenium_driver.quit()
-        except:
-            pass
+        driver_pool.release(_selenium_driver)
         _selenium_driver = None
 
 
@@ -114,7 +120,7 @@ def search_fullahead(client: httpx.Client, keyword: str) -> list[dict]:
                     price_elem = link.parent.select_one("span.itemPrice strong") if link.parent else None
                 if price_elem:
                     price_text = price_elem.get_text(strip=True)
-                    match = re.search(r"[\d,]+", price_text)
+                    match = NUMBER_RE.search(price_text)
                     if match:
                         price = int(match.group().replace(",", ""))
 
@@ -168,7 +174,7 @@ def search_batosuki(client: httpx.Client, keyword: str) -> list[dict]:
         except:
             html = response.text
 
-        soup = BeautifulSoup(html, "lxml")
+        soup = parse_listing(html, BATOSUKI_LIST_TAGS)
 
         # 商品アイテムを取得
         items = soup.select("li[class*='item_list'], li[class*='footer_list']")
@@ -198,14 +204,15 @@ def search_batosuki(client: httpx.Client, keyword: str) -> list[dict]:
                 price_elem = item.select_one("span.item_price")
                 if price_elem:
                     price_text = price_elem.get_text(strip=True)
-                    match = re.search(r"([\d,]+)円", price_text)
+                    match = YEN_RE.search(price_text)
                     if match:
                         price = int(match.group(1).replace(",", ""))
 
                 # 在庫（SOLD OUTの場合は価格が表示されない）
                 stock = 1
                 stock_text = "在庫あり"
-                if price == 0 or "SOLD" in str(item).upper() or "売切" in str(item):
+                item_html = str(item) if price else ""
+                if price == 0 or "SOLD" in item_html.upper() or "売切" in item_html:
                     stock = 0
                     stock_text = "売切"
 
@@ -240,7 +247,7 @@ def search_tierone(client: httpx.Client, keyword: str) -> list[dict]:
         if response.status_code != 200:
             return results
 
-        soup = BeautifulSoup(response.text, "lxml")
+        soup = parse_listing(response.text, TIERONE_LIST_TAGS)
 
         # 商品リストを取得（ul.item-list > li）
         item_list = soup.select_one("ul.item-list")
@@ -270,7 +277,7 @@ def search_tierone(client: httpx.Client, keyword: str) -> list[dict]:
                 price_elem = item.select_one("p.price")
                 if price_elem:
                     price_text = price_elem.get_text(strip=True)
-                    match = re.search(r"[\d,]+", price_text)
+                    match = NUMBER_RE.search(price_text)
                     if match:
                         price = int(match.group().replace(",", ""))
 
@@ -279,7 +286,7 @@ def search_tierone(client: httpx.Client, keyword: str) -> list[dict]:
                 stock_text = "在庫あり"
                 stock_elem = item.select_one(".M_lumpinput p.tac")
                 if stock_elem:
-                    stock_match = re.search(r"在庫数:(\d+)", stock_elem.get_text())
+                    stock_match = TIERONE_STOCK_RE.search(stock_elem.get_text())
                     if stock_match:
                         stock_num = int(stock_match.group(1))
                         if stock_num == 0:
@@ -315,25 +322,15 @@ def search_tierone(client: httpx.Client, keyword: str) -> list[dict]:
 
 def search_cardrush_selenium(keyword: str) -> list[dict]:
     """カードラッシュで検索（Selenium）"""
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-
     results = []
     try:
         driver = get_selenium_driver()
         url = f"https://www.cardrush-bs.jp/product-list?keyword={keyword}"
         driver.get(url)
-        time.sleep(3)
+        waited = wait_until_ready(driver, CARDRUSH_WAIT)
+        log(f"    読み込み待ち {waited:.1f}s")
 
-        try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "li.list_item_cell"))
-            )
-        except:
-            pass
-
-        soup = BeautifulSoup(driver.page_source, "lxml")
+        soup = parse_listing(driver.page_source, CARDRUSH_LIST_TAGS)
         items = soup.select("li.list_item_cell")
 
         for item in items[:20]:
@@ -354,7 +351,7 @@ def search_cardrush_selenium(keyword: str) -> list[dict]:
                 price_elem = item.select_one(".item_price, .price")
                 if price_elem:
                     price_text = price_elem.get_text(strip=True)
-                    match = re.search(r"[\d,]+", price_text)
+                    match = NUMBER_RE.search(price_text)
                     if match:
                         price = int(match.group().replace(",", ""))
 
@@ -364,7 +361,7 @@ def search_cardrush_selenium(keyword: str) -> list[dict]:
                 stock_elem = item.select_one("p.stock")
                 if stock_elem:
                     stock_text = stock_elem.get_text(strip=True)
-                    stock_match = re.search(r"(\d+)", stock_text)
+                    stock_match = DIGITS_RE.search(stock_text)
                     if stock_match:
                         stock = int(stock_match.group(1))
                         if stock > 0:
@@ -372,7 +369,8 @@ def search_cardrush_selenium(keyword: str) -> list[dict]:
                         else:
                             stock_text = "売切"
                 # ×や売切表示があれば在庫なし
-                if "×" in str(item) or "売切" in str(item) or "品切" in str(item):
+                item_html = str(item)
+                if "×" in item_html or "売切" in item_html or "品切" in item_html:
                     stock = 0
                     stock_text = "売切"
 
@@ -398,26 +396,16 @@ def search_cardrush_selenium(keyword: str) -> list[dict]:
 
 def search_hobbystation_selenium(keyword: str) -> list[dict]:
     """ホビーステーションで検索（Selenium）"""
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-
     results = []
     try:
         driver = get_selenium_driver()
         # 正しいURL: /bs/product/list?search_word=キーワード
         url = f"https://www.hobbystation-single.jp/bs/product/list?search_word={keyword}"
         driver.get(url)
-        time.sleep(3)
-
-        try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "ul.searchRsultList li"))
-            )
-        except:
-            pass
+        waited = wait_until_ready(driver, HOBBYSTATION_WAIT)
+        log(f"    読み込み待ち {waited:.1f}s")
 
-        soup = BeautifulSoup(driver.page_source, "lxml")
+        soup = parse_listing(driver.page_source, HOBBYSTATION_LIST_TAGS)
 
         # 商品リストを取得（ul.searchRsultList li）
         items = soup.select("ul.searchRsultList li")
@@ -442,7 +430,7 @@ def search_hobbystation_selenium(keyword: str) -> list[dict]:
                 price_elem = item.select_one("div.packageDetail")
                 if price_elem:
                     price_text = price_elem.get_text(strip=True)
-                    match = re.search(r"([\d,]+)円", price_text)
+                    match = YEN_RE.search(price_text)
                     if match:
                         price = int(match.group(1).replace(",", ""))
 
@@ -25,6 +25,10 @@ if shop:
     print(f'Initialized batch progress for shop_id={shop.id}')
 "
 
+# 静的ファイルのビルド（事前圧縮・ハッシュ付きの名前）
+echo "静的ファイルビルド中..."
+python static_assets.py
+
 # サービス再起動
 echo "サービス再起動中..."
 sudo systemctl restart card-price-app
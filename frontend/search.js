@@ -162,7 +162,7 @@ document.addEventListener('DOMContentLoaded', () => {
             ? `<img src="${escapeHtml(proxyImageUrl)}" alt="${escapeHtml(product.name)}" class="product-image" onerror="this.style.display='none';this.nextElementSibling.style.display='flex'"><div class="product-image-placeholder" style="display:none"></div>`
             : '<div class="product-image-placeholder"></div>';
 
-        const redirectUrl = buildRedirectUrl(product.url, product.site, product.name);
+        const redirectUrl = buildRedirectUrl(product);
 
         // お気に入りボタン（ログイン時のみ、card_idがある場合のみ）
         let favoriteBtn = '';
@@ -199,12 +199,20 @@ document.addEventListener('DOMContentLoaded', () => {
         `;
     }
 
-    // リダイレクトURL生成（クリック計測用）
-    function buildRedirectUrl(url, site, cardName) {
+    // リダイレクトURL生成（クリック計測用、IDがなければ名前で計測）
+    function buildRedirectUrl(product) {
         const params = new URLSearchParams();
-        params.set('url', url);
-        if (site) params.set('site', site);
-        if (cardName) params.set('card', cardName);
+        params.set('url', product.url);
+        if (product.card_id) {
+            params.set('card_id', product.card_id);
+        } else if (product.name) {
+            params.set('card', product.name);
+        }
+        if (product.shop_id) {
+            params.set('shop_id', product.shop_id);
+        } else if (product.site) {
+            params.set('site', product.site);
+        }
         return `/api/redirect?${params.toString()}`;
     }
 
@@ -24,7 +24,7 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 
 # 設定
 BASE_URL = "https://dorasuta.jp"
@@ -39,6 +39,25 @@ SPECIAL_PAGES = [
     ("damaged", "傷あり特価", "https://dorasuta.jp/battlespirits/product-list?cid=75&cocd=3"),
 ]
 
+# カード番号（BS65-001 など）
+CARD_NO_RE = re.compile(r'([A-Z]{2,3}\d{1,2}-[A-Z]?\d{1,3})')
+# 価格「1,280円」
+YEN_RE = re.compile(r'([\d,]+)円')
+
+
+def _is_listing_tag(name, attrs=None) -> bool:
+    """商品一覧（div.element）・ページ送り（div.pager）の要素か"""
+    if attrs is None:
+        name, attrs = name.name, name.attrs
+    classes = attrs.get("class") or ""
+    if isinstance(classes, str):
+        classes = classes.split()
+    return name == "div" and ("element" in classes or "pager" in classes)
+
+
+# 商品一覧とページ送りだけを解析する（ページ全体のツリーは作らない）
+LISTING_STRAINER = SoupStrainer(_is_listing_tag)
+
 # バトルスピリッツのシリーズID一覧（179シリーズ）
 BS_SERIES = [
     ("13019", "【BSC51】ディーバブースター メモリアルレコード"),
@@ -315,7 +334,7 @@ def crawl_series(driver, series_id: str, series_name: str, start_page: int = 1)
 
         time.sleep(2)
 
-        soup = BeautifulSoup(driver.page_source, "lxml")
+        soup = BeautifulSoup(driver.page_source, "lxml", parse_only=LISTING_STRAINER)
 
         # 商品を取得
         cards = parse_products(soup, series_id, series_name)
@@ -375,7 +394,7 @@ def crawl_special_page(driver, page_id: str, page_name: str, page_url: str) -> l
 
         time.sleep(2)
 
-        soup = BeautifulSoup(driver.page_source, "lxml")
+        soup = BeautifulSoup(driver.page_source, "lxml", parse_only=LISTING_STRAINER)
 
         # 商品を取得（conditionを渡す）
         cards = parse_products(soup, page_id, page_name, condition)
@@ -450,7 +469,7 @@ def parse_product(element, series_id: str, series_name: str, condition: str = "
 
     # カード番号を抽出
     card_no = None
-    card_no_match = re.search(r'([A-Z]{2,3}\d{1,2}-[A-Z]?\d{1,3})', name)
+    card_no_match = CARD_NO_RE.search(name)
     if card_no_match:
         card_no = card_no_match.group(1)
 
@@ -459,7 +478,7 @@ def parse_product(element, series_id: str, series_name: str, condition: str = "
     for li in element.select("div.description ul li"):
         text = li.get_text()
         if "円" in text:
-            match = re.search(r'([\d,]+)円', text)
+            match = YEN_RE.search(text)
             if match:
                 price = int(match.group(1).replace(",", ""))
             break
@@ -687,7 +706,7 @@ def main():
 
                 time.sleep(2)
 
-                soup = BeautifulSoup(driver.page_source, "lxml")
+                soup = BeautifulSoup(driver.page_source, "lxml", parse_only=LISTING_STRAINER)
 
                 # 商品を取得
                 cards = parse_products(soup, "new_arrivals", "新着")
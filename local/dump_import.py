@@ -0,0 +1,239 @@
+"""
+クロールJSON（data/*.json）のストリーミングインポート（import_yuyutei.py / import_dorasuta.py 共通）
+
+JSON全体を読み込まず、"cards" 配列の要素を1件ずつ読みながら batch_size 件ごとに
+bulk_ingest（1トランザクション）で取り込む。ダンプが大きくてもメモリ使用量は変わらない
+
+取り込み済みの件数（オフセット）はバッチごとに backfill_checkpoints に記録する。
+中断した場合、同じファイルを再実行すると続きから取り込む（--restart で最初から）
+"""
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+# backend ディレクトリをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from database import (
+    bulk_ingest,
+    card_identity,
+    get_connection,
+    get_shop_by_name,
+    save_batch_log,
+)
+
+# 1トランザクションで取り込む件数
+DEFAULT_BATCH_SIZE = 500
+# ファイルを読む単位（バイト数ではなく文字数）
+READ_CHUNK_SIZE = 64 * 1024
+
+
+# =============================================================================
+# JSONのストリーミング読み込み
+# =============================================================================
+
+class _JsonStream:
+    """ファイルを少しずつ読みながらJSONの値を1つずつデコードする"""
+
+    def __init__(self, f, chunk_size: int = READ_CHUNK_SIZE):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """続きを読む（読み終わっていれば False）"""
+        if self._eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        # 処理済みの部分は捨てる
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """空白を読み飛ばして次の1文字（終端なら空文字）"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"JSONの形式が不正です: '{char}' が必要な位置に '{self.peek()}'")
+        self._pos += 1
+
+    def skip(self, char: str) -> bool:
+        """次の文字が char なら読み飛ばす"""
+        if self.peek() == char:
+            self._pos += 1
+            return True
+        return False
+
+    def decode(self):
+        """次の値を1つデコード"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # 値の後に区切り文字が来ていなければ（バッファの終端で数値が切れた場合など）
+            # 続きを読んでからデコードし直す
+            rest = self._buf[end:].lstrip(" \t\r\n")
+            if (not rest or rest[0] not in ",:]}") and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+def iter_json_array(f, key: str = "cards") -> Iterator:
+    """トップレベルのオブジェクトの key の配列を1要素ずつ返す（他のキーの値は読み飛ばす）"""
+    stream = _JsonStream(f)
+    stream.expect("{")
+    while not stream.skip("}"):
+        name = stream.decode()
+        stream.expect(":")
+        if name == key:
+            stream.expect("[")
+            while not stream.skip("]"):
+                yield stream.decode()
+                stream.skip(",")
+        else:
+            stream.decode()
+        stream.skip(",")
+
+
+# =============================================================================
+# 進捗（再開用オフセット）
+# =============================================================================
+
+def _checkpoint_job(shop_name: str, input_path: Path) -> str:
+    # 同名でも中身の違うファイルから再開しないようサイズも含める
+    return f"import:{shop_name}:{input_path.name}:{input_path.stat().st_size}"
+
+
+def load_offset(job: str) -> int:
+    with get_connection() as conn:
+        row = conn.execute("SELECT last_id FROM backfill_checkpoints WHERE job = ?", (job,)).fetchone()
+    return row["last_id"] if row else 0
+
+
+def save_offset(job: str, offset: int, processed: int):
+    with get_connection() as conn:
+        conn.execute("""
+            INSERT INTO backfill_checkpoints (job, last_id, processed, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(job) DO UPDATE SET
+                last_id = excluded.last_id,
+                processed = backfill_checkpoints.processed + excluded.processed,
+                updated_at = excluded.updated_at
+        """, (job, offset, processed))
+        conn.commit()
+
+
+def clear_offset(job: str):
+    with get_connection() as conn:
+        conn.execute("DELETE FROM backfill_checkpoints WHERE job = ?", (job,))
+        conn.commit()
+
+
+# =============================================================================
+# インポート
+# =============================================================================
+
+def import_dump(input_path: Path, shop_name: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                restart: bool = False, prepare: Callable[[dict], None] = None) -> dict:
+    """
+    クロールJSONをストリーミングで取り込む
+
+    Args:
+        input_path: 入力JSONファイル
+        shop_name: ショップ名
+        batch_size: 1トランザクションで取り込む件数
+        restart: 記録済みのオフセットを無視して最初から取り込む
+        prepare: 取り込む前に各カードに適用する処理（状態をstock_textに付けるなど）
+
+    Returns:
+        {"total", "new", "saved", "skipped_offset"}、ショップがなければ None
+    """
+    shop = get_shop_by_name(shop_name)
+    if not shop:
+        print(f"エラー: ショップ '{shop_name}' が見つかりません")
+        return None
+
+    job = _checkpoint_job(shop_name, input_path)
+    offset = 0 if restart else load_offset(job)
+    if offset:
+        print(f"前回の続きから取り込みます: {offset}件目以降（最初からは --restart）")
+
+    started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    started = time.monotonic()
+    file_size = input_path.stat().st_size
+    result = {"total": 0, "new": 0, "saved": 0, "skipped_offset": offset}
+
+    # 既存カードの確認をDBに問い合わせないよう、カード名→IDを読み込んでおく
+    card_identity.preload()
+
+    def flush(batch: list[dict], position: int, read_bytes: int):
+        ingest = bulk_ingest(shop.id, batch)
+        result["total"] += ingest["total"]
+        result["new"] += ingest["new"]
+        result["saved"] += ingest["saved"]
+        save_offset(job, position, len(batch))
+
+        elapsed = time.monotonic() - started
+        rate = result["total"] / elapsed if elapsed else 0
+        percent = read_bytes / file_size * 100 if file_size else 100
+        print(f"  {position}件目まで取り込み（{percent:.0f}%、{rate:.0f}件/秒）", flush=True)
+
+    batch = []
+    position = 0
+    with open(input_path, "r", encoding="utf-8") as f:
+        for card_data in iter_json_array(f, "cards"):
+            position += 1
+            if position <= offset:
+                continue
+            if prepare:
+                prepare(card_data)
+            batch.append(card_data)
+            if len(batch) >= batch_size:
+                flush(batch, position, f.buffer.tell())
+                batch = []
+        if batch:
+            flush(batch, position, file_size)
+
+    clear_offset(job)
+    elapsed = time.monotonic() - started
+
+    print()
+    print(f"インポート完了（{elapsed:.1f}秒）")
+    print(f"  処理カード数: {result['total']}")
+    print(f"  新規登録数: {result['new']}")
+    print(f"  価格保存数: {result['saved']}")
+
+    # バッチログを保存
+    save_batch_log(
+        batch_type="import",
+        shop_name=shop_name,
+        status="success",
+        pages_processed=1,
+        cards_total=result["total"],
+        cards_new=result["new"],
+        message="ローカルからインポート完了" + (f"（{offset}件目から再開）" if offset else ""),
+        started_at=started_at
+    )
+    return result
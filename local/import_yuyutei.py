@@ -2,25 +2,19 @@
 遊々亭データインポート（EC2で実行）
 ローカルでクロールしたJSONデータをDBに取り込む
 
+JSONはカード1件ずつ読み込み、--batch-size 件ごとにまとめて取り込む（dump_import.py）。
+中断した場合は同じコマンドを再実行すると続きから取り込む
+
 使用方法:
   python import_yuyutei.py --input /home/ubuntu/project/data/yuyutei_20260128.json
+  python import_yuyutei.py --input ... --batch-size 1000
+  python import_yuyutei.py --input ... --restart   # 最初から取り込み直す
 """
 
 import argparse
-import json
-import sys
-from datetime import datetime
 from pathlib import Path
 
-# backend ディレクトリをパスに追加
-sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
-
-from database import (
-    get_or_create_card_v2,
-    get_shop_by_name,
-    save_price_if_changed,
-    save_batch_log,
-)
+from dump_import import DEFAULT_BATCH_SIZE, import_dump
 
 SHOP_NAME = "遊々亭"
 
@@ -28,6 +22,9 @@ SHOP_NAME = "遊々亭"
 def main():
     parser = argparse.ArgumentParser(description="遊々亭データインポート")
     parser.add_argument("--input", type=str, required=True, help="入力JSONファイル")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"1トランザクションで取り込む件数（デフォルト: {DEFAULT_BATCH_SIZE}）")
+    parser.add_argument("--restart", action="store_true", help="前回の続きからではなく最初から取り込む")
 
     args = parser.parse_args()
 
@@ -39,70 +36,9 @@ def main():
     print(f"遊々亭データインポート開始")
     print(f"入力ファイル: {input_path}")
 
-    # JSONを読み込み
-    with open(input_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    cards = data.get("cards", [])
-    print(f"カード数: {len(cards)}")
-
-    # ショップを取得
-    shop = get_shop_by_name(SHOP_NAME)
-    if not shop:
-        print(f"エラー: ショップ '{SHOP_NAME}' が見つかりません")
+    result = import_dump(input_path, SHOP_NAME, batch_size=args.batch_size, restart=args.restart)
+    if result is None:
         print("先にshopsテーブルに遊々亭を追加してください")
-        return
-
-    started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    total_cards = 0
-    new_cards = 0
-    prices_saved = 0
-
-    for card_data in cards:
-        total_cards += 1
-
-        # カードを登録
-        card = get_or_create_card_v2(
-            name=card_data["name"],
-            card_no=card_data.get("card_no"),
-            source_shop_id=shop.id,
-            detail_url=card_data.get("detail_url"),
-        )
-
-        today_str = datetime.now().strftime("%Y-%m-%d")
-        if card.first_seen_at and str(card.first_seen_at).startswith(today_str):
-            new_cards += 1
-
-        # 価格を保存
-        if card_data.get("price", 0) > 0:
-            save_price_if_changed(
-                card_id=card.id,
-                shop_id=shop.id,
-                price=card_data["price"],
-                stock=card_data.get("stock", 0),
-                stock_text=card_data.get("stock_text", ""),
-                url=card_data.get("detail_url", ""),
-                image_url=card_data.get("image_url", ""),
-            )
-            prices_saved += 1
-
-    print()
-    print(f"インポート完了")
-    print(f"  処理カード数: {total_cards}")
-    print(f"  新規登録数: {new_cards}")
-    print(f"  価格保存数: {prices_saved}")
-
-    # バッチログを保存
-    save_batch_log(
-        batch_type="import",
-        shop_name=SHOP_NAME,
-        status="success",
-        pages_processed=1,
-        cards_total=total_cards,
-        cards_new=new_cards,
-        message=f"ローカルからインポート完了",
-        started_at=started_at
-    )
 
 
 if __name__ == "__main__":
@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 """v7マイグレーション実行スクリプト"""
-from database import migrate_v7_card_groups, update_card_numbers
+from database import migrate_v7_card_groups, migrate_v16_card_identity_version
+from card_backfill import backfill_card_identity
 
 print("Running migration v7...")
 migrate_v7_card_groups()
 
+# カード番号の抽出は card_backfill（チャンクごとのトランザクション・identity_version の記録）で行う
 print("Updating card numbers...")
-update_card_numbers()
+migrate_v16_card_identity_version()
+backfill_card_identity()
 
 print("Done!")